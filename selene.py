@@ -1,20 +1,81 @@
 # selene.py
 import sqlite3
+import sys
 from datetime import date
 
 DB_FILE = "selene.db"
+PAGE_SIZE = 20
 
-# create table if it doesn't exist
-with sqlite3.connect(DB_FILE) as conn:
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS cycle_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            log_date TEXT,
-            phase TEXT,
-            symptoms TEXT,
-            mood TEXT
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cycle_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    log_date TEXT,
+    phase TEXT,
+    symptoms TEXT,
+    mood TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cycle_log_date ON cycle_log(log_date);
+"""
+
+_conn = None
+
+
+def get_conn():
+    """The one connection this process uses, opened (and the table created) on first call."""
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(DB_FILE)
+        # WAL lets `show` read while another process logs; NORMAL sync is
+        # still crash-safe in WAL mode and saves an fsync per commit
+        _conn.execute("PRAGMA journal_mode = WAL")
+        _conn.execute("PRAGMA synchronous = NORMAL")
+        _conn.execute("PRAGMA busy_timeout = 5000")
+        _conn.execute("PRAGMA cache_size = -16000")  # 16 MB
+        _conn.execute("PRAGMA temp_store = MEMORY")
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def close():
+    global _conn
+    if _conn is not None:
+        _conn.execute("PRAGMA optimize")
+        _conn.close()
+        _conn = None
+
+
+def insert_logs(rows):
+    """Insert (log_date, phase, symptoms, mood) tuples in one transaction. Returns the count."""
+    conn = get_conn()
+    with conn:
+        cur = conn.executemany(
+            "INSERT INTO cycle_log (log_date, phase, symptoms, mood) VALUES (?,?,?,?)", rows
         )
-    """)
+    return cur.rowcount
+
+
+def iter_logs(page_size=PAGE_SIZE):
+    """Yield pages (lists of rows) newest first.
+
+    Each page is one indexed range query continuing after the last row of the
+    previous one (keyset pagination), so page 10,000 costs the same as page 1
+    and memory never holds more than a page.
+    """
+    conn = get_conn()
+    page = conn.execute(
+        "SELECT * FROM cycle_log ORDER BY log_date DESC, id DESC LIMIT ?", (page_size,)
+    ).fetchall()
+    while page:
+        yield page
+        last = page[-1]
+        page = conn.execute(
+            # the first term bounds the index range; the second only sorts out
+            # ties on the last page's date
+            "SELECT * FROM cycle_log WHERE log_date <= ? AND (log_date < ? OR id < ?) "
+            "ORDER BY log_date DESC, id DESC LIMIT ?",
+            (last[1], last[1], last[0], page_size),
+        ).fetchall()
+
 
 def log_cycle():
     today = input("Date (YYYY-MM-DD) [default today]: ").strip() or str(date.today())
@@ -22,29 +83,32 @@ def log_cycle():
     symptoms = input("Symptoms (comma-separated): ").strip()
     mood = input("Mood: ").strip()
 
-    with sqlite3.connect(DB_FILE) as conn:
-        conn.execute(
-            "INSERT INTO cycle_log (log_date, phase, symptoms, mood) VALUES (?,?,?,?)",
-            (today, phase, symptoms, mood),
-        )
+    insert_logs([(today, phase, symptoms, mood)])
     print(f"\n🌙 Cycle info saved for {today}!\n")
 
-def show_logs():
-    with sqlite3.connect(DB_FILE) as conn:
-        rows = conn.execute("SELECT * FROM cycle_log ORDER BY log_date DESC").fetchall()
-    print("\n=== Your Logged Cycles ===")
-    for r in rows:
-        print(f"{r[1]} | phase: {r[2]} | mood: {r[4]} | symptoms: {r[3]}")
+
+def show_logs(page_size=PAGE_SIZE, out=sys.stdout):
+    print("\n=== Your Logged Cycles ===", file=out)
+    interactive = sys.stdin.isatty()
+    for page in iter_logs(page_size):
+        out.write("".join(f"{r[1]} | phase: {r[2]} | mood: {r[4]} | symptoms: {r[3]}\n" for r in page))
+        if interactive and len(page) == page_size:
+            if input("-- Enter for more, q to stop -- ").strip().lower() == "q":
+                break
+
 
 if __name__ == "__main__":
-    while True:
-        cmd = input("» ").strip().lower()
-        if cmd == "log":
-            log_cycle()
-        elif cmd == "show":
-            show_logs()
-        elif cmd in ("quit", "exit"):
-            print("Goodbye 🌸")
-            break
-        else:
-            print("Commands: log, show, quit")
+    try:
+        while True:
+            cmd = input("» ").strip().lower()
+            if cmd == "log":
+                log_cycle()
+            elif cmd == "show":
+                show_logs()
+            elif cmd in ("quit", "exit"):
+                print("Goodbye 🌸")
+                break
+            else:
+                print("Commands: log, show, quit")
+    finally:
+        close()
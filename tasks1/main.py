@@ -1,36 +1,136 @@
 # tasks1/main.py
 # Simple JSON-based task manager prototype for the assignment
 
+import copy
+import hashlib
 import json
 import os
 import argparse
+from contextlib import contextmanager
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks
+    fcntl = None
+
 DATA_FILE = "tasks1_tasks.json"
 
 
+# Several processes may use the file at once. Writes are atomic (temp file +
+# rename) and happen under an advisory lock. save_tasks() is optimistic: if
+# the file changed since this process's load_tasks(), it merges its own
+# changes into the newer contents instead of overwriting them.
+class ConflictError(ValueError):
+    """Another process changed or removed a task that this save also changed."""
+
+
+_loaded = {}  # DATA_FILE -> (digest, tasks) as last read or written by this process
+
+
+@contextmanager
+def _locked(exclusive=True):
+    if fcntl is None:
+        yield
+        return
+    with open(DATA_FILE + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _read_raw():
+    try:
+        with open(DATA_FILE, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return b""
+
+
+def _parse(raw):
+    if not raw.strip():
+        return []
+    try:
+        return json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        # writes are atomic, so this is damage from outside; reading it as
+        # empty would let the next save wipe every task
+        raise ValueError(f"{DATA_FILE} is not valid JSON; fix or restore it first.") from None
+
+
+def _digest(raw):
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
 def load_tasks():
     """Load tasks from the JSON file, or return empty list if none."""
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return []
-    return []
+    with _locked(exclusive=False):
+        raw = _read_raw()
+    tasks = _parse(raw)
+    _loaded[DATA_FILE] = (_digest(raw), copy.deepcopy(tasks))
+    return tasks
 
 
 def save_tasks(tasks):
-    """Save list of tasks back to the JSON file."""
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, indent=2)
+    """Save list of tasks back to the JSON file.
+
+    If another process saved since our load_tasks(), the tasks we added,
+    removed or edited relative to what we loaded are applied to its version
+    (see _merge) rather than overwriting it.
+    """
+    with _locked():
+        raw = _read_raw()
+        digest, base = _loaded.get(DATA_FILE, (None, None))
+        if base is not None and _digest(raw) != digest:
+            tasks = _merge(base, tasks, _parse(raw))
+        out = json.dumps(tasks, indent=2).encode("utf-8")
+        tmp = f"{DATA_FILE}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(out)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, DATA_FILE)
+    _loaded[DATA_FILE] = (_digest(out), copy.deepcopy(tasks))
+
+
+def _merge(base, mine, theirs):
+    """Three-way merge by task id: their list, with our edits, removals and additions applied.
+
+    An added task whose id they also used gets the next free id (updated in
+    place). Editing a task they edited differently or removed, or removing
+    one they edited, raises ConflictError.
+    """
+    base_by_id = {t["id"]: t for t in base}
+    mine_by_id = {t["id"]: t for t in mine}
+    merged = {t["id"]: t for t in theirs}
+    for task_id, old in base_by_id.items():
+        new, current = mine_by_id.get(task_id), merged.get(task_id)
+        if new == old or new is None is current:
+            continue  # untouched by us (keep whatever they have), or removed on both sides
+        if current is None or (current != old and current != new):
+            raise ConflictError(f"Task #{task_id} was changed by another process; reload and retry.")
+        if new is None:
+            del merged[task_id]
+        else:
+            merged[task_id] = new
+    added = [t for t in mine if t["id"] not in base_by_id]
+    for t in added:
+        if t["id"] in merged:
+            t["id"] = max(merged) + 1
+        merged[t["id"]] = t
+    return list(merged.values())
 
 
 def add_task(title):
     """Add a new task with a title."""
     tasks = load_tasks()
     task = {
-        "id": len(tasks) + 1,
+        # max + 1 rather than len + 1, which repeats an id once a task before the
+        # last is removed. No counter is stored, so removing the highest-numbered
+        # task does free its id for the next add.
+        "id": max((t["id"] for t in tasks), default=0) + 1,
         "title": title,
         "created": datetime.now().isoformat(timespec="seconds"),
         "status": "open",
@@ -76,14 +176,17 @@ def main():
 
     args = parser.parse_args()
 
-    if args.cmd == "add":
-        add_task(args.title)
-    elif args.cmd == "list":
-        list_tasks()
-    elif args.cmd == "search":
-        search_tasks(args.keyword)
-    else:
-        parser.print_help()
+    try:
+        if args.cmd == "add":
+            add_task(args.title)
+        elif args.cmd == "list":
+            list_tasks()
+        elif args.cmd == "search":
+            search_tasks(args.keyword)
+        else:
+            parser.print_help()
+    except ValueError as e:  # corrupt data file, or a conflicting concurrent edit
+        raise SystemExit(f"Error: {e}")
 
 
 if __name__ == "__main__":
@@ -1,13 +1,36 @@
-# tasks2/selene.py — Selene: Self-Knowledge System (JSON-based, single-file app)
+# tasks2/selene.py — Selene: Self-Knowledge System (JSON or SQLite storage)
 # Python 3.10+
 
 import argparse
+import gc
+import heapq
 import json
+import marshal
+import mmap
 import os
-from datetime import datetime, timedelta
+import sys
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, timedelta
 from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so keep to one writer at a time there
+    fcntl = None
+
+from selene_cycles import compute_stats, fold_entry, interval_halfwidth, length_moments
+from selene_records import ABSENT, RECORD_TYPES, CycleEntry, Note, Task, json_default, pack_day
+from selene_tags import TagIndex, parse as parse_tags
+from selene_trace import CAPTURES, add_bytes, count, phase, traced, tracing
 
 DATA_FILE = "selene_data.json"
+DB_FILE = "selene.db"  # shared with the root selene.py cycle logger
+BACKEND = os.environ.get("SELENE_BACKEND", "json")  # json | sqlite
+# the journal is folded back into the snapshot once it grows past this size
+JOURNAL_COMPACT_BYTES = 256 * 1024
+CACHE_VERSION = 2  # bump when the sidecar cache layout changes
 
 
 # -----------------------------
@@ -17,26 +40,783 @@ def _now():
     return datetime.now().isoformat(timespec="seconds")
 
 
-def load_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                data = {}
-    else:
-        data = {}
+def _journal_path(path=None):
+    return os.path.splitext(path or DATA_FILE)[0] + ".journal"
+
+
+def _search_path(path=None):
+    return os.path.splitext(path or DATA_FILE)[0] + ".search.db"
+
+
+def _bodies_path(path=None):
+    return os.path.splitext(path or DATA_FILE)[0] + ".bodies"
+
+
+def _cache_path(path=None):
+    return os.path.splitext(path or DATA_FILE)[0] + ".cache"
+
+
+def _lock_path(path=None):
+    return os.path.splitext(path or DATA_FILE)[0] + ".lock"
+
+
+@contextmanager
+def file_lock(path=None, exclusive=True):
+    """Advisory lock on the store's .lock file: exclusive for writers, shared for readers.
+
+    Not reentrant; JsonStore._locked() nests it for the store's own use.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(_lock_path(path), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def write_atomic(path, raw):
+    """Replace `path` with the bytes `raw`: readers see the old file or the new one, never half of one."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    add_bytes("written", len(raw))
+
+
+def _disk_state(path=None):
+    """(snapshot mtime and size, journal size): changes whenever any process commits or compacts."""
+    path = path or DATA_FILE
+    try:
+        st = os.stat(path)
+        snapshot = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        snapshot = None
+    try:
+        journal = os.path.getsize(_journal_path(path))
+    except FileNotFoundError:
+        journal = 0
+    return snapshot, journal
+
+
+def socket_path():
+    return os.environ.get("SELENE_SOCKET") or os.path.splitext(DATA_FILE)[0] + ".sock"
+
+
+def load_data(path=None):
+    path = path or DATA_FILE
+    data = _read_snapshot(path)
     # default structure
     data.setdefault("tasks", [])
     data.setdefault("notes", [])
     data.setdefault("cycle_logs", [])  # entries: {"date":"YYYY-MM-DD","phase":"start|end|note","symptoms":[],"mood":""}
     data.setdefault("config", {"avg_cycle_length": 28})
+    data.setdefault("meta", {"seq": 0})  # seq = last journal record folded into this state
+    if "cycle_stats" not in data:  # snapshots from before the aggregate block
+        data["cycle_stats"] = compute_stats(data["cycle_logs"])
+    with phase("load.journal"):
+        _replay_journal(data, path)
     return data
 
 
-def save_data(data):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+_encode = json.JSONEncoder(check_circular=False, default=json_default).encode
+
+
+def snapshot_json(data):
+    """The snapshot as indented JSON with one record per line.
+
+    json.dumps(indent=...) always takes the pure-Python encoder; encoding
+    record by record keeps the C one, which is several times faster on big stores.
+    """
+    parts = []
+    for key, value in data.items():
+        if isinstance(value, list) and value:
+            body = "[\n    " + ",\n    ".join(map(_encode, value)) + "\n  ]"
+        else:
+            body = json.dumps(value, indent=2).replace("\n", "\n  ")  # no raw newlines inside JSON strings
+        parts.append(f"  {_encode(key)}: {body}")
+    return "{\n" + ",\n".join(parts) + "\n}"
+
+
+def save_data(data, path=None):
+    """Write a full snapshot. Everything up to data["meta"]["seq"] is now in it."""
+    path = path or DATA_FILE
+    raw = snapshot_json(data).encode("utf-8")
+    write_atomic(path, raw)
+    _write_cache(path, os.stat(path), _digest(raw), data)
+
+
+# -----------------------------
+# Snapshot cache
+# -----------------------------
+# selene_data.cache holds the parsed snapshot as marshal data, records as
+# selene_records row tuples, behind a length-prefixed header of (version,
+# mtime_ns, size, blake2b, marshal version) describing the JSON it came from.
+# Same mtime and size: use it without touching the JSON. Otherwise
+# the JSON is read and hashed, and only parsed if the hash differs.
+def _digest(raw):
+    import hashlib  # only on cache misses and snapshot writes; it is slow to import
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def _read_snapshot(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    with phase("load.cache"):
+        data = _read_cache(path, lambda h: h[1:3] == (st.st_mtime_ns, st.st_size))
+    if data is not None:
+        return data
+    with phase("load.parse"):
+        with open(path, "rb") as f:
+            raw = f.read()
+        add_bytes("read", len(raw))
+        digest = _digest(raw)
+    with phase("load.cache"):
+        data = _read_cache(path, lambda h: h[3] == digest)  # touched or copied, same content
+    if data is None:
+        with phase("load.parse"):
+            try:
+                data = json.loads(raw)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                # snapshots are written atomically, so this is damage from outside;
+                # treating it as empty would let the next compaction wipe the store
+                raise ValueError(f"{path} is not valid JSON; restore it from a backup or export.") from None
+            was_enabled = gc.isenabled()
+            gc.disable()  # as in _read_cache: the records hold no cycles
+            try:
+                for kind, cls in RECORD_TYPES.items():
+                    if isinstance(data.get(kind), list):
+                        data[kind] = [cls.from_dict(r) for r in data[kind]]
+            finally:
+                if was_enabled:
+                    gc.enable()
+    with phase("save.cache"):
+        _write_cache(path, st, digest, data)
+    return data
+
+
+def _read_cache(path, valid):
+    """The cached snapshot if the cache header passes valid(header), else None."""
+    try:
+        with open(_cache_path(path), "rb") as f:
+            header = marshal.loads(f.read(int.from_bytes(f.read(4), "little")))
+            if isinstance(header, tuple) and len(header) == 5 and header[0] == CACHE_VERSION \
+                    and header[4] == marshal.version and valid(header):
+                raw = f.read()  # one read; marshal.load(f) reads piecemeal
+                add_bytes("read", f.tell())
+                # the loaded tree holds no cycles; skipping GC passes over it is ~2-3x faster
+                was_enabled = gc.isenabled()
+                gc.disable()
+                try:
+                    data = marshal.loads(raw)
+                    for kind, cls in RECORD_TYPES.items():
+                        if kind in data:
+                            data[kind] = list(map(cls.from_row, data[kind]))
+                    return data
+                finally:
+                    if was_enabled:
+                        gc.enable()
+    except (OSError, EOFError, ValueError, TypeError):
+        pass  # missing, truncated or foreign cache: fall back to the JSON
+    return None
+
+
+def _write_cache(path, st, digest, data):
+    # write-then-rename so a reader never sees a half-written cache
+    cache = _cache_path(path)
+    tmp = f"{cache}.{os.getpid()}.tmp"
+    header = marshal.dumps((CACHE_VERSION, st.st_mtime_ns, st.st_size, digest, marshal.version))
+    with open(tmp, "wb") as f:
+        rows = {kind: [(r if isinstance(r, cls) else cls.from_dict(r)).row() for r in data[kind]]
+                for kind, cls in RECORD_TYPES.items() if kind in data}
+        f.write(len(header).to_bytes(4, "little") + header + marshal.dumps({**data, **rows}))
+        add_bytes("written", f.tell())
+    os.replace(tmp, cache)
+
+
+# -----------------------------
+# Journal (append-only mutation log)
+# -----------------------------
+# Each mutation is one JSON line: {"seq": n, "op": "task_add", ...}.
+# State = snapshot + every journal record with seq > snapshot's meta.seq.
+def apply_op(data, op, ix):
+    """Apply one journal record to `data`, keeping the in-memory indexes `ix` (see build_indexes) in step."""
+    kind = op["op"]
+    if kind == "task_add":
+        t = Task.from_dict(op["record"])
+        _add_record(data, ix, "tasks", t)
+        ix["task_tags"].add(t)
+        k = _due_key(t)
+        if k:
+            insort(ix["due"], k)
+    elif kind == "task_done":
+        t = ix["tasks"].get(op["id"])
+        if t is not None:
+            _unindex_due(ix["due"], t)
+            t["status"] = "done"
+            t["updated"] = op["at"]
+    elif kind == "task_delete":
+        t = ix["tasks"].pop(op["id"], None)
+        if t is not None:
+            _unindex_due(ix["due"], t)
+            ix["task_tags"].remove(t)
+            _remove_record(data["tasks"], t)
+    elif kind == "note_add":
+        n = Note.from_dict(op["record"])
+        _add_record(data, ix, "notes", n)
+        ix["note_tags"].add(n)
+    elif kind == "cycle_log":
+        entry = op["entry"]
+        e = CycleEntry.from_dict(entry)
+        # keep sorted by date: binary-search the slot (after equal dates) instead of re-sorting
+        logs = data["cycle_logs"]
+        if not logs or logs[-1].date <= e.date:
+            logs.append(e)  # the usual case, and every row of an in-order import
+        else:
+            insort(logs, e, key=_entry_date)
+        if entry["phase"] == "start":
+            starts, x = ix["starts"], _ordinal(entry["date"])
+            i = bisect_right(starts, x)
+            fold_entry(data["cycle_stats"], entry, starts[i - 1] if i else None,
+                       starts[i] if i < len(starts) else None)
+            starts.insert(i, x)
+        else:
+            fold_entry(data["cycle_stats"], entry)
+    else:
+        raise ValueError(f"Unknown journal op: {kind}")
+    data["meta"]["seq"] = op["seq"]
+
+
+def build_indexes(data):
+    """In-memory indexes over `data`, maintained by apply_op.
+
+    tasks/notes: id -> record hash index every by-ID lookup goes through.
+    starts: sorted date ordinals of the "start" cycle logs.
+    due: sorted (packed due date, id) of open tasks with a due date.
+    task_tags/note_tags: tag -> id posting sets (selene_tags.TagIndex).
+    """
+    return {
+        "tasks": {t.id: t for t in data["tasks"]},
+        "task_tags": TagIndex(data["tasks"]),
+        "note_tags": TagIndex(data["notes"]),
+        "due": sorted(k for k in map(_due_key, data["tasks"]) if k),
+        "notes": {n.id: n for n in data["notes"]},
+        "starts": sorted(_ordinal(e["date"]) for e in data["cycle_logs"] if e.phase == "start"),
+    }
+
+
+def _due_key(t):
+    """(packed due date, id) for an open task with a due date, else None.
+
+    Free text from before dues were checked packs to None (see selene_records).
+    """
+    if t.status != "open" or t.due is None:
+        return None
+    return t.due, t.id
+
+
+def _unindex_due(due, t):
+    k = _due_key(t)
+    if k:
+        i = bisect_left(due, k)
+        if i < len(due) and due[i] == k:
+            del due[i]
+
+
+def _entry_date(e):
+    return e.date
+
+
+def _updated(r):
+    return r.updated
+
+
+def _ordinal(iso):
+    return parse_date(iso).toordinal()
+
+
+def _add_record(data, ix, kind, record):
+    data[kind].append(record)
+    ix[kind][record.id] = record
+    # the persisted counter never hands out an id twice, even after deletes
+    counters = data["meta"].setdefault("next_id", {})
+    counters[kind] = max(counters.get(kind, 1), record.id + 1)
+
+
+def _remove_record(seq, record):
+    # ids are handed out in increasing order, so the list is sorted by id:
+    # find the slot by bisection instead of rebuilding the list
+    i = bisect_left(seq, record.id, key=lambda r: r.id)
+    if i < len(seq) and seq[i] is record:
+        del seq[i]
+    else:  # hand-edited file that is out of order
+        seq.remove(record)
+
+
+def _replay_journal(data, path=None):
+    journal = _journal_path(path)
+    if not os.path.exists(journal):
+        return
+    ix = build_indexes(data)
+    seq = data["meta"]["seq"]
+    replayed = 0
+    with open(journal, "r", encoding="utf-8") as f:
+        add_bytes("read", os.fstat(f.fileno()).st_size)
+        for line in f:
+            try:
+                op = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line torn by a crash mid-append was never acknowledged; later ones were
+            if op["seq"] > seq:  # older records are already in the snapshot
+                apply_op(data, op, ix)
+                seq = op["seq"]
+                replayed += 1
+    count("replayed", replayed)
+
+
+_encode_op = json.JSONEncoder(separators=(",", ":"), check_circular=False).encode
+
+
+def append_journal(ops, path=None):
+    """Append already-applied mutations to the journal; returns its new size.
+
+    Called under the store's lock. A crash mid-append leaves a torn last line;
+    it is cut off first, so the new records start on a line of their own.
+    """
+    journal = _journal_path(path)
+    with open(journal, "a+b") as f:
+        _drop_torn_tail(f)
+        raw = "".join(_encode_op(op) + "\n" for op in ops).encode("ascii")
+        f.write(raw)
+        add_bytes("written", len(raw))
+        return f.tell()
+
+
+def _drop_torn_tail(f, chunk=4096):
+    """Truncate the journal open in `f` back to the end of its last complete line."""
+    end = f.seek(0, os.SEEK_END)
+    if end == 0:
+        return
+    f.seek(end - 1)
+    if f.read(1) == b"\n":
+        return
+    pos = end
+    while pos > 0:
+        step = min(chunk, pos)
+        f.seek(pos - step)
+        nl = f.read(step).rfind(b"\n")
+        if nl >= 0:
+            pos += nl + 1 - step
+            break
+        pos -= step
+    f.truncate(pos)
+
+
+def compact_data(data, path=None):
+    """Fold the journal into a fresh snapshot and start a new journal."""
+    save_data(data, path)
+    # safe to crash between these two steps: replay skips seq <= meta.seq
+    if os.path.exists(_journal_path(path)):
+        os.remove(_journal_path(path))
+
+
+# -----------------------------
+# Stores (pluggable backends)
+# -----------------------------
+SEARCH_OPS = {"task_add", "note_add", "task_delete"}  # mutations the search index follows
+_SERVED_STORE = None  # set by selene_serve while the daemon runs
+
+
+class JsonStore:
+    """Default backend: the JSON snapshot + journal, fully loaded into memory.
+
+    Fine for small stores. SqliteStore (selene_sqlite.py) offers the same
+    methods backed by indexed tables.
+    """
+
+    def __init__(self, path=None, flush_interval=None):
+        self.path = path or DATA_FILE
+        self._lock_depth = 0
+        with phase("load"):
+            with file_lock(self.path, exclusive=False):  # not mid-compaction by another process
+                self.data = load_data(self.path)
+                self._seen = _disk_state(self.path)
+            self._ix = build_indexes(self.data)
+        for kind in RECORD_TYPES:
+            count("loaded." + kind, len(self.data[kind]))
+        self._index = None
+        self._vectors = None  # selene_vectors.VectorIndex, opened by the first similar()
+        self._bodies = None  # read-only mmap of the body blob, opened on first use
+        # None writes through on every commit; otherwise commits are buffered
+        # and the owner (selene_serve) calls flush() within this many seconds
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._pending_since = None
+        self._stashed = []  # (journal copy, caller's record) of pending note_adds
+
+    def next_id(self, kind):
+        counters = self.data["meta"].setdefault("next_id", {})
+        if kind not in counters:  # files from before the counter: seed it once
+            counters[kind] = next_id(self.data[kind])
+        return counters[kind]
+
+    def get_task(self, task_id):
+        return self._ix["tasks"].get(task_id)
+
+    def get_note(self, note_id):
+        """The note with its body."""
+        n = self._ix["notes"].get(note_id)
+        return self._with_body(n) if n else None
+
+    @traced()
+    def tasks(self, status="all", tags=None):
+        """Tasks by id, optionally only those matching the tag expression `tags` (see selene_tags)."""
+        tasks = self._tagged("tasks", tags) if tags else self.data["tasks"]
+        if status == "all":
+            return list(tasks)
+        return [t for t in tasks if t.status == status]
+
+    @traced()
+    def notes(self, tag=None, limit=None, tags=None):
+        """Notes newest-updated first, without bodies; `tag` is one tag, `tags` a tag expression."""
+        if tag:
+            by_id = self._ix["notes"]
+            notes = [by_id[i] for i in self._ix["note_tags"].ids(tag)]
+        elif tags:
+            notes = self._tagged("notes", tags)
+        else:
+            notes = self.data["notes"]
+        notes = sorted(notes, key=_updated, reverse=True)
+        return notes[:limit]
+
+    def _tagged(self, kind, expr):
+        # posting-set algebra: the cost follows the sizes of the sets involved, not the store
+        by_id = self._ix[kind]
+        ids = self._ix[kind[:-1] + "_tags"].match(parse_tags(expr), lambda: set(by_id))
+        return [by_id[i] for i in sorted(ids)]
+
+    @traced()
+    def tasks_due(self, first=None, last=None):
+        """Open tasks due from `first` to `last` (dates, inclusive; None = unbounded), by due date.
+
+        Two bisections into the due index, then only the matching slice.
+        """
+        due = self._ix["due"]
+        lo = bisect_left(due, (pack_day(first),)) if first else 0
+        hi = bisect_left(due, (pack_day(last) + 1,)) if last else len(due)
+        return [self._ix["tasks"][task_id] for _, task_id in due[lo:hi]]
+
+    @traced()
+    def cycle_logs(self, last=None):
+        logs = self.data["cycle_logs"]
+        return logs[-last:] if last else list(logs)
+
+    def recent_starts(self, count):
+        """Dates of the last `count` period starts, oldest first: a slice of the ordinal index."""
+        return [date.fromordinal(o) for o in self._ix["starts"][-count:]]
+
+    def cycle_stats(self):
+        """The materialized aggregate block (see selene_cycles)."""
+        return self.data["cycle_stats"]
+
+    def rebuild_cycle_stats(self):
+        self.flush()
+        self.data["cycle_stats"] = compute_stats(self.data["cycle_logs"])
+        self.compact()
+        return self.data["cycle_stats"]
+
+    def config(self):
+        return self.data["config"]
+
+    def snapshot(self):
+        """The whole store as the classic JSON layout, note bodies included (for export)."""
+        return {
+            **self.data,
+            "tasks": [t.to_dict() for t in self.data["tasks"]],
+            "notes": [self._with_body(n).to_dict() for n in self.data["notes"]],
+            "cycle_logs": [e.to_dict() for e in self.data["cycle_logs"]],
+        }
+
+    def stream(self, kind, first=None, last=None):
+        """Yield every record of `kind` ("task", "note" or "cycle") one at a time as a JSON dict, for export.
+
+        Tasks and notes come by id, notes with their bodies; `first`/`last`
+        (dates, inclusive) filter on their updated day. Cycle logs come in
+        date order, and the range is two bisections into the sorted log.
+        """
+        if kind == "cycle":
+            logs = self.data["cycle_logs"]
+            lo = bisect_left(logs, pack_day(first), key=_entry_date) if first else 0
+            hi = bisect_right(logs, pack_day(last), key=_entry_date) if last else len(logs)
+            for i in range(lo, hi):
+                yield logs[i].to_dict()
+            return
+        lo, hi = pack_day(first) if first else 0, pack_day(last) if last else 99999999
+        for r in self.data[kind + "s"]:
+            if lo <= (r.updated or 0) // 1000000 <= hi:
+                yield (self._with_body(r) if kind == "note" else r).to_dict()
+
+    @traced()
+    def search(self, query, kind, limit=None, substring=False):
+        """Records of `kind` ("task" or "note") matching `query`, best BM25 score first.
+
+        With `substring`, records whose text contains `query` literally (any
+        case), by id; the trigram index narrows the records checked.
+        """
+        self.flush()  # buffered adds must be in the index before it is queried
+        by_id = self._ix[kind + "s"]
+        if substring:
+            from selene_search import doc_text
+            needle = query.lower()
+            ids = self._search_index().substring_candidates(needle, kind)
+            found = []
+            for doc_id in sorted(by_id if ids is None else ids):
+                r = by_id.get(doc_id)
+                if r is not None:
+                    r = self._with_body(r) if kind == "note" else r
+                    if needle in doc_text(kind, r):
+                        found.append(r)
+                        if len(found) == limit:
+                            break
+            return found
+        hits = self._search_index().search(query, kind, limit)
+        found = [by_id[doc_id] for doc_id, _ in hits if doc_id in by_id]
+        return [self._with_body(n) for n in found] if kind == "note" else found
+
+    @traced()
+    def similar(self, query, kind, limit=None, ann=False):
+        """Records of `kind` closest to `query` by embedding cosine (selene_vectors; needs NumPy)."""
+        self.flush()
+        by_id = self._ix[kind + "s"]
+        hits = self._vector_index().search(query, kind, limit, ann)
+        found = [by_id[doc_id] for doc_id, _ in hits if doc_id in by_id]
+        return [self._with_body(n) for n in found] if kind == "note" else found
+
+    def _vector_index(self):
+        if self._vectors is None:
+            from selene_vectors import VectorIndex
+            self._vectors = VectorIndex(self._search_index().conn)
+        self._vectors.sync(self._lookup)  # embeds only records changed since the last query
+        return self._vectors
+
+    def _lookup(self, kind, doc_id):
+        r = self._ix[kind + "s"].get(doc_id)
+        return self._with_body(r) if r is not None and kind == "note" else r
+
+    # --- note bodies ---
+    # Bodies live in selene_data.bodies, an append-only blob of UTF-8 text.
+    # A note records {"body_ref": [offset, length]} instead of its body, so
+    # the snapshot, cache and every listing stay small. Notes written before
+    # this (or by hand) may still carry an inline "body"; compact() moves it.
+    def note_body(self, note):
+        if "body" in note:
+            return note["body"]
+        offset, length = note["body_ref"]
+        if not length:
+            return ""
+        add_bytes("read", length)
+        if self._bodies is None or offset + length > len(self._bodies):
+            # (re)map to cover bodies appended since; the old map is left to GC
+            # because a reader on another thread may still hold it
+            with open(_bodies_path(self.path), "rb") as f:
+                self._bodies = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._bodies[offset:offset + length].decode("utf-8")
+
+    def _with_body(self, note):
+        if "body" in note:
+            return note
+        return note.replace(body=self.note_body(note), body_ref=ABSENT)
+
+    def _stash_body(self, note):
+        """Append the note's inline body to the blob; returns the note with a body_ref."""
+        return self._stash_bodies([note])[0]
+
+    def _stash_bodies(self, notes):
+        out = []
+        with open(_bodies_path(self.path), "ab") as f:
+            for note in notes:
+                raw = (note.get("body") or "").encode("utf-8")
+                offset = f.tell()
+                f.write(raw)
+                add_bytes("written", len(raw))
+                n = {k: v for k, v in note.items() if k != "body"}
+                n["body_ref"] = [offset, len(raw)]
+                out.append(n)
+        return out
+
+    def commit(self, op):
+        """Apply one mutation in memory and queue it for the journal."""
+        self.commit_many([op])
+
+    @traced("save")
+    def commit_many(self, ops, compact=True):
+        """Apply a batch of mutations in memory and queue them; written with one journal append.
+
+        compact=False keeps a bulk load from rewriting the snapshot every time
+        the journal crosses JOURNAL_COMPACT_BYTES; the caller compacts once at the end.
+        """
+        count("written", len(ops))
+        if any(op["op"] in SEARCH_OPS for op in ops):
+            self._search_index()  # sync the index to the state before these ops
+        self._claim_ids(ops)  # opening the index may have caught up with other writers
+        notes = [op for op in ops if op["op"] == "note_add"]
+        if notes:
+            # bodies go to the blob before the journal records that point at them;
+            # under the lock, so two processes never claim the same offset
+            with self._locked():
+                stashed = self._stash_bodies([op["record"] for op in notes])
+            # the journal gets body-less copies; flush() hands their final ids back to the caller's records
+            self._stashed += zip(stashed, (op["record"] for op in notes))
+            stashed = iter(stashed)
+            ops = [{**op, "record": next(stashed)} if op["op"] == "note_add" else op for op in ops]
+        for op in ops:
+            op["seq"] = self.data["meta"]["seq"] + 1
+            apply_op(self.data, op, self._ix)
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending += ops
+        if self.flush_interval is None:
+            self.flush(compact)
+
+    def pending_age(self):
+        """Seconds the oldest unflushed commit has been waiting (0 if none)."""
+        return time.monotonic() - self._pending_since if self._pending else 0.0
+
+    def flush(self, compact=True):
+        """Write buffered commits to the journal and the search index.
+
+        Holds the store's file lock, so any number of processes can write
+        the same store: whoever appends second first catches up with what
+        the other one committed (see _catch_up).
+        """
+        if not self._pending:
+            return
+        ops, self._pending = self._pending, []
+        with phase("save"), self._locked():
+            ops = self._catch_up(ops)
+            for copy, record in self._stashed:
+                record["id"] = copy["id"]
+            self._stashed = []
+            index_ops = [op for op in ops if op["op"] in SEARCH_OPS]
+            journal_size = append_journal(ops, self.path)
+            self._seen = (self._seen[0], journal_size)
+            if index_ops:
+                with phase("index"), self._index.conn:
+                    for op in index_ops:
+                        if op["op"] == "note_add":
+                            op = {**op, "record": self._with_body(Note.from_dict(op["record"]))}
+                        self._index.apply(op)
+                    self._index.set_signature(self._search_signature())
+            if compact and journal_size >= JOURNAL_COMPACT_BYTES:
+                self.compact()
+
+    @contextmanager
+    def _locked(self):
+        # file_lock is per open file, so nested uses by this store must not take it again
+        if self._lock_depth:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        with file_lock(self.path):
+            self._lock_depth = 1
+            try:
+                yield
+            finally:
+                self._lock_depth = 0
+
+    def _catch_up(self, ops=()):
+        """Optimistic concurrency: bring the store up to date with other processes' commits, under the lock.
+
+        If the snapshot and journal are as this store last left them, nothing
+        happened and `ops` are returned as they are. Otherwise the store is
+        reloaded and the unflushed `ops` are replayed on top with new seq
+        numbers. They are all independent mutations, so this merges cleanly:
+        an added task or note whose id the other writer took meanwhile gets
+        the next free one (the record is updated in place), and done/delete
+        of a task the other writer deleted is a no-op.
+        """
+        if _disk_state(self.path) == self._seen:
+            return ops
+        self.data = load_data(self.path)
+        self._ix = build_indexes(self.data)
+        self._cycle_history = None
+        for op in ops:
+            self._claim_ids([op])
+            op["seq"] = self.data["meta"]["seq"] + 1
+            apply_op(self.data, op, self._ix)
+        self._seen = _disk_state(self.path)
+        return ops
+
+    def _claim_ids(self, ops):
+        """Move added records past ids that are already taken (in place); see SqliteStore._claim_ids."""
+        free = {}
+        for op in ops:
+            if op["op"] in ("task_add", "note_add"):
+                kind = op["op"][:4] + "s"
+                if kind not in free:
+                    free[kind] = self.next_id(kind)
+                record = op["record"]
+                if record["id"] < free[kind]:
+                    record["id"] = free[kind]
+                free[kind] = record["id"] + 1
+
+    def _search_signature(self):
+        from selene_search import signature
+        tasks, notes = self.data["tasks"], self.data["notes"]
+        return signature(len(tasks), len(notes),
+                         tasks[-1]["id"] if tasks else 0, notes[-1]["id"] if notes else 0)
+
+    def _search_index(self):
+        # opened lazily, and rebuilt if it missed writes (e.g. a crash after the journal append)
+        if self._index is None:
+            from selene_search import open_index
+            # the index file is shared by every process using this store: compare
+            # it against the current state, not a stale copy of it
+            with phase("index"), self._locked():
+                self._pending = self._catch_up(self._pending)
+                self._index = open_index(_search_path(self.path))
+                sig = self._search_signature()
+                if self._index.signature() != sig:
+                    with self._index.conn:
+                        self._index.rebuild(self.data["tasks"], (self._with_body(n) for n in self.data["notes"]))
+                        self._index.set_signature(sig)
+        return self._index
+
+    def compact(self):
+        self.flush()
+        with phase("save"), self._locked():
+            self._catch_up()  # never fold a stale copy over someone else's commits
+            notes = self.data["notes"]
+            for i, n in enumerate(notes):
+                if "body" in n:
+                    notes[i] = self._ix["notes"][n.id] = Note.from_dict(self._stash_body(n))
+            compact_data(self.data, self.path)
+            self._seen = _disk_state(self.path)
+
+    def close(self):
+        self.flush()
+
+
+def open_store(backend=None):
+    if _SERVED_STORE is not None:  # inside `selene.py serve`: reuse the loaded store
+        return _SERVED_STORE
+    backend = backend or BACKEND
+    if backend == "json":
+        return JsonStore()
+    if backend == "sqlite":
+        with phase("load"):
+            from selene_sqlite import SqliteStore
+            return SqliteStore(DB_FILE)
+    raise ValueError(f"Unknown backend: {backend}")
 
 
 # -----------------------------
@@ -66,40 +846,81 @@ def fmt_date(d):
 # -----------------------------
 # Tasks
 # -----------------------------
-def task_add(args):
-    data = load_data()
-    t = {
-        "id": next_id(data["tasks"]),
-        "title": args.title,
-        "due": args.due if args.due else None,
-        "tags": args.tags or [],
-        "energy": (args.energy or "").lower() or None,  # high|low|creative|reflective
-        "status": "open",
-        "created": _now(),
-        "updated": _now(),
+ENERGIES = ["high", "low", "creative", "reflective"]
+PHASES = ["start", "end", "note"]
+
+
+def task_record(task_id, title, due=None, tags=None, energy=None, status="open", now=None):
+    """A validated task record (ValueError on bad fields); add_task and `import` both build tasks here."""
+    if not title:
+        raise ValueError("A task needs a title.")
+    energy = (energy or "").lower() or None
+    if energy and energy not in ENERGIES:
+        raise ValueError(f"Energy must be one of: {', '.join(ENERGIES)}.")
+    if status not in ("open", "done"):
+        raise ValueError("Status must be open or done.")
+    now = now or _now()
+    return {
+        "id": task_id,
+        "title": title,
+        "due": parse_date(due).isoformat() if due else None,
+        "tags": tags or [],
+        "energy": energy,  # high|low|creative|reflective
+        "status": status,
+        "created": now,
+        "updated": now,
     }
-    data["tasks"].append(t)
-    save_data(data)
+
+
+def add_task(store, title, due=None, tags=None, energy=None):
+    """Create an open task and return it."""
+    t = task_record(store.next_id("tasks"), title, due, tags, energy)
+    store.commit({"op": "task_add", "record": t})
+    return t
+
+
+def complete_task(store, task_id):
+    """Mark a task done. Returns False if there is no such task."""
+    if store.get_task(task_id) is None:
+        return False
+    store.commit({"op": "task_done", "id": task_id, "at": _now()})
+    return True
+
+
+def delete_task(store, task_id):
+    """Delete a task. Returns False if there is no such task."""
+    if store.get_task(task_id) is None:
+        return False
+    store.commit({"op": "task_delete", "id": task_id})
+    return True
+
+
+def task_add(args):
+    t = add_task(open_store(), args.title, args.due, args.tags, args.energy)
     print(f"✨ Added task [{t['id']}] {t['title']}")
 
 
+TASK_SORT_KEYS = {  # over selene_records.Task attributes: dates are packed ints
+    "due": lambda t: (t.due or 99991231, t.energy or "", t.title),
+    "updated": _updated,
+    "title": lambda t: t.title,
+}
+
+
+def top_k(records, key, limit=None):
+    """The first `limit` records in `key` order: a bounded heap, O(n log k), instead of a full sort."""
+    if limit is None:
+        return sorted(records, key=key)
+    return heapq.nsmallest(limit, records, key=key)
+
+
+@traced()
+def list_tasks(store, status="open", sort="due", limit=None, tags=None):
+    return top_k(store.tasks(status, tags), TASK_SORT_KEYS[sort], limit)
+
+
 def task_list(args):
-    data = load_data()
-    tasks = data["tasks"]
-    status = args.status
-    if status != "all":
-        tasks = [t for t in tasks if t["status"] == status]
-    # sort
-    if args.sort == "due":
-        def k(t):
-            return (t["due"] or "9999-12-31", t.get("energy") or "", t["title"])
-    elif args.sort == "updated":
-        def k(t):
-            return t["updated"]
-    else:
-        def k(t):
-            return t["title"]
-    tasks = sorted(tasks, key=k)
+    tasks = list_tasks(open_store(), args.status, args.sort, args.limit, args.tags)
     if not tasks:
         print("(no tasks)")
         return
@@ -111,34 +932,55 @@ def task_list(args):
         print(f"[{t['id']}] {icon} {t['title']} | due: {due} | energy: {energy} | tags: {tags}")
 
 
+@traced()
+def agenda(store, first=None, last=None):
+    """Open tasks due between two dates (inclusive; None leaves that side open), soonest first."""
+    if isinstance(first, str):
+        first = parse_date(first)
+    if isinstance(last, str):
+        last = parse_date(last)
+    return store.tasks_due(first, last)
+
+
+@traced()
+def overdue(store, today=None):
+    """Open tasks whose due date has passed."""
+    return store.tasks_due(None, (today or datetime.now().date()) - timedelta(days=1))
+
+
+def task_agenda(args):
+    today = datetime.now().date()
+    if args.overdue:
+        tasks = overdue(open_store(), today)
+    else:
+        tasks = agenda(open_store(), args.first, args.last or today + timedelta(days=args.days))
+    if not tasks:
+        print("(nothing due)")
+        return
+    day = None
+    for t in tasks:
+        if t["due"][:10] != day:
+            day = t["due"][:10]
+            print(f"📅 {day}" + (" (overdue)" if day < today.isoformat() else ""))
+        print(f"  [{t['id']}] {t['title']} | energy: {t.get('energy') or '—'}")
+
+
 def task_done(args):
-    data = load_data()
-    for t in data["tasks"]:
-        if t["id"] == args.id:
-            t["status"] = "done"
-            t["updated"] = _now()
-            save_data(data)
-            print(f"🎯 Task {args.id} marked done.")
-            return
-    print("❌ Task not found.")
+    if complete_task(open_store(), args.id):
+        print(f"🎯 Task {args.id} marked done.")
+    else:
+        print("❌ Task not found.")
 
 
 def task_delete(args):
-    data = load_data()
-    before = len(data["tasks"])
-    data["tasks"] = [t for t in data["tasks"] if t["id"] != args.id]
-    after = len(data["tasks"])
-    save_data(data)
-    if after < before:
+    if delete_task(open_store(), args.id):
         print(f"🗑️ Deleted task {args.id}.")
     else:
         print("❌ Task not found.")
 
 
 def task_search(args):
-    data = load_data()
-    q = args.keyword.lower()
-    matches = [t for t in data["tasks"] if q in t["title"].lower()]
+    matches = open_store().search(args.keyword, "task", substring=args.substring)
     if not matches:
         print("(no matches)")
         return
@@ -149,52 +991,57 @@ def task_search(args):
 # -----------------------------
 # Notes (PKMS basics)
 # -----------------------------
-def note_add(args):
-    data = load_data()
-    n = {
-        "id": next_id(data["notes"]),
-        "title": args.title,
-        "body": args.body or "",
-        "tags": args.tags or [],
-        "created": _now(),
-        "updated": _now(),
+def note_record(note_id, title, body=None, tags=None, now=None):
+    """A validated note record (ValueError on bad fields)."""
+    if not title:
+        raise ValueError("A note needs a title.")
+    now = now or _now()
+    return {
+        "id": note_id,
+        "title": title,
+        "body": body or "",
+        "tags": tags or [],
+        "created": now,
+        "updated": now,
     }
-    data["notes"].append(n)
-    save_data(data)
+
+
+def add_note(store, title, body=None, tags=None):
+    """Create a note and return it."""
+    n = note_record(store.next_id("notes"), title, body, tags)
+    store.commit({"op": "note_add", "record": n})
+    return n
+
+
+def note_add(args):
+    n = add_note(open_store(), args.title, args.body, args.tags)
     print(f"📝 Added note [{n['id']}] {n['title']}")
 
 
 def note_list(args):
-    data = load_data()
-    notes = data["notes"]
-    if args.tag:
-        notes = [n for n in notes if args.tag in n.get("tags", [])]
-    notes = sorted(notes, key=lambda n: n["updated"], reverse=True)
+    notes = open_store().notes(tag=args.tag, limit=args.limit, tags=args.tags)
     if not notes:
         print("(no notes)")
         return
-    for n in notes[: args.limit]:
+    for n in notes:
         tags = ", ".join(n.get("tags", [])) or "—"
         print(f"[{n['id']}] {n['title']} | tags: {tags} | updated: {n['updated']}")
 
 
 def note_show(args):
-    data = load_data()
-    for n in data["notes"]:
-        if n["id"] == args.id:
-            tags = ", ".join(n.get("tags", [])) or "—"
-            print(f"# {n['title']}\n")
-            if tags != "—":
-                print(f"tags: {tags}\n")
-            print(n.get("body", ""))
-            return
-    print("❌ Note not found.")
+    n = open_store().get_note(args.id)
+    if n is None:
+        print("❌ Note not found.")
+        return
+    tags = ", ".join(n.get("tags", [])) or "—"
+    print(f"# {n['title']}\n")
+    if tags != "—":
+        print(f"tags: {tags}\n")
+    print(n.get("body", ""))
 
 
 def note_search(args):
-    data = load_data()
-    q = args.keyword.lower()
-    matches = [n for n in data["notes"] if q in n["title"].lower() or q in n.get("body", "").lower()]
+    matches = open_store().search(args.keyword, "note", substring=args.substring)
     if not matches:
         print("(no matches)")
         return
@@ -205,32 +1052,40 @@ def note_search(args):
 # -----------------------------
 # Cycle tracking
 # -----------------------------
-def cycle_log(args):
-    data = load_data()
-    date = parse_date(args.date).isoformat()
-    entry = {
-        "date": date,
-        "phase": args.phase,  # start|end|note
-        "symptoms": args.symptoms or [],
-        "mood": args.mood or "",
-        "note": args.note or "",
-        "created": _now(),
+def cycle_entry(date, phase, symptoms=None, mood=None, note=None, now=None):
+    """A validated cycle entry (ValueError on bad fields)."""
+    if phase not in PHASES:
+        raise ValueError(f"Phase must be one of: {', '.join(PHASES)}.")
+    if not date:
+        raise ValueError("A cycle entry needs a date.")
+    return {
+        "date": parse_date(date).isoformat(),
+        "phase": phase,  # start|end|note
+        "symptoms": symptoms or [],
+        "mood": mood or "",
+        "note": note or "",
+        "created": now or _now(),
     }
-    data["cycle_logs"].append(entry)
-    # keep sorted by date
-    data["cycle_logs"] = sorted(data["cycle_logs"], key=lambda e: e["date"])
-    save_data(data)
+
+
+def log_cycle(store, date, phase, symptoms=None, mood=None, note=None):
+    """Record one cycle entry and return it."""
+    entry = cycle_entry(date, phase, symptoms, mood, note)
+    store.commit({"op": "cycle_log", "entry": entry})
+    return entry
+
+
+def cycle_log(args):
+    entry = log_cycle(open_store(), args.date, args.phase, args.symptoms, args.mood, args.note)
     print(f"🩸 Logged {entry['phase']} on {entry['date']}")
 
 
 def cycle_show(args):
-    data = load_data()
-    logs = data["cycle_logs"]
+    # show last N
+    logs = open_store().cycle_logs(last=args.last)
     if not logs:
         print("(no cycle logs)")
         return
-    # show last N
-    logs = logs[-args.last :]
     for e in logs:
         sym = ", ".join(e.get("symptoms", [])) or "—"
         mood = e.get("mood") or "—"
@@ -238,20 +1093,16 @@ def cycle_show(args):
         print(f"{e['date']} | {e['phase']} | mood: {mood} | symptoms: {sym} {('| ' + note) if note else ''}")
 
 
-def _recent_starts(logs, max_count=6):
-    starts = [parse_date(e["date"]) for e in logs if e.get("phase") == "start"]
-    starts = sorted(d for d in starts if d is not None)
-    return starts[-max_count:]
-
+@traced()
+def predict_next_start(store):
+    """{"next_start", "avg", "cycles", "window"} from recent starts; next_start is None before the first start.
 
-def cycle_predict(args):
-    data = load_data()
-    logs = data["cycle_logs"]
-    starts = _recent_starts(logs)
+    window is an 80% [earliest, latest] band around next_start from the spread
+    of the last 12 cycles; None before three starts.
+    """
+    starts = store.recent_starts(6)
     if not starts:
-        avg = data["config"]["avg_cycle_length"]
-        print(f"No start logs yet. Using avg length {avg} days: next start unknown until first log.")
-        return
+        return {"next_start": None, "avg": store.config()["avg_cycle_length"], "cycles": 0, "window": None}
     # compute average from diffs if we have 2+
     diffs = []
     for i in range(1, len(starts)):
@@ -259,29 +1110,114 @@ def cycle_predict(args):
     if diffs:
         avg = round(sum(diffs) / len(diffs))
     else:
-        avg = data["config"]["avg_cycle_length"]
+        avg = store.config()["avg_cycle_length"]
     next_start = starts[-1] + timedelta(days=avg)
-    print(f"Predicted next start: {next_start.isoformat()} (avg {avg} days from {len(diffs) or 1} cycle(s))")
+    window = None
+    half = interval_halfwidth(store.recent_starts(13))
+    if half is not None:
+        spread = timedelta(days=round(half))
+        window = [(next_start - spread).isoformat(), (next_start + spread).isoformat()]
+    return {"next_start": next_start.isoformat(), "avg": avg, "cycles": len(diffs) or 1, "window": window}
+
+
+@traced()
+def cycle_summary(store):
+    """Average length, starts considered, all-time length mean/stdev and top-5 symptoms; None without logs.
+
+    Reads the aggregate block and the start index only, never the full log.
+    """
+    stats = store.cycle_stats()
+    if not stats["logs"]:
+        return None
+    starts = store.recent_starts(12)
+    # the mean of consecutive gaps is (last - first) / gaps
+    avg = (round((starts[-1] - starts[0]).days / (len(starts) - 1)) if len(starts) > 1
+           else store.config()["avg_cycle_length"])
+    mean, stdev = length_moments(stats)
+    return {"avg": avg, "starts": len(starts), "cycles": stats["cycles"], "mean": mean, "stdev": stdev,
+            "symptoms": Counter(stats["symptoms"]).most_common(5)}
+
+
+def cycle_history(store):
+    """The cycle log as a selene_analytics.CycleHistory (needs NumPy).
+
+    Cached on the store and rebuilt only after new logs arrive.
+    """
+    from selene_analytics import CycleHistory
+    key = store.cycle_stats()["logs"]
+    cached = getattr(store, "_cycle_history", None)
+    if cached is None or cached[0] != key:
+        cached = store._cycle_history = (key, CycleHistory.from_logs(store.cycle_logs()))
+    return cached[1]
+
+
+@traced()
+def cycle_analytics(store, max_day=35):
+    """Length statistics, symptom-by-cycle-day heatmap and symptom co-occurrence, as plain JSON types.
+
+    Raises ValueError when NumPy isn't installed.
+    """
+    try:
+        history = cycle_history(store)
+    except ImportError:
+        raise ValueError("Cycle analytics need NumPy (pip install numpy).")
+    return {
+        "lengths": history.length_stats(),
+        "symptoms": history.symptoms,
+        "heatmap": history.heatmap(max_day).tolist(),
+        "cooccurrence": history.cooccurrence().tolist(),
+    }
+
+
+def cycle_predict(args):
+    p = predict_next_start(open_store())
+    if p["next_start"] is None:
+        print(f"No start logs yet. Using avg length {p['avg']} days: next start unknown until first log.")
+        return
+    print(f"Predicted next start: {p['next_start']} (avg {p['avg']} days from {p['cycles']} cycle(s))")
+    if p["window"]:
+        print(f"80% likely between {p['window'][0]} and {p['window'][1]}")
 
 
 def cycle_stats(args):
-    data = load_data()
-    logs = data["cycle_logs"]
-    if not logs:
+    s = cycle_summary(open_store())
+    if s is None:
         print("(no cycle logs)")
         return
-    starts = _recent_starts(logs, max_count=12)
-    diffs = [(starts[i] - starts[i - 1]).days for i in range(1, len(starts))]
-    avg = round(sum(diffs) / len(diffs)) if diffs else data["config"]["avg_cycle_length"]
-    # symptom frequency
-    symptoms = []
-    for e in logs:
-        symptoms.extend(e.get("symptoms", []))
-    cnt = Counter(symptoms)
-    top = ", ".join(f"{k}×{v}" for k, v in cnt.most_common(5)) or "—"
-    print(f"Average cycle length: {avg} days")
-    print(f"Logged starts considered: {len(starts)}")
+    top = ", ".join(f"{k}×{v}" for k, v in s["symptoms"]) or "—"
+    print(f"Average cycle length: {s['avg']} days")
+    print(f"Logged starts considered: {s['starts']}")
+    if s["cycles"]:
+        print(f"All-time: {s['mean']:.1f} ± {s['stdev']:.1f} days over {s['cycles']} cycle(s)")
     print(f"Common symptoms: {top}")
+    if args.detail:
+        _print_analytics(cycle_analytics(open_store(), args.max_day), args.max_day)
+
+
+def _print_analytics(a, max_day):
+    s = a["lengths"]
+    if s:
+        print(f"Variance: {s['variance']:.1f} (stdev {s['stdev']:.1f}) | median {s['median']:g} | "
+              f"trimmed mean {s['trimmed_mean']:.1f} | range {s['min']}–{s['max']}")
+        print("Rolling median (5 cycles): " + ", ".join(f"{m:g}" for m in s["rolling_median"][-6:]))
+    if not a["symptoms"]:
+        return
+    width = max(len(s) for s in a["symptoms"])
+    print(f"\nSymptoms by cycle day (0–{max_day}, last column = later):")
+    for name, row in zip(a["symptoms"], a["heatmap"]):
+        peak = max(row) or 1
+        print(f"  {name:<{width}} " + "".join(" .:-=+*#%@"[min(9, (9 * c + peak - 1) // peak)] for c in row))
+    print("\nLogged together:")
+    pairs = [(a["cooccurrence"][i][j], a["symptoms"][i], a["symptoms"][j])
+             for i in range(len(a["symptoms"])) for j in range(i + 1, len(a["symptoms"]))]
+    for n, x, y in sorted(pairs, reverse=True)[:5]:
+        if n:
+            print(f"  {x} + {y}: {n}")
+
+
+def cycle_rebuild(args):
+    stats = open_store().rebuild_cycle_stats()
+    print(f"🔁 Rebuilt cycle aggregates from {stats['logs']} logs ({stats['starts']} starts)")
 
 
 # -----------------------------
@@ -295,27 +1231,21 @@ HIGH_ENERGY_HINTS = [
 ]
 
 
-def _current_phase_hint(data):
+def _current_phase_hint(last_start):
     # crude heuristic: if within 2 days of a 'start', assume low energy window
-    logs = data["cycle_logs"]
-    starts = _recent_starts(logs)
     today = datetime.now().date()
-    if starts:
-        last_start = starts[-1]
-        delta = (today - last_start).days
+    if last_start:
+        delta = (today - date.fromisoformat(last_start)).days
         if 0 <= delta <= 2:
             return "low"
     return "normal"
 
 
-def plan(args):
-    data = load_data()
-    tasks = [t for t in data["tasks"] if t["status"] == "open"]
-    if not tasks:
-        print("(no open tasks)")
-        return
-
-    phase = _current_phase_hint(data)
+@traced()
+def plan_tasks(store, limit=10):
+    """Open tasks ranked for the current energy window, plus the window's message and hints."""
+    tasks = store.tasks("open")
+    phase = _current_phase_hint(store.cycle_stats()["last_start"])
     if phase == "low":
         preferred = {"low", "reflective", None, ""}
         msg = "You’re near a low-energy window. Favor gentle focus."
@@ -327,41 +1257,54 @@ def plan(args):
 
     # prioritize by energy tag match, then due date
     def score(t):
-        energy = (t.get("energy") or "").lower() or None
+        energy = (t.energy or "").lower() or None
         match = 0 if energy in preferred else 1
-        due = t.get("due") or "9999-12-31"
-        return (match, due, t["title"])
+        return (match, t.due or 99991231, t.title)
+
+    return {"phase": phase, "message": msg, "tasks": top_k(tasks, score, limit), "hints": hints}
 
-    ranked = sorted(tasks, key=score)
-    print(msg)
-    for t in ranked[:10]:
+
+def plan(args):
+    p = plan_tasks(open_store(), args.limit)
+    if not p["tasks"]:
+        print("(no open tasks)")
+        return
+    print(p["message"])
+    for t in p["tasks"]:
         due = t.get("due") or "—"
         en = t.get("energy") or "—"
         print(f"- [{t['id']}] {t['title']} (due {due}, energy {en})")
-    print(f"\nSuggestions: {', '.join(hints)}")
+    print(f"\nSuggestions: {', '.join(p['hints'])}")
 
 
-def chat(args):
-    """Local, simple retrieval over notes/tasks."""
-    data = load_data()
-    q = " ".join(args.query).lower()
+@traced()
+def chat_hits(store, query, limit=5, ann=False):
+    """The notes and tasks closest to a free-text question.
+
+    Ranked by local embedding similarity (selene_vectors), or by BM25 when
+    NumPy isn't installed.
+    """
+    try:
+        return store.similar(query, "note", limit, ann), store.similar(query, "task", limit, ann)
+    except ImportError:
+        return store.search(query, "note", limit), store.search(query, "task", limit)
 
-    # retrieve notes
-    notes = [n for n in data["notes"] if q in n["title"].lower() or q in n.get("body", "").lower()]
-    # retrieve tasks
-    tasks = [t for t in data["tasks"] if q in t["title"].lower()]
+
+def chat(args):
+    """Local, offline retrieval over notes/tasks."""
+    notes, tasks = chat_hits(open_store(), " ".join(args.query), ann=args.ann)
 
     if not notes and not tasks:
         print("I don’t see anything on that yet. Try adding a note or task first.")
         return
 
     print("Here’s what I found:")
-    for n in notes[:5]:
+    for n in notes:
         preview = (n.get("body", "") or "").strip().replace("\n", " ")
         if len(preview) > 100:
             preview = preview[:100] + "…"
         print(f"• Note#{n['id']}: {n['title']} — {preview}")
-    for t in tasks[:5]:
+    for t in tasks:
         due = t.get("due") or "—"
         print(f"• Task#{t['id']}: {t['title']} (due {due})")
 
@@ -370,110 +1313,328 @@ def chat(args):
 # Export
 # -----------------------------
 def export_json(args):
-    data = load_data()
+    if args.format == "ndjson":
+        return export_ndjson(args)
+    data = open_store().snapshot()
     path = args.path or "selene_export.json"
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2)
+        add_bytes("written", f.tell())
     print(f"📦 Exported to {path}")
 
 
+def import_records(args):
+    """Stream JSONL/CSV records from a file or stdin into the store (see selene_import)."""
+    from selene_import import import_rows, read_rows
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "jsonl")
+    if args.path == "-":
+        if _SERVED_STORE is not None:
+            raise ValueError("The daemon has no stdin; pass a file path.")
+        result = import_rows(open_store(), read_rows(sys.stdin, fmt), args.kind, args.batch_size, args.strict)
+    else:
+        with open(args.path, "r", encoding="utf-8", newline="") as f:
+            result = import_rows(open_store(), read_rows(f, fmt), args.kind, args.batch_size, args.strict)
+    for line, message in result["errors"]:
+        print(f"⚠️  line {line}: {message}")
+    skipped = f", skipped {result['skipped']} invalid" if result["skipped"] else ""
+    print(f"📥 Imported {result['imported']} {args.kind} records in {result['batches']} batches{skipped}")
+
+
+def export_ndjson(args):
+    """One record per line, streamed from the store (see selene_export)."""
+    from selene_export import COMPRESSORS, KINDS, export_chunks, export_file
+    if args.compress and args.compress not in COMPRESSORS:
+        raise ValueError(f"{args.compress} compression needs a newer Python (3.14+ for zstd).")
+    kinds = args.kinds or list(KINDS)
+    first, last = parse_date(args.first), parse_date(args.last)
+    if args.chunk_records:
+        base = args.path or "selene_export"
+        m = export_chunks(open_store(), base, args.chunk_records, kinds, first, last, args.compress, args.resume)
+        total = sum(c["records"] for c in m["chunks"])
+        print(f"📦 Exported {total} records in {len(m['chunks'])} chunk(s); manifest: {base}.manifest.json")
+        return
+    path = args.path or "selene_export.ndjson" + (COMPRESSORS[args.compress][0] if args.compress else "")
+    n = export_file(open_store(), path, kinds, first, last, args.compress)
+    if path != "-":
+        print(f"📦 Exported {n} records to {path}")
+
+
+def compact(args):
+    open_store().compact()
+    print(f"🧹 Compacted {BACKEND} store")
+
+
+def serve(args):
+    from selene_serve import serve_forever
+    serve_forever(args.socket or socket_path(), args.flush_interval, BACKEND)
+
+
+def serve_http(args):
+    from selene_http import serve_http as run
+    run(args)
+
+
+def migrate(args):
+    """Copy the JSON store into a fresh SQLite database."""
+    from selene_sqlite import SqliteStore
+    db = SqliteStore(DB_FILE)
+    if db.next_id("tasks") > 1 or db.next_id("notes") > 1:
+        raise ValueError(f"{DB_FILE} already holds Selene tasks/notes; not migrating over them.")
+    data = JsonStore().snapshot()
+    db.import_data(data)
+    db.close()
+    print(f"📦 Migrated {len(data['tasks'])} tasks, {len(data['notes'])} notes, "
+          f"{len(data['cycle_logs'])} cycle logs into {DB_FILE}")
+
+
 # -----------------------------
 # CLI wiring
 # -----------------------------
-def build_parser():
-    p = argparse.ArgumentParser(
-        description="Selene — Self-Knowledge System (tasks, notes, cycle tracking, JSON storage)"
-    )
-    sub = p.add_subparsers(dest="cmd")
+# Every command registers its help text and a function adding its arguments.
+# build_parser(argv) builds only the subparser argv selects, so `task-add`
+# doesn't construct the other twenty-odd; the feature modules behind export,
+# import, serve, search and analytics are imported by the handlers that use them.
+COMMANDS = {}  # name -> (help, add_arguments)
+
+
+def command(name, help):
+    def register(add_arguments):
+        COMMANDS[name] = (help, add_arguments)
+        return add_arguments
+    return register
+
 
-    # tasks
-    sp = sub.add_parser("task-add", help="Add a task")
+# tasks
+@command("task-add", "Add a task")
+def _task_add_args(sp):
     sp.add_argument("title")
     sp.add_argument("--due")
     sp.add_argument("--tags", nargs="*")
-    sp.add_argument("--energy", choices=["high", "low", "creative", "reflective"])
+    sp.add_argument("--energy", choices=ENERGIES)
     sp.set_defaults(func=task_add)
 
-    sp = sub.add_parser("task-list", help="List tasks")
+
+@command("task-list", "List tasks")
+def _task_list_args(sp):
     sp.add_argument("--status", default="open", choices=["open", "done", "all"])
-    sp.add_argument("--sort", default="due", choices=["due", "title", "updated"])
+    sp.add_argument("--sort", default="due", choices=list(TASK_SORT_KEYS))
+    sp.add_argument("--limit", type=int, help="Show only the first N")
+    sp.add_argument("--tags", help="Tag expression, e.g. 'health & !archive' or '(school | work) & urgent'")
     sp.set_defaults(func=task_list)
 
-    sp = sub.add_parser("task-done", help="Mark task done")
+
+@command("task-agenda", "Open tasks due in a date range")
+def _task_agenda_args(sp):
+    sp.add_argument("--from", dest="first", help="YYYY-MM-DD (default: include everything overdue)")
+    sp.add_argument("--to", dest="last", help="YYYY-MM-DD (default: --days from today)")
+    sp.add_argument("--days", type=int, default=7, help="Look-ahead when --to is not given")
+    sp.add_argument("--overdue", action="store_true", help="Only tasks past their due date")
+    sp.set_defaults(func=task_agenda)
+
+
+@command("task-done", "Mark task done")
+def _task_done_args(sp):
     sp.add_argument("id", type=int)
     sp.set_defaults(func=task_done)
 
-    sp = sub.add_parser("task-del", help="Delete task")
+
+@command("task-del", "Delete task")
+def _task_del_args(sp):
     sp.add_argument("id", type=int)
     sp.set_defaults(func=task_delete)
 
-    sp = sub.add_parser("task-search", help="Search tasks")
+
+@command("task-search", "Search tasks (ranked, typo-tolerant)")
+def _task_search_args(sp):
     sp.add_argument("keyword")
+    sp.add_argument("--substring", action="store_true", help="Literal substring match instead of ranked search")
     sp.set_defaults(func=task_search)
 
-    # notes
-    sp = sub.add_parser("note-add", help="Add a note")
+
+# notes
+@command("note-add", "Add a note")
+def _note_add_args(sp):
     sp.add_argument("title")
     sp.add_argument("--tags", nargs="*")
     sp.add_argument("--body")
     sp.set_defaults(func=note_add)
 
-    sp = sub.add_parser("note-list", help="List notes")
+
+@command("note-list", "List notes")
+def _note_list_args(sp):
     sp.add_argument("--tag")
+    sp.add_argument("--tags", help="Tag expression, e.g. 'cycle & !archive' or '(school | work) & urgent'")
     sp.add_argument("--limit", type=int, default=20)
     sp.set_defaults(func=note_list)
 
-    sp = sub.add_parser("note-show", help="Show a note")
+
+@command("note-show", "Show a note")
+def _note_show_args(sp):
     sp.add_argument("id", type=int)
     sp.set_defaults(func=note_show)
 
-    sp = sub.add_parser("note-search", help="Search notes")
+
+@command("note-search", "Search notes (ranked, typo-tolerant)")
+def _note_search_args(sp):
     sp.add_argument("keyword")
+    sp.add_argument("--substring", action="store_true", help="Literal substring match instead of ranked search")
     sp.set_defaults(func=note_search)
 
-    # cycle
-    sp = sub.add_parser("cycle-log", help="Log cycle info")
+
+# cycle
+@command("cycle-log", "Log cycle info")
+def _cycle_log_args(sp):
     sp.add_argument("date", help="YYYY-MM-DD")
-    sp.add_argument("--phase", choices=["start", "end", "note"], required=True)
+    sp.add_argument("--phase", choices=PHASES, required=True)
     sp.add_argument("--symptoms", nargs="*")
     sp.add_argument("--mood")
     sp.add_argument("--note")
     sp.set_defaults(func=cycle_log)
 
-    sp = sub.add_parser("cycle-show", help="Show recent cycle logs")
+
+@command("cycle-show", "Show recent cycle logs")
+def _cycle_show_args(sp):
     sp.add_argument("--last", type=int, default=10)
     sp.set_defaults(func=cycle_show)
 
-    sp = sub.add_parser("cycle-predict", help="Predict next start date")
+
+@command("cycle-predict", "Predict next start date")
+def _cycle_predict_args(sp):
     sp.set_defaults(func=cycle_predict)
 
-    sp = sub.add_parser("cycle-stats", help="Cycle stats")
+
+@command("cycle-stats", "Cycle stats")
+def _cycle_stats_args(sp):
+    sp.add_argument("--detail", action="store_true",
+                    help="Add variance, medians, a symptom-by-day heatmap and co-occurrence (needs NumPy)")
+    sp.add_argument("--max-day", type=int, default=35, help="Heatmap columns (cycle days)")
     sp.set_defaults(func=cycle_stats)
 
-    # plan & chat
-    sp = sub.add_parser("plan", help="Suggest tasks based on energy window")
+
+@command("cycle-rebuild", "Recompute the stored cycle aggregates from the full log")
+def _cycle_rebuild_args(sp):
+    sp.set_defaults(func=cycle_rebuild)
+
+
+# plan & chat
+@command("plan", "Suggest tasks based on energy window")
+def _plan_args(sp):
+    sp.add_argument("--limit", type=int, default=10, help="How many tasks to suggest")
     sp.set_defaults(func=plan)
 
-    sp = sub.add_parser("chat", help="Search-like chat")
+
+@command("chat", "Search-like chat")
+def _chat_args(sp):
+    sp.add_argument("--ann", action="store_true", help="Approximate nearest neighbours (faster on large stores)")
     sp.add_argument("query", nargs=argparse.REMAINDER, help='Your question, e.g., chat what did I write about cramps')
     sp.set_defaults(func=chat)
 
-    # export
-    sp = sub.add_parser("export", help="Export all data to JSON")
-    sp.add_argument("--path")
+
+# export
+@command("export", "Export all data to JSON, or stream it as NDJSON")
+def _export_args(sp):
+    sp.add_argument("--path", help="Output file ('-' for stdout with ndjson); with --chunk-records, the file prefix")
+    sp.add_argument("--format", default="json", choices=["json", "ndjson"])
+    sp.add_argument("--kinds", nargs="*", choices=["task", "note", "cycle"], help="ndjson: collections to export")
+    sp.add_argument("--from", dest="first", help="ndjson: YYYY-MM-DD, cycle log date / task and note update day")
+    sp.add_argument("--to", dest="last", help="ndjson: YYYY-MM-DD, inclusive")
+    sp.add_argument("--compress", choices=["gzip", "bz2", "xz", "zstd"], help="ndjson: compress the output")
+    sp.add_argument("--chunk-records", type=int, help="ndjson: split into files of this many records")
+    sp.add_argument("--resume", action="store_true", help="ndjson: continue an interrupted chunked export")
     sp.set_defaults(func=export_json)
 
+
+@command("import", "Bulk-load tasks, notes or cycle logs from JSONL or CSV")
+def _import_args(sp):
+    sp.add_argument("kind", choices=["task", "note", "cycle"])
+    sp.add_argument("path", nargs="?", default="-", help="Input file (default: stdin)")
+    sp.add_argument("--format", choices=["jsonl", "csv"], help="Default: csv for *.csv, else jsonl")
+    sp.add_argument("--batch-size", type=int, default=5000, help="Records validated and committed together")
+    sp.add_argument("--strict", action="store_true", help="Stop at the first invalid record instead of skipping it")
+    sp.set_defaults(func=import_records)
+
+
+@command("compact", "Fold the write journal into the JSON snapshot")
+def _compact_args(sp):
+    sp.set_defaults(func=compact)
+
+
+@command("serve", "Keep the store in memory and serve commands on a Unix socket")
+def _serve_args(sp):
+    sp.add_argument("--socket", help="Socket path (default: $SELENE_SOCKET or selene_data.sock)")
+    sp.add_argument("--flush-interval", type=float, default=1.0,
+                    help="Max seconds a write may sit in memory before hitting disk (0 = write-through)")
+    sp.set_defaults(func=serve)
+
+
+@command("serve-http", "JSON HTTP API over many users' stores")
+def _serve_http_args(sp):
+    sp.add_argument("--root", default="selene_users", help="Directory holding one store per user")
+    sp.add_argument("--host", default="127.0.0.1")
+    sp.add_argument("--port", type=int, default=8765)
+    sp.add_argument("--max-open", type=int, default=256, help="User stores kept loaded (LRU)")
+    sp.add_argument("--flush-interval", type=float, default=0.5, help="Seconds between batched writes")
+    sp.set_defaults(func=serve_http)
+
+
+@command("migrate", "Copy JSON data into the SQLite backend (selene.db)")
+def _migrate_args(sp):
+    sp.set_defaults(func=migrate)
+
+
+VALUE_OPTIONS = ("--backend", "--profile-capture", "--profile-file")  # top-level options that take a value
+
+
+def selected_command(argv):
+    """The subcommand argv runs, or None when there is none yet (or top-level --help comes first)."""
+    args = iter(argv)
+    for arg in args:
+        if arg in ("-h", "--help"):
+            return None
+        if arg in COMMANDS:
+            return arg
+        # `--profile-file plan` names a file, not the plan command; argparse also takes unique prefixes
+        if arg.startswith("--") and "=" not in arg and arg != "--profile" and any(
+                o.startswith(arg) for o in VALUE_OPTIONS):
+            next(args, None)
+    return None
+
+
+def build_parser(argv=None):
+    """The CLI parser: every subcommand, or given argv only the one it selects."""
+    p = argparse.ArgumentParser(
+        description="Selene — Self-Knowledge System (tasks, notes, cycle tracking, JSON storage)"
+    )
+    p.add_argument("--backend", choices=["json", "sqlite"],
+                   help="Storage backend (default: $SELENE_BACKEND or json)")
+    p.add_argument("--profile", action="store_true",
+                   help="Print per-phase timings and append them to the trace file (or set $SELENE_TRACE)")
+    p.add_argument("--profile-capture", choices=CAPTURES,
+                   help="Also profile functions (cprofile) or allocations (tracemalloc); implies --profile")
+    p.add_argument("--profile-file", metavar="PATH",
+                   help="NDJSON file the metrics are appended to (default: $SELENE_TRACE_FILE or selene_trace.ndjson)")
+    sub = p.add_subparsers(dest="cmd")
+    only = selected_command(argv) if argv is not None else None
+    for name, (help, add_arguments) in COMMANDS.items():
+        if only in (None, name):
+            add_arguments(sub.add_parser(name, help=help))
     return p
 
 
 def main():
-    parser = build_parser()
-    args = parser.parse_args()
+    global BACKEND
+    started = time.perf_counter()
+    argv = sys.argv[1:]
+    parser = build_parser(argv)
+    args = parser.parse_args(argv)
     if not getattr(args, "cmd", None):
         parser.print_help()
         return
+    if args.backend:
+        BACKEND = args.backend
     try:
-        args.func(args)
+        with tracing(args.cmd, argv, BACKEND, started, args.profile, args.profile_capture, args.profile_file):
+            args.func(args)
     except ValueError as e:
         print(f"❌ {e}")
 
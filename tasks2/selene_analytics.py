@@ -0,0 +1,107 @@
+# tasks2/selene_analytics.py — vectorized cycle analytics (needs NumPy)
+# The cycle log becomes a few flat arrays: entry dates as day ordinals, the
+# start ordinals, and a boolean entries x symptoms matrix with one column per
+# distinct symptom. Every statistic below is then a handful of array ops, so
+# even 100k-entry histories take milliseconds.
+#
+#   history = CycleHistory.from_logs(store.cycle_logs())
+#   history.length_stats()   # mean, variance, median, trimmed mean, rolling median
+#   history.heatmap()        # symptom x cycle-day counts
+#   history.cooccurrence()   # symptom x symptom counts
+
+from datetime import date
+
+import numpy as np
+
+
+def _ordinal(iso):
+    try:
+        return date.fromisoformat(iso).toordinal()
+    except (TypeError, ValueError):
+        return -1
+
+
+class CycleHistory:
+    """Cycle logs as NumPy arrays. Entries with unparseable dates are dropped."""
+
+    def __init__(self, dates, starts, symptoms, matrix):
+        self.dates = dates        # int64 ordinals, sorted
+        self.starts = starts      # int64 ordinals of "start" entries, sorted
+        self.symptoms = symptoms  # column names of `matrix`
+        self.matrix = matrix      # bool, len(dates) x len(symptoms)
+
+    @classmethod
+    def from_logs(cls, logs):
+        codes = {}
+        rows, cols, dates, is_start = [], [], [], []
+        for e in logs:
+            o = _ordinal(e["date"])
+            if o < 0:
+                continue
+            i = len(dates)
+            dates.append(o)
+            is_start.append(e.get("phase") == "start")
+            for s in e.get("symptoms", []):
+                rows.append(i)
+                cols.append(codes.setdefault(s, len(codes)))
+        dates = np.array(dates, dtype=np.int64)
+        is_start = np.array(is_start, dtype=bool)
+        order = np.argsort(dates, kind="stable")
+        matrix = np.zeros((len(dates), len(codes)), dtype=bool)
+        matrix[np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)] = True
+        return cls(dates[order], np.sort(dates[is_start]), list(codes), matrix[order])
+
+    def lengths(self):
+        """Cycle lengths in days: gaps between consecutive starts."""
+        return np.diff(self.starts)
+
+    def length_stats(self, trim=0.1, window=5):
+        """Summary of cycle lengths, or None before two starts.
+
+        trimmed_mean drops `trim` of the lengths at each end; rolling_median
+        is the median of each `window` consecutive cycles, oldest first.
+        """
+        lengths = self.lengths()
+        n = len(lengths)
+        if not n:
+            return None
+        ordered = np.sort(lengths)
+        cut = int(n * trim)
+        kept = ordered[cut:n - cut] if n - 2 * cut > 0 else ordered
+        rolling = (np.median(np.lib.stride_tricks.sliding_window_view(lengths, window), axis=1)
+                   if n >= window else np.array([np.median(lengths)]))
+        return {
+            "cycles": n,
+            "mean": float(lengths.mean()),
+            "variance": float(lengths.var(ddof=1)) if n > 1 else 0.0,
+            "stdev": float(lengths.std(ddof=1)) if n > 1 else 0.0,
+            "median": float(np.median(lengths)),
+            "trimmed_mean": float(kept.mean()),
+            "rolling_median": rolling.tolist(),
+            "min": int(ordered[0]),
+            "max": int(ordered[-1]),
+        }
+
+    def cycle_days(self):
+        """Day of the cycle (0 = start day) for each entry; -1 before the first start."""
+        idx = np.searchsorted(self.starts, self.dates, side="right") - 1
+        days = self.dates - self.starts[np.maximum(idx, 0)] if len(self.starts) else np.zeros_like(self.dates)
+        return np.where(idx >= 0, days, -1)
+
+    def heatmap(self, max_day=35):
+        """symptoms x (max_day + 1) counts of each symptom by cycle day; later days land in the last column."""
+        days = self.cycle_days()
+        keep = days >= 0
+        days = np.minimum(days[keep], max_day)
+        columns = np.ascontiguousarray(self.matrix[keep].T)
+        # one bincount per symptom column: there are few symptoms but many entries
+        heat = np.zeros((len(self.symptoms), max_day + 1), dtype=np.int64)
+        for j in range(len(self.symptoms)):
+            heat[j] = np.bincount(days[columns[j]], minlength=max_day + 1)
+        return heat
+
+    def cooccurrence(self):
+        """symptoms x symptoms counts of entries logging both; the diagonal is each symptom's total."""
+        m = self.matrix.astype(np.float64)  # float matmul goes through BLAS; counts stay exact
+        return np.rint(m.T @ m).astype(np.int64)
+
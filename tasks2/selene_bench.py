@@ -0,0 +1,427 @@
+# tasks2/selene_bench.py — synthetic workloads and a benchmark harness for Selene
+# `generate` builds a realistic store: tasks with Zipf-distributed tags, due
+# dates around today and a mix of energies and statuses; notes with bodies of
+# everyday and symptom words; a daily cycle log with ~28-day cycles. `run`
+# copies that store to a scratch directory, then times the storage operations
+# in-process and every everyday subcommand as a fresh `selene.py` process. It
+# prints p50/p90/p99 latency and peak memory per operation, and compares them
+# with the baseline saved for the same scale and backend.
+#
+#   python selene_bench.py generate --scale 100k            # cached under $TMPDIR/selene_bench
+#   python selene_bench.py run --scale 10k --save           # record a baseline
+#   python selene_bench.py run --scale 10k                  # exit 1 on a regression
+#   python selene_bench.py run --scale 1m --backend sqlite --only cli.plan store.plan
+#
+# Scales: 10k, 100k and 1m tasks, with a tenth as many notes and as many days
+# of cycle logs. serve, serve-http and migrate are not timed: the first two
+# never exit, and migrate is a one-off copy.
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import selene
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+RESULTS_FILE = "selene_bench_results.json"
+BATCH = 5000
+
+VERBS = ["buy", "call", "email", "finish", "review", "plan", "write", "read", "book", "clean",
+         "fix", "prepare", "submit", "schedule", "practice", "study", "organize", "pay", "return", "draft"]
+THINGS = ["iron supplements", "dentist", "essay draft", "lab report", "groceries", "rent", "slides",
+          "CSC 299 project", "library books", "flight", "budget", "yoga class", "doctor", "resume",
+          "meeting notes", "gift for mom", "bike repair", "laundry", "reading list", "tax forms"]
+TAGS = ["health", "school", "work", "errand", "home", "urgent", "cycle", "money", "social", "self-care",
+        "archive", "reading", "fitness", "family", "admin", "travel", "someday", "waiting", "deep", "quick"]
+TAG_WEIGHTS = [1 / (rank + 1) for rank in range(len(TAGS))]  # Zipf: a few tags dominate
+WORDS = ("felt tired today slept badly cramps in the morning headache after lunch energy came back "
+         "in the evening went for a walk focus was good wrote two pages of the essay bloating mild "
+         "mood low then better skipped coffee drank water stretched read for an hour").split()
+SYMPTOMS = ["cramps", "fatigue", "headache", "bloating", "acne", "backache", "tender"]
+MOODS = ["", "", "calm", "low", "irritable", "energetic", "anxious"]
+
+
+def _stamp(day, rng):
+    return datetime(day.year, day.month, day.day, rng.randrange(7, 23), rng.randrange(60),
+                    rng.randrange(60)).isoformat()
+
+
+def _tasks(n, rng, today):
+    for i in range(n):
+        created = today - timedelta(days=rng.randrange(730))
+        due = created + timedelta(days=rng.randrange(-30, 120)) if rng.random() < 0.7 else None
+        title = f"{rng.choice(VERBS).capitalize()} {rng.choice(THINGS)}"
+        if rng.random() < 0.3:
+            title += f" #{i}"
+        tags = sorted(set(rng.choices(TAGS, TAG_WEIGHTS, k=rng.choice([0, 1, 1, 2, 2, 3]))))
+        energy = rng.choice([None, "high", "low", "low", "creative", "reflective"])
+        status = "done" if created < today - timedelta(days=60) and rng.random() < 0.7 else "open"
+        yield selene.task_record(None, title, due and due.isoformat(), tags, energy, status, _stamp(created, rng))
+
+
+def _notes(n, rng, today):
+    for _ in range(n):
+        created = today - timedelta(days=rng.randrange(730))
+        body = " ".join(rng.choices(WORDS + SYMPTOMS, k=rng.randrange(20, 120)))
+        tags = sorted(set(rng.choices(TAGS, TAG_WEIGHTS, k=rng.choice([0, 1, 2]))))
+        title = f"{rng.choice(['Journal', 'Notes on', 'Thoughts about', 'Log'])} {rng.choice(THINGS)}"
+        yield selene.note_record(None, title, body, tags, _stamp(created, rng))
+
+
+def _cycle_logs(days, rng, today):
+    day, start = today - timedelta(days=days - 1), None
+    next_start = day + timedelta(days=rng.randrange(28))
+    while day <= today:
+        if day == next_start:
+            start, phase = day, "start"
+            next_start = day + timedelta(days=round(rng.gauss(28.5, 2.0)))
+        elif start and (day - start).days == rng.choice([4, 5, 5, 6]):
+            phase = "end"
+        else:
+            phase = "note"
+        near_start = start is not None and (day - start).days < 4
+        symptoms = sorted(set(rng.choices(SYMPTOMS, k=rng.choice([1, 2, 3])))) if near_start or rng.random() < 0.1 else []
+        yield selene.cycle_entry(day.isoformat(), phase, symptoms, rng.choice(MOODS),
+                                 rng.choice(["", "", "", "slept badly", "long walk"]), _stamp(day, rng))
+        day += timedelta(days=1)
+
+
+def _ops(kind, records, store):
+    if kind == "cycle_logs":
+        return [{"op": "cycle_log", "entry": e} for e in records]
+    first_id = store.next_id(kind)
+    for i, r in enumerate(records):
+        r["id"] = first_id + i
+    return [{"op": kind[:4] + "_add", "record": r} for r in records]
+
+
+def generate(path, tasks, notes, days, backend="json", seed=0, today=None):
+    """Build a store of synthetic data in the directory `path` (created; must not hold a store)."""
+    os.makedirs(path, exist_ok=True)
+    rng = random.Random(seed)
+    today = today or date.today()
+    with using_store(path, backend):
+        store = selene.open_store()
+        for kind, records in [("tasks", _tasks(tasks, rng, today)), ("notes", _notes(notes, rng, today)),
+                              ("cycle_logs", _cycle_logs(days, rng, today))]:
+            batch = []
+            for r in records:
+                batch.append(r)
+                if len(batch) == BATCH:
+                    store.commit_many(_ops(kind, batch, store), compact=False)
+                    batch = []
+            if batch:
+                store.commit_many(_ops(kind, batch, store), compact=False)
+        store.compact()
+        store.close()
+
+
+@contextmanager
+def using_store(path, backend):
+    """Point selene at the store in the directory `path` for the duration of a with block."""
+    values = {"DATA_FILE": os.path.join(path, "selene_data.json"), "DB_FILE": os.path.join(path, "selene.db"),
+              "BACKEND": backend}
+    saved = {k: getattr(selene, k) for k in values}
+    for k, v in values.items():
+        setattr(selene, k, v)
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            setattr(selene, k, v)
+
+
+# -----------------------------
+# Operations
+# -----------------------------
+def _store_ops(backend, today):
+    """name -> fn(store, i) for the in-process storage operations (i counts the runs)."""
+    week = (today.isoformat(), (today + timedelta(days=7)).isoformat())
+
+    def load_cold(store, i):
+        if backend == "json" and os.path.exists(selene._cache_path()):
+            os.remove(selene._cache_path())
+        selene.open_store().close()
+
+    return {
+        "store.load_cold": load_cold,
+        "store.load": lambda store, i: selene.open_store().close(),
+        "store.tasks_by_due": lambda store, i: selene.list_tasks(store, "open", "due", 20),
+        "store.tasks_by_updated": lambda store, i: selene.list_tasks(store, "all", "updated", 20),
+        "store.tasks_tagged": lambda store, i: selene.list_tasks(store, "open", "due", 20, tags="health & !archive"),
+        "store.agenda": lambda store, i: selene.agenda(store, *week),
+        "store.overdue": lambda store, i: selene.overdue(store),
+        "store.notes_recent": lambda store, i: store.notes(limit=20),
+        "store.note_body": lambda store, i: store.get_note(1 + i)["body"],
+        "store.search_tasks": lambda store, i: store.search("iron supplements", "task", 10),
+        "store.search_notes": lambda store, i: store.search("cramps tired", "note", 10),
+        "store.search_typo": lambda store, i: store.search("cramsp", "note", 10),
+        "store.search_substring": lambda store, i: store.search("slept badly", "note", 10, substring=True),
+        "store.chat": lambda store, i: selene.chat_hits(store, "what did I write about cramps"),
+        "store.cycle_recent": lambda store, i: store.cycle_logs(last=30),
+        "store.cycle_predict": lambda store, i: selene.predict_next_start(store),
+        "store.cycle_summary": lambda store, i: selene.cycle_summary(store),
+        "store.plan": lambda store, i: selene.plan_tasks(store, 10),
+        "store.stream_all": lambda store, i: sum(1 for kind in ("task", "note", "cycle") for _ in store.stream(kind)),
+        "store.add_task": lambda store, i: selene.add_task(store, f"Benchmark task {i}", week[1], ["bench"]),
+        "store.complete_task": lambda store, i: selene.complete_task(store, 1 + i),
+        "store.compact": lambda store, i: store.compact(),
+    }
+
+
+def _cli_ops(n_tasks, today):
+    """name -> fn(i, workdir) giving the argv of run i of each subcommand; writes come after reads."""
+    day = today.isoformat()
+    return {
+        "cli.task-list": lambda i, w: ["task-list", "--limit", "20"],
+        "cli.task-agenda": lambda i, w: ["task-agenda"],
+        "cli.task-search": lambda i, w: ["task-search", "iron"],
+        "cli.note-list": lambda i, w: ["note-list"],
+        "cli.note-show": lambda i, w: ["note-show", str(1 + i)],
+        "cli.note-search": lambda i, w: ["note-search", "cramps"],
+        "cli.cycle-show": lambda i, w: ["cycle-show"],
+        "cli.cycle-predict": lambda i, w: ["cycle-predict"],
+        "cli.cycle-stats": lambda i, w: ["cycle-stats"],
+        "cli.plan": lambda i, w: ["plan"],
+        "cli.chat": lambda i, w: ["chat", "what", "did", "I", "write", "about", "cramps"],
+        "cli.export": lambda i, w: ["export", "--path", os.path.join(w, "export.json")],
+        "cli.export-ndjson": lambda i, w: ["export", "--format", "ndjson", "--path", os.path.join(w, "export.ndjson")],
+        "cli.task-add": lambda i, w: ["task-add", f"Benchmark task {i}", "--due", day, "--tags", "bench"],
+        "cli.task-done": lambda i, w: ["task-done", str(1 + i)],
+        "cli.task-del": lambda i, w: ["task-del", str(n_tasks - i)],
+        "cli.note-add": lambda i, w: ["note-add", f"Benchmark note {i}", "--body", "felt tired, cramps at noon"],
+        "cli.cycle-log": lambda i, w: ["cycle-log", day, "--phase", "note", "--symptoms", "fatigue"],
+        "cli.import": lambda i, w: ["import", "task", _import_file(w)],
+        "cli.cycle-rebuild": lambda i, w: ["cycle-rebuild"],
+        "cli.compact": lambda i, w: ["compact"],
+    }
+
+
+def _import_file(workdir, rows=1000):
+    path = os.path.join(workdir, "import.jsonl")
+    if not os.path.exists(path):
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(rows):
+                f.write(json.dumps({"title": f"Imported task {i}", "tags": ["bench"], "energy": "low"}) + "\n")
+    return path
+
+
+# Runs selene.py and reports its own peak RSS on exit. The parent can't measure
+# it: Linux carries the RSS high-water mark over fork and exec, so a child
+# would inherit this (much bigger) process's peak.
+_PEAK_WRAPPER = """
+import atexit, os, runpy, sys
+def peak():
+    try:
+        with open("/proc/self/status") as f:
+            kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+    except OSError:
+        import resource
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1)
+    sys.stderr.write(f"\\nselene_bench peak_kb {kb}\\n")
+atexit.register(peak)
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(sys.argv[0]))
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def _run_cli(argv, cwd, backend):
+    """(seconds, peak RSS in MB) of one `selene.py argv` process."""
+    env = {**os.environ, "SELENE_BACKEND": backend}
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", _PEAK_WRAPPER, os.path.join(HERE, "selene.py"), *argv],
+                          cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - t0
+    err, _, peak = proc.stderr.rpartition("selene_bench peak_kb ")
+    if proc.returncode or not peak:
+        raise RuntimeError(f"{' '.join(argv)} failed:\n{proc.stderr[-2000:]}")
+    return elapsed, int(peak) / 1024
+
+
+def _percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def _summary(seconds, peak_mb):
+    seconds = sorted(seconds)
+    return {"p50_ms": _percentile(seconds, 50) * 1000, "p90_ms": _percentile(seconds, 90) * 1000,
+            "p99_ms": _percentile(seconds, 99) * 1000, "peak_mb": peak_mb, "runs": len(seconds)}
+
+
+def run_benchmarks(path, backend="json", repeat=7, only=None, memory=True, today=None, report=None):
+    """Time every operation against a scratch copy of the store in `path`.
+
+    Each operation runs once untimed (so lazily built indexes are in place),
+    then `repeat` timed times. Store operations report the peak of Python
+    allocations (tracemalloc, one extra run); subcommands report the peak RSS
+    of their process. Returns {name: {"p50_ms", "p90_ms", "p99_ms", "peak_mb", "runs"}}.
+    """
+    today = today or date.today()
+
+    def selected(name):  # "cli" or "store" selects a whole group
+        return not only or any(name == o or name.startswith(o + ".") for o in only)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="selene_bench_") as scratch:
+        work = os.path.join(scratch, "store")
+        shutil.copytree(path, work)
+        with using_store(work, backend):
+            store = selene.open_store()
+            n_tasks = len(store.tasks())
+            for name, op in _store_ops(backend, today).items():
+                if not selected(name):
+                    continue
+                op(store, 0)
+                times = []
+                for i in range(1, repeat + 1):
+                    t0 = time.perf_counter()
+                    op(store, i)
+                    times.append(time.perf_counter() - t0)
+                peak = None
+                if memory:
+                    tracemalloc.start()
+                    op(store, repeat + 1)
+                    peak = tracemalloc.get_traced_memory()[1] / 1e6
+                    tracemalloc.stop()
+                results[name] = _summary(times, peak)
+                if report:
+                    report(name, results[name])
+            store.close()
+        for name, argv in _cli_ops(n_tasks, today).items():
+            if not selected(name):
+                continue
+            _run_cli(argv(0, scratch), work, backend)
+            runs = [_run_cli(argv(i, scratch), work, backend) for i in range(1, repeat + 1)]
+            results[name] = _summary([t for t, _ in runs], max(mb for _, mb in runs))
+            if report:
+                report(name, results[name])
+    return results
+
+
+# -----------------------------
+# Baselines
+# -----------------------------
+def load_results(path=RESULTS_FILE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_results(results, key, path=RESULTS_FILE):
+    """Store `results` as the baseline for `key` (e.g. "10k/json") in the results file."""
+    saved = load_results(path)
+    ops = saved.get(key, {}).get("ops", {})  # a run with --only updates just its operations
+    ops.update({name: {k: round(v, 3) if isinstance(v, float) else v for k, v in r.items()}
+                for name, r in results.items()})
+    saved[key] = {"saved": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                  "machine": platform.machine(), "ops": ops}
+    selene.write_atomic(path, (json.dumps(saved, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+
+
+def regressions(results, baseline, tolerance=0.25, noise_ms=2.0, noise_mb=2.0):
+    """{name: message} for every operation slower or bigger than its baseline by more than `tolerance`.
+
+    Differences under noise_ms / noise_mb never count, so fast operations
+    don't flap on timer jitter.
+    """
+    found = {}
+    for name, now in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        slower = now["p50_ms"] - base["p50_ms"]
+        if slower > noise_ms and now["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            found[name] = f"p50 {now['p50_ms']:.1f} ms vs {base['p50_ms']:.1f} ms (+{slower / base['p50_ms']:.0%})"
+        elif now["peak_mb"] is not None and base["peak_mb"] is not None \
+                and now["peak_mb"] - base["peak_mb"] > noise_mb and now["peak_mb"] > base["peak_mb"] * (1 + tolerance):
+            found[name] = f"peak {now['peak_mb']:.1f} MB vs {base['peak_mb']:.1f} MB"
+    return found
+
+
+def _data_dir(root, scale, backend, seed):
+    return os.path.join(root, f"{scale}-{backend}-seed{seed}")
+
+
+def _sizes(args):
+    n = SCALES[args.scale]
+    return n, args.notes if args.notes is not None else n // 10, args.days if args.days is not None else n // 10
+
+
+def _generate(args, path):
+    tasks, notes, days = _sizes(args)
+    print(f"🛠  Generating {tasks} tasks, {notes} notes and {days} days of cycle logs in {path}")
+    t0 = time.perf_counter()
+    generate(path, tasks, notes, days, args.backend, args.seed)
+    print(f"   done in {time.perf_counter() - t0:.1f}s")
+
+
+def _print_result(name, r, note=""):
+    peak = f"{r['peak_mb']:8.1f} MB" if r["peak_mb"] is not None else "       — MB"
+    print(f"{name:<24} p50 {r['p50_ms']:9.2f} ms | p90 {r['p90_ms']:9.2f} | p99 {r['p99_ms']:9.2f} | peak {peak}{note}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Synthetic workloads and benchmarks for Selene")
+    p.add_argument("action", choices=["generate", "run"])
+    p.add_argument("--scale", default="10k", choices=list(SCALES), help="Number of tasks")
+    p.add_argument("--notes", type=int, help="Default: a tenth of the tasks")
+    p.add_argument("--days", type=int, help="Days of cycle logs (default: a tenth of the tasks)")
+    p.add_argument("--backend", default="json", choices=["json", "sqlite"])
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--data", default=os.path.join(tempfile.gettempdir(), "selene_bench"),
+                   help="Where generated stores are kept between runs")
+    p.add_argument("-n", "--repeat", type=int, default=7, help="Timed runs per operation")
+    p.add_argument("--only", nargs="*", help="Operations to run, e.g. cli.plan store.search_notes, or cli / store")
+    p.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run of store operations")
+    p.add_argument("--results", default=RESULTS_FILE, help="Baselines file")
+    p.add_argument("--save", action="store_true", help="Save this run as the baseline")
+    p.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging, 0.25 = 25%%")
+    args = p.parse_args()
+
+    path = _data_dir(args.data, args.scale, args.backend, args.seed)
+    if args.notes is not None or args.days is not None:
+        path += f"-n{_sizes(args)[1]}-d{_sizes(args)[2]}"
+    if args.action == "generate" or not os.path.isdir(path):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        _generate(args, path)
+    if args.action == "generate":
+        return
+
+    key = f"{args.scale}/{args.backend}"
+    baseline = load_results(args.results).get(key, {}).get("ops", {})
+    print(f"⏱  {key}: {args.repeat} runs per operation" + (", comparing with the saved baseline" if baseline else ""))
+    found = {}
+
+    def report(name, r):
+        problem = regressions({name: r}, baseline, args.tolerance)
+        found.update(problem)
+        base = baseline.get(name)
+        note = f"  ({r['p50_ms'] / base['p50_ms'] - 1:+.0%})" if base and base["p50_ms"] else ""
+        _print_result(name, r, note + (f"  ❌ {problem[name]}" if problem else ""))
+
+    results = run_benchmarks(path, args.backend, args.repeat, args.only, not args.no_memory, report=report)
+    if args.save:
+        save_results(results, key, args.results)
+        print(f"💾 Saved as the {key} baseline in {args.results}")
+    if found:
+        print(f"❌ {len(found)} regression(s) against the {key} baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# tasks2/selene_client.py — thin client for `selene.py serve`
+# Same arguments as selene.py, e.g.:
+#   python selene_client.py task-add "Buy iron supplements" --tags health
+# Imports only the stdlib bits it needs so startup stays small.
+
+import json
+import os
+import socket
+import sys
+
+
+def call(argv, path=None):
+    """Run one selene.py command in the daemon; returns (exit code, output)."""
+    path = path or os.environ.get("SELENE_SOCKET") or "selene_data.sock"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(path)
+        s.sendall(json.dumps({"argv": argv}).encode("utf-8") + b"\n")
+        reply = json.loads(s.makefile("rb").readline())
+    return reply["code"], reply["out"]
+
+
+def main():
+    try:
+        code, out = call(sys.argv[1:])
+    except (FileNotFoundError, ConnectionRefusedError):
+        print("❌ Selene daemon is not running. Start it with: python selene.py serve", file=sys.stderr)
+        sys.exit(1)
+    sys.stdout.write(out)
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# tasks2/selene_cycles.py — materialized cycle aggregates for Selene
+# Both stores keep one small block of running totals next to the cycle logs
+# and fold every new entry into it, so predict/stats/plan read a handful of
+# numbers instead of walking the whole history:
+#
+#   {"logs": 412, "starts": 14, "last_start": "2025-11-03",
+#    "cycles": 13, "length_sum": 369, "length_sumsq": 10513,
+#    "symptoms": {"cramps": 9, "fatigue": 4}}
+#
+# "cycles" counts the gaps between consecutive starts; length_sum and
+# length_sumsq are the running sums of those gaps and of their squares.
+
+import math
+from datetime import date
+
+Z80 = 1.2816  # two-sided 80% normal quantile, for prediction intervals
+
+
+def empty_stats():
+    return {"logs": 0, "starts": 0, "last_start": None, "cycles": 0,
+            "length_sum": 0, "length_sumsq": 0, "symptoms": {}}
+
+
+def start_ordinal(iso):
+    """Date ordinal of an ISO date, or None for anything unparseable."""
+    try:
+        return date.fromisoformat(iso).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def fold_entry(stats, entry, prev_start=None, next_start=None):
+    """Fold one new cycle entry into `stats` in place.
+
+    prev_start/next_start are the ordinals of the start entries just before
+    (on or before its date) and after it; a start landing between two others
+    splits that cycle in two, which keeps the sums exact for back-filled logs.
+    """
+    stats["logs"] += 1
+    symptoms = stats["symptoms"]
+    for s in entry.get("symptoms", []):
+        symptoms[s] = symptoms.get(s, 0) + 1
+    x = start_ordinal(entry["date"]) if entry.get("phase") == "start" else None
+    if x is None:
+        return stats
+    stats["starts"] += 1
+    if prev_start is not None and next_start is not None:
+        _add_cycle(stats, -(next_start - prev_start), -1)
+    if prev_start is not None:
+        _add_cycle(stats, x - prev_start)
+    if next_start is not None:
+        _add_cycle(stats, next_start - x)
+    if stats["last_start"] is None or entry["date"] > stats["last_start"]:
+        stats["last_start"] = entry["date"]
+    return stats
+
+
+def _add_cycle(stats, length, count=1):
+    stats["cycles"] += count
+    stats["length_sum"] += length
+    stats["length_sumsq"] += length * length * count
+
+
+def compute_stats(logs):
+    """The aggregate block for `logs` (in date order) from scratch."""
+    stats = empty_stats()
+    prev = None
+    for e in logs:
+        fold_entry(stats, e, prev_start=prev)
+        if e.get("phase") == "start":
+            prev = start_ordinal(e["date"]) or prev
+    return stats
+
+
+def length_moments(stats):
+    """(mean, population stdev) of all cycle lengths, or (None, None) before two starts."""
+    n = stats["cycles"]
+    if not n:
+        return None, None
+    mean = stats["length_sum"] / n
+    return mean, math.sqrt(max(stats["length_sumsq"] / n - mean * mean, 0.0))
+
+
+def interval_halfwidth(starts, z=Z80):
+    """Half-width in days of a prediction band for the next cycle length, or None before three starts.
+
+    z * s * sqrt(1 + 1/n) over the cycle lengths between `starts` (dates),
+    the usual interval for one new draw from a normal sample. Plain Python:
+    a dozen lengths are not worth importing NumPy for on every cycle-predict.
+    """
+    lengths = [b.toordinal() - a.toordinal() for a, b in zip(starts, starts[1:])]
+    n = len(lengths)
+    if n < 2:
+        return None
+    mean = sum(lengths) / n
+    s = math.sqrt(sum((x - mean) ** 2 for x in lengths) / (n - 1))
+    return z * s * math.sqrt(1 + 1 / n)
@@ -0,0 +1,144 @@
+# tasks2/selene_export.py — `selene.py export --format ndjson`: streaming export
+# Writes one JSON object per line, tagged with its collection:
+#
+#   {"kind": "task", "id": 1, "title": "Buy iron supplements", ...}
+#   {"kind": "cycle", "date": "2025-11-03", "phase": "start", ...}
+#
+# Records come one at a time from store.stream(), are encoded one at a time
+# and leave in small buffered writes, so memory stays flat however big the
+# store is. The output can be compressed (gzip, bz2, xz, and zstd where the
+# stdlib has it) and split into chunk files of a fixed number of records.
+# Chunked exports keep a manifest; an interrupted one continues with --resume.
+# Each file is a valid `selene.py import` input for its kind (extra fields
+# such as "kind" and "id" are ignored there).
+
+import bz2
+import gzip
+import json
+import lzma
+import os
+import sys
+from itertools import islice
+
+from selene_trace import add_bytes, count
+
+KINDS = ("task", "note", "cycle")
+COMPRESSORS = {"gzip": (".gz", gzip.open), "bz2": (".bz2", bz2.open), "xz": (".xz", lzma.open)}
+try:  # Python 3.14+
+    from compression import zstd
+    COMPRESSORS["zstd"] = (".zst", zstd.open)
+except ImportError:
+    pass
+WRITE_LINES = 1000  # lines joined per write() call
+
+_encode = json.JSONEncoder(ensure_ascii=False, check_circular=False).encode
+
+
+def records(store, kinds=KINDS, first=None, last=None):
+    """Yield {"kind": ..., **record} for every selected record, collection by collection."""
+    for kind in kinds:
+        for r in store.stream(kind, first, last):
+            yield {"kind": kind, **r}
+
+
+def write_lines(f, recs, limit=None):
+    """Write up to `limit` records (all if None) to the text file `f`; returns how many."""
+    written = 0
+    while limit is None or written < limit:
+        step = WRITE_LINES if limit is None else min(WRITE_LINES, limit - written)
+        lines = [_encode(r) for r in islice(recs, step)]
+        if not lines:
+            break
+        add_bytes("written", f.write("\n".join(lines) + "\n"))  # characters, before compression
+        written += len(lines)
+    count("exported", written)
+    return written
+
+
+def _open(path, compress):
+    """A text file for writing `path`, through the compressor if any."""
+    if compress:
+        return COMPRESSORS[compress][1](path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def _write_atomic(path, compress, recs, limit=None):
+    # write-then-rename: a file under its final name is always complete
+    tmp = path + ".tmp"
+    with _open(tmp, compress) as f:
+        n = write_lines(f, recs, limit)
+    os.replace(tmp, path)
+    return n
+
+
+def export_file(store, path, kinds=KINDS, first=None, last=None, compress=None):
+    """Export to one file, or to stdout when `path` is "-". Returns the record count."""
+    recs = records(store, kinds, first, last)
+    if path != "-":
+        return _write_atomic(path, compress, recs)
+    if not compress:
+        return write_lines(sys.stdout, recs)
+    with COMPRESSORS[compress][1](sys.stdout.buffer, "wt", encoding="utf-8") as f:
+        return write_lines(f, recs)
+
+
+def manifest_path(base):
+    return base + ".manifest.json"
+
+
+def chunk_path(base, n, compress):
+    return f"{base}.{n:05d}.ndjson{COMPRESSORS[compress][0] if compress else ''}"
+
+
+def export_chunks(store, base, chunk_records, kinds=KINDS, first=None, last=None, compress=None, resume=False):
+    """Export to numbered files of `chunk_records` records each: base.00001.ndjson[.gz], ...
+
+    base.manifest.json lists the finished chunks and is rewritten after each
+    one. With `resume`, an unfinished export with the same options skips the
+    records already in its chunks and carries on from the next chunk; this
+    assumes the store has not changed in between. Returns the manifest.
+    """
+    options = {"kinds": list(kinds), "from": first.isoformat() if first else None,
+               "to": last.isoformat() if last else None, "compress": compress, "chunk_records": chunk_records}
+    manifest = _read_manifest(base)
+    if resume and manifest is not None:
+        if manifest["options"] != options:
+            raise ValueError("The unfinished export used different options; rerun without --resume to start over.")
+    else:
+        for chunk in (manifest or {}).get("chunks", []):  # starting over: drop the old chunks
+            if os.path.exists(chunk["file"]):
+                os.remove(chunk["file"])
+        manifest = {"options": options, "chunks": [], "complete": False}
+    if manifest["complete"]:
+        return manifest
+    recs = records(store, kinds, first, last)
+    done = sum(c["records"] for c in manifest["chunks"])
+    if done:
+        next(islice(recs, done - 1, None), None)  # skip what the finished chunks hold
+    while True:
+        path = chunk_path(base, len(manifest["chunks"]) + 1, compress)
+        n = _write_atomic(path, compress, recs, chunk_records)
+        if n:
+            manifest["chunks"].append({"file": path, "records": n})
+        else:
+            os.remove(path)
+        if n < chunk_records:
+            manifest["complete"] = True
+        _write_manifest(base, manifest)
+        if manifest["complete"]:
+            return manifest
+
+
+def _read_manifest(base):
+    try:
+        with open(manifest_path(base), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(base, manifest):
+    tmp = manifest_path(base) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, manifest_path(base))
@@ -0,0 +1,302 @@
+# tasks2/selene_http.py — asyncio JSON API serving many users' Selene stores
+# Each user gets their own JSON store under <root>/<user>/. Hot stores stay
+# loaded in an LRU; a request takes only that user's lock and runs in a worker
+# thread, and writes are persisted in batches by a background flusher, so
+# users never wait on each other.
+#
+#   python selene.py serve-http --root users --port 8765
+#   curl -d '{"title": "Buy iron"}' localhost:8765/users/ana/tasks
+
+import asyncio
+import json
+import os
+import re
+import signal
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+import selene
+from selene_records import json_default
+
+USER_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class StorePool:
+    """LRU of loaded per-user JsonStores, with one asyncio.Lock per user.
+
+    Everything done with a store (requests, flushes, loading, closing) holds
+    that user's lock and runs in a worker thread, off the event loop.
+    """
+
+    def __init__(self, root, max_open=256, flush_interval=0.5):
+        self.root = root
+        self.max_open = max_open
+        self.flush_interval = flush_interval
+        self._stores = OrderedDict()
+        self._locks = {}
+        self._closing = {}  # user -> task flushing an evicted store
+
+    def lock(self, user):
+        return self._locks.setdefault(user, asyncio.Lock())
+
+    async def get(self, user):
+        store = self._stores.get(user)
+        if store is not None:
+            self._stores.move_to_end(user)
+            return store
+        if user in self._closing:
+            await self._closing[user]  # don't reload before its last writes are on disk
+        async with self.lock(user):
+            store = self._stores.get(user)
+            if store is None:
+                path = os.path.join(self.root, user, "selene_data.json")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                store = await asyncio.to_thread(selene.JsonStore, path, self.flush_interval)
+                self._stores[user] = store
+        while len(self._stores) > self.max_open:
+            old_user, old_store = self._stores.popitem(last=False)
+            task = asyncio.create_task(self._close(old_user, old_store))
+            self._closing[old_user] = task
+        return store
+
+    def is_open(self, user, store):
+        return self._stores.get(user) is store
+
+    async def _close(self, user, store):
+        try:
+            async with self.lock(user):
+                await asyncio.to_thread(store.close)
+        finally:
+            self._closing.pop(user, None)
+
+    async def flush_dirty(self):
+        for user, store in list(self._stores.items()):
+            if store.pending_age() > 0:
+                async with self.lock(user):
+                    await asyncio.to_thread(store.flush)
+
+    async def flush_forever(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_dirty()
+
+    async def close_all(self):
+        await asyncio.gather(*self._closing.values())
+        while self._stores:
+            user, store = self._stores.popitem()
+            await self._close(user, store)
+
+
+# -----------------------------
+# Handlers: (store, query, body, *path groups) -> (status, payload)
+# -----------------------------
+def _arg(source, key, cast=str, default=None):
+    value = source.get(key, default)
+    if value is None:
+        raise HttpError(400, f"Missing '{key}'.")
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise HttpError(400, f"Bad value for '{key}'.")
+
+
+def _found(record, what):
+    if not record:
+        raise HttpError(404, f"{what} not found.")
+    return 200, record
+
+
+def list_tasks(store, q, body):
+    sort = q.get("sort", "due")
+    if sort not in selene.TASK_SORT_KEYS:
+        raise HttpError(400, f"Sort must be one of: {', '.join(selene.TASK_SORT_KEYS)}.")
+    limit = _arg(q, "limit", int) if "limit" in q else None
+    return 200, selene.list_tasks(store, q.get("status", "open"), sort, limit, q.get("tags"))
+
+
+def create_task(store, q, body):
+    return 201, selene.add_task(store, _arg(body, "title"), body.get("due"), body.get("tags"), body.get("energy"))
+
+
+def task_agenda(store, q, body):
+    return 200, selene.agenda(store, q.get("from"), q.get("to"))
+
+
+def finish_task(store, q, body, task_id):
+    return _found(selene.complete_task(store, int(task_id)) and {"id": int(task_id), "status": "done"}, "Task")
+
+
+def remove_task(store, q, body, task_id):
+    return _found(selene.delete_task(store, int(task_id)) and {"id": int(task_id), "deleted": True}, "Task")
+
+
+def search_tasks(store, q, body):
+    return 200, store.search(_arg(q, "q"), "task", _arg(q, "limit", int, 20), q.get("substring") == "1")
+
+
+def list_notes(store, q, body):
+    return 200, store.notes(tag=q.get("tag"), limit=_arg(q, "limit", int, 20), tags=q.get("tags"))
+
+
+def create_note(store, q, body):
+    return 201, selene.add_note(store, _arg(body, "title"), body.get("body"), body.get("tags"))
+
+
+def show_note(store, q, body, note_id):
+    return _found(store.get_note(int(note_id)), "Note")
+
+
+def search_notes(store, q, body):
+    return 200, store.search(_arg(q, "q"), "note", _arg(q, "limit", int, 20), q.get("substring") == "1")
+
+
+def list_cycle_logs(store, q, body):
+    return 200, store.cycle_logs(last=_arg(q, "last", int, 10))
+
+
+def create_cycle_log(store, q, body):
+    entry = selene.log_cycle(store, _arg(body, "date"), _arg(body, "phase"), body.get("symptoms"),
+                             body.get("mood"), body.get("note"))
+    return 201, entry
+
+
+def predict(store, q, body):
+    return 200, selene.predict_next_start(store)
+
+
+def stats(store, q, body):
+    return 200, selene.cycle_summary(store) or {}
+
+
+def analytics(store, q, body):
+    return 200, selene.cycle_analytics(store, _arg(q, "max_day", int, 35))
+
+
+def plan(store, q, body):
+    return 200, selene.plan_tasks(store, _arg(q, "limit", int, 10))
+
+
+def chat(store, q, body):
+    notes, tasks = selene.chat_hits(store, _arg(q, "q"), ann=q.get("ann") == "1")
+    return 200, {"notes": notes, "tasks": tasks}
+
+
+# (method, path under /users/<user>, handler)
+ROUTES = [
+    ("GET", r"/tasks", list_tasks),
+    ("POST", r"/tasks", create_task),
+    ("GET", r"/tasks/search", search_tasks),
+    ("GET", r"/tasks/agenda", task_agenda),
+    ("POST", r"/tasks/(\d+)/done", finish_task),
+    ("DELETE", r"/tasks/(\d+)", remove_task),
+    ("GET", r"/notes", list_notes),
+    ("POST", r"/notes", create_note),
+    ("GET", r"/notes/search", search_notes),
+    ("GET", r"/notes/(\d+)", show_note),
+    ("GET", r"/cycle", list_cycle_logs),
+    ("POST", r"/cycle", create_cycle_log),
+    ("GET", r"/cycle/predict", predict),
+    ("GET", r"/cycle/stats", stats),
+    ("GET", r"/cycle/analytics", analytics),
+    ("GET", r"/plan", plan),
+    ("GET", r"/chat", chat),
+]
+_ROUTES = [(m, re.compile(r"^/users/([^/]+)" + p + "$"), h) for m, p, h in ROUTES]
+
+
+class SeleneApp:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def dispatch(self, method, target, raw_body):
+        try:
+            url = urlsplit(target)
+            allowed = False
+            for route_method, pattern, handler in _ROUTES:
+                m = pattern.match(url.path)
+                if not m:
+                    continue
+                allowed = True
+                if route_method == method:
+                    break
+            else:
+                raise HttpError(405 if allowed else 404, "No such endpoint.")
+            user, *groups = m.groups()
+            if not USER_RE.match(user):
+                raise HttpError(400, "Bad user name.")
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            body = json.loads(raw_body) if raw_body else {}
+            if not isinstance(body, dict):
+                raise HttpError(400, "Body must be a JSON object.")
+            while True:
+                store = await self.pool.get(user)
+                # reads too: a flush in another thread may be compacting this store
+                async with self.pool.lock(user):
+                    if self.pool.is_open(user, store):  # not evicted while we waited
+                        return await asyncio.to_thread(handler, store, query, body, *groups)
+        except HttpError as e:
+            return e.status, {"error": str(e)}
+        except (ValueError, KeyError) as e:  # includes bad JSON and selene's validation errors
+            return 400, {"error": str(e)}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except Exception as e:  # keep serving other requests
+                    status, payload = 500, {"error": repr(e)}
+                out = json.dumps(payload, default=json_default).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(out)}\r\n\r\n".encode("latin-1")
+                    + out
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run(root, host="127.0.0.1", port=8765, max_open=256, flush_interval=0.5):
+    pool = StorePool(root, max_open, flush_interval)
+    app = SeleneApp(pool)
+    server = await asyncio.start_server(app.handle, host, port)
+    flusher = asyncio.create_task(pool.flush_forever())
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+    print(f"🌙 Selene HTTP on http://{host}:{port} (stores under {root}, {max_open} kept hot)")
+    try:
+        async with server:
+            await stop.wait()  # stop cleanly so buffered writes get flushed
+    finally:
+        flusher.cancel()
+        await pool.close_all()
+
+
+def serve_http(args):
+    asyncio.run(run(args.root, args.host, args.port, args.max_open, args.flush_interval))
@@ -0,0 +1,120 @@
+# tasks2/selene_import.py — `selene.py import`: bulk-load tasks, notes or cycle logs
+# Reads JSONL (one object per line) or CSV (a header row naming the fields)
+# from a file or stdin, one batch at a time, so memory holds a batch or two
+# whatever the input size. Each batch is validated with the same rules as
+# task-add/note-add/cycle-log, gets its ids as one block and is committed
+# with one store.commit_many(): a single journal append (JSON) or a single
+# transaction (SQLite) per batch instead of a full write per record.
+#
+#   python selene.py import cycle history.csv
+#   zcat notes.jsonl.gz | python selene.py import note -
+#
+# Fields (list fields are JSON arrays, or text separated by ";" or ","):
+#   task   title, due, tags, energy, status (open|done)
+#   note   title, body, tags
+#   cycle  date, phase, symptoms, mood, note
+
+import csv
+import json
+import re
+from itertools import islice
+
+import selene
+
+BATCH = 5000
+MAX_ERRORS = 20  # invalid records reported individually; the rest are only counted
+KINDS = {"task": "tasks", "note": "notes", "cycle": "cycle_logs"}
+LIST_SEP = re.compile(r"[;,]")
+
+
+def read_rows(stream, fmt="jsonl"):
+    """Yield (line number, row dict) from a text stream. Undecodable lines yield a ValueError as the row."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for n, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            row = ValueError(f"Not valid JSON ({e.msg}).")
+        yield n, row
+
+
+def _text(row, field, strip=True):
+    """The field as a string. Free text (strip=False) is kept as written unless it is blank."""
+    value = row.get(field)
+    if value is None:
+        return ""
+    value = str(value)
+    return value.strip() if strip or not value.strip() else value
+
+
+def _list(value):
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in LIST_SEP.split(str(value)) if v.strip()]
+
+
+def to_op(kind, row, record_id, now):
+    """The journal op adding `row` as a `kind` record; ValueError if the row is invalid."""
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError("Each record must be an object.")
+    if kind == "task":
+        record = selene.task_record(
+            record_id, _text(row, "title", strip=False), _text(row, "due") or None, _list(row.get("tags")),
+            _text(row, "energy") or None, _text(row, "status") or "open", now,
+        )
+        return {"op": "task_add", "record": record}
+    if kind == "note":
+        record = selene.note_record(
+            record_id, _text(row, "title", strip=False), _text(row, "body", strip=False), _list(row.get("tags")), now,
+        )
+        return {"op": "note_add", "record": record}
+    entry = selene.cycle_entry(
+        _text(row, "date"), _text(row, "phase"), _list(row.get("symptoms")),
+        _text(row, "mood", strip=False), _text(row, "note", strip=False), now,
+    )
+    return {"op": "cycle_log", "entry": entry}
+
+
+def import_rows(store, rows, kind, batch_size=BATCH, strict=False):
+    """Add every valid row of `rows` ((line, row) pairs) to `store` as `kind` records.
+
+    Invalid rows are skipped and reported, or with `strict` stop the import
+    before the batch holding them is committed (earlier batches stay).
+    Returns {"imported", "skipped", "batches", "errors": [(line, message)]}.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Kind must be one of: {', '.join(KINDS)}.")
+    result = {"imported": 0, "skipped": 0, "batches": 0, "errors": []}
+    rows = iter(rows)
+    batch = list(islice(rows, batch_size))
+    while batch:
+        upcoming = list(islice(rows, batch_size))
+        now = selene._now()
+        first_id = store.next_id(KINDS[kind]) if kind != "cycle" else None
+        ops = []
+        for line, row in batch:
+            try:
+                ops.append(to_op(kind, row, first_id + len(ops) if first_id else None, now))
+            except ValueError as e:
+                if strict:
+                    raise ValueError(f"line {line}: {e} (nothing from this batch was imported)") from None
+                result["skipped"] += 1
+                if len(result["errors"]) < MAX_ERRORS:
+                    result["errors"].append((line, str(e)))
+        if ops:
+            # the journal is folded into the snapshot at most once, after the last batch
+            store.commit_many(ops, compact=not upcoming)
+            result["imported"] += len(ops)
+            result["batches"] += 1
+        batch = upcoming
+    return result
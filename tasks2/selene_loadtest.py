@@ -0,0 +1,134 @@
+# tasks2/selene_loadtest.py — drive `selene.py serve-http` with a local client
+# Opens N keep-alive connections, each acting as one of U users, and fires a
+# read-heavy mix of requests for a fixed time. Prints throughput and latency.
+#
+#   python selene_loadtest.py --spawn                 # start a throwaway server
+#   python selene_loadtest.py --port 8765 -c 64 -u 500 -d 10
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# (weight, method, path, body factory)
+MIX = [
+    (30, "GET", "/tasks", None),
+    (15, "GET", "/notes?limit=20", None),
+    (10, "GET", "/plan", None),
+    (10, "GET", "/cycle/predict", None),
+    (5, "GET", "/chat?q=tired+cramps", None),
+    (15, "POST", "/tasks", lambda i: {"title": f"load task {i}", "energy": "low", "tags": ["load"]}),
+    (10, "POST", "/notes", lambda i: {"title": f"load note {i}", "body": "felt tired, cramps at noon"}),
+    (5, "POST", "/cycle", lambda i: {"date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", "phase": "note"}),
+]
+
+
+async def _request(reader, writer, method, path, body):
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: selene\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def _worker(host, port, users, deadline, latencies, errors, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    weights = [w for w, *_ in MIX]
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            _, method, path, body = rng.choices(MIX, weights)[0]
+            user = f"user{rng.randrange(users)}"
+            i += 1
+            t0 = time.perf_counter()
+            status = await _request(reader, writer, method, f"/users/{user}{path}", body and body(i))
+            latencies.append(time.perf_counter() - t0)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+def _percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+async def load(host, port, connections, users, duration, seed=0):
+    deadline = time.perf_counter() + duration
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _worker(host, port, users, deadline, latencies, errors, random.Random(seed + n))
+        for n in range(connections)
+    ))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+    }
+
+
+async def _wait_for(host, port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Load-test the Selene HTTP API")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("-c", "--connections", type=int, default=32)
+    p.add_argument("-u", "--users", type=int, default=100)
+    p.add_argument("-d", "--duration", type=float, default=5.0, help="Seconds")
+    p.add_argument("--spawn", action="store_true", help="Start a server on a temp directory for the run")
+    args = p.parse_args()
+
+    server = None
+    if args.spawn:
+        root = tempfile.mkdtemp(prefix="selene_load_")
+        selene_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selene.py")
+        server = subprocess.Popen(
+            [sys.executable, selene_py, "serve-http", "--root", root, "--port", str(args.port)],
+            stdout=subprocess.DEVNULL,
+        )
+    try:
+        asyncio.run(_wait_for(args.host, args.port))
+        r = asyncio.run(load(args.host, args.port, args.connections, args.users, args.duration))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+    print(f"{r['requests']} requests, {r['errors']} errors, {r['rps']:.0f} req/s")
+    print(f"latency p50 {r['p50_ms']:.2f} ms | p95 {r['p95_ms']:.2f} ms | p99 {r['p99_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
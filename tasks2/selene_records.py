@@ -0,0 +1,317 @@
+# tasks2/selene_records.py — compact in-memory records for tasks, notes and cycle entries
+# The JSON schema stays the format on disk and on the wire (snapshot, journal,
+# exports, HTTP). In memory each record is a __slots__ object instead of a dict:
+#
+#   - no per-record hash table of keys
+#   - tags, energy, status, phase, symptoms and mood are interned, so every
+#     "health" tag in the store is the same string object
+#   - timestamps and dates are packed into ints that keep their order:
+#       "2025-11-03T10:15:00" -> 20251103101500    "2025-11-03" -> 20251103
+#     smaller than the strings, timezone-free like them, and sorts and range
+#     scans compare ints
+#
+# Records are Mappings, so r["title"], r.get("due") and "body" in r work as
+# they did on the dicts and give the JSON values (dates as ISO strings). Hot
+# paths read the attributes instead. Conversion is lossless: whatever does not
+# pack exactly (free text in a due date, keys added by hand, a missing field)
+# is kept verbatim in r.extra and comes back out of to_dict() unchanged.
+
+import sys
+from collections.abc import Mapping
+from datetime import datetime
+from operator import attrgetter, itemgetter
+
+# A field missing from the source dict: the slot value of an absent optional
+# field, and the `extra` entry of an absent required one. (marshal can store it.)
+ABSENT = ...
+
+
+def pack_day(d):
+    """A date as a YYYYMMDD int."""
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+def day_text(v):
+    t = f"{v:08d}"
+    return f"{t[:4]}-{t[4:6]}-{t[6:]}"
+
+
+_last_text = (None, None)  # created and updated are usually the same stamp
+
+
+def stamp_text(v):
+    global _last_text
+    if v == _last_text[0]:
+        return _last_text[1]
+    t = f"{v:014d}"
+    _last_text = (v, f"{t[:4]}-{t[4:6]}-{t[6:8]}T{t[8:10]}:{t[10:12]}:{t[12:]}")
+    return _last_text[1]
+
+
+def _packed_day(v):
+    """`v` as a YYYYMMDD int if it is exactly an ISO date, else None."""
+    if type(v) is str and len(v) == 10 and v[4] == v[7] == "-":
+        digits = v[:4] + v[5:7] + v[8:]
+        if digits.isdigit() and digits.isascii():  # then day_text() gives back exactly `v`
+            return int(digits)
+    return None
+
+
+_last_stamp = (None, None)  # created/updated, and a whole import batch, share one int
+
+
+def _packed_stamp(v):
+    """`v` as a YYYYMMDDHHMMSS int if it is exactly an ISO timestamp to the second, else None."""
+    global _last_stamp
+    if v == _last_stamp[0]:
+        return _last_stamp[1]
+    if type(v) is str and len(v) == 19 and v[4] == v[7] == "-" and v[10] == "T" and v[13] == v[16] == ":":
+        digits = v.replace("-", "").replace("T", "").replace(":", "")
+        if digits.isdigit() and digits.isascii():
+            _last_stamp = (v, int(digits))
+            return _last_stamp[1]
+    return None
+
+
+# --- field codecs: JSON value -> (stored value, whether the JSON value must also be kept verbatim) ---
+def _plain(v):
+    return v, False
+
+
+def _sym(v):
+    return (sys.intern(v), False) if type(v) is str else (v, False)
+
+
+def _syms(v):
+    if type(v) is list:
+        try:
+            return [sys.intern(s) for s in v], False
+        except TypeError:  # not all strings
+            pass
+    return v, False
+
+
+def _day(v):
+    packed = _packed_day(v)
+    if packed is not None or v is None:
+        return packed, False
+    try:  # a datetime or free text: sort by the day it names, if any
+        return pack_day(datetime.fromisoformat(v)), True
+    except (TypeError, ValueError):
+        return None, True
+
+
+def _stamp(v):
+    packed = _packed_stamp(v)
+    if packed is not None or v is None:
+        return packed, False
+    try:
+        return int(datetime.fromisoformat(v).strftime("%Y%m%d%H%M%S")), True
+    except (TypeError, ValueError):
+        return 0, True
+
+
+_DECODERS = {_day: day_text, _stamp: stamp_text}
+
+
+class Record(Mapping):
+    """Base for the record types. FIELDS lists (name, codec) in JSON key order."""
+
+    __slots__ = ("extra",)
+    FIELDS = ()
+    OPTIONAL = frozenset()  # fields often left out (a note's body/body_ref): ABSENT in the slot then
+
+    def __init_subclass__(cls):
+        cls._KEYS = tuple(name for name, _ in cls.FIELDS)
+        cls._NAMES = frozenset(cls._KEYS)
+        cls._REQUIRED = cls._NAMES - cls.OPTIONAL
+        cls._DECODE = {name: _DECODERS.get(codec) for name, codec in cls.FIELDS}
+        at = {codec: tuple(i for i, (_, c) in enumerate(cls.FIELDS) if c is codec) for codec in (_sym, _syms)}
+        cls._SYM_AT, cls._SYMS_AT = at[_sym], at[_syms]
+        cls._PACK_AT = tuple((i, {_day: _packed_day, _stamp: _packed_stamp}[codec])
+                             for i, (_, codec) in enumerate(cls.FIELDS) if codec in _DECODERS)
+        cls._DATES = tuple((name, _DECODERS[codec]) for name, codec in cls.FIELDS if codec in _DECODERS)
+        cls._GET = attrgetter(*cls._KEYS)
+        cls._ROW = attrgetter(*cls.__slots__, "extra")
+        cls._ITEMS = itemgetter(*cls._KEYS)
+
+    @classmethod
+    def from_dict(cls, d):
+        # fast path: the schema's keys and nothing else, every value packing exactly
+        keys = d.keys()
+        if keys == cls._NAMES:
+            values = list(cls._ITEMS(d))
+        elif cls.OPTIONAL and cls._REQUIRED <= keys <= cls._NAMES:
+            values = [d.get(k, ABSENT) for k in cls._KEYS]
+        else:
+            values = None
+        if values is not None:
+            for i in cls._SYM_AT:
+                if type(values[i]) is str:
+                    values[i] = sys.intern(values[i])
+            for i in cls._SYMS_AT:
+                values[i] = _syms(values[i])[0]
+            for i, pack in cls._PACK_AT:
+                if values[i] is not None:
+                    values[i] = pack(values[i])
+                    if values[i] is None:
+                        break  # not in the canonical form: keep the text (below)
+            else:
+                return cls(*values)
+        values, extra, seen = [], None, 0
+        for name, codec in cls.FIELDS:
+            if name in d:
+                seen += 1
+                value, verbatim = codec(d[name])
+                if verbatim:
+                    extra = extra or {}
+                    extra[name] = d[name]
+            elif name in cls.OPTIONAL:
+                value = ABSENT
+            else:
+                value = None
+                extra = extra or {}
+                extra[name] = ABSENT
+            values.append(value)
+        if seen < len(d):
+            extra = extra or {}
+            extra.update((k, v) for k, v in d.items() if k not in cls._NAMES)
+        return cls(*values, extra)
+
+    @classmethod
+    def from_row(cls, row):
+        """From a tuple made by row() (the snapshot cache)."""
+        return cls(*row)
+
+    def row(self):
+        return self._ROW(self)
+
+    def to_dict(self):
+        """The record in the JSON schema, exactly as it was read."""
+        if self.extra is None:
+            d = dict(zip(self._KEYS, self._GET(self)))
+            for name, decode in self._DATES:
+                if d[name] is not None:
+                    d[name] = decode(d[name])
+            for name in self.OPTIONAL:
+                if d[name] is ABSENT:
+                    del d[name]
+            return d
+        d, extra = {}, self.extra
+        for name, decode in self._DECODE.items():
+            if extra and name in extra:
+                if extra[name] is not ABSENT:
+                    d[name] = extra[name]
+                continue
+            v = getattr(self, name)
+            if v is not ABSENT:
+                d[name] = decode(v) if decode and v is not None else v
+        if extra:
+            d.update((k, v) for k, v in extra.items() if k not in self._NAMES)
+        return d
+
+    def replace(self, **changes):
+        """A copy with some JSON fields changed; a value of ABSENT drops the field."""
+        d = self.to_dict()
+        for k, v in changes.items():
+            if v is ABSENT:
+                d.pop(k, None)
+            else:
+                d[k] = v
+        return type(self).from_dict(d)
+
+    # --- Mapping interface, in JSON terms ---
+    def __getitem__(self, key):
+        extra = self.extra
+        if extra and key in extra:
+            v = extra[key]
+            if v is ABSENT:
+                raise KeyError(key)
+            return v
+        if key not in self._NAMES:
+            raise KeyError(key)
+        v = getattr(self, key)
+        if v is None:
+            return None
+        if v is ABSENT:
+            raise KeyError(key)
+        decode = self._DECODE[key]
+        return decode(v) if decode else v
+
+    def __setitem__(self, key, value):
+        extra = self.extra
+        if key not in self._NAMES:
+            self.extra = {**(extra or {}), key: value}
+            return
+        codec = dict(self.FIELDS)[key]
+        stored, verbatim = codec(value)
+        setattr(self, key, stored)
+        if verbatim or (extra and key in extra):
+            extra = dict(extra or {})
+            if verbatim:
+                extra[key] = value
+            else:
+                del extra[key]
+            self.extra = extra or None
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self):
+        return len(self.to_dict())
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        elif not isinstance(other, Mapping):
+            return NotImplemented
+        return self.to_dict() == dict(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Task(Record):
+    __slots__ = ("id", "title", "due", "tags", "energy", "status", "created", "updated")
+    FIELDS = (("id", _plain), ("title", _plain), ("due", _day), ("tags", _syms), ("energy", _sym),
+              ("status", _sym), ("created", _stamp), ("updated", _stamp))
+
+    def __init__(self, id, title, due, tags, energy, status, created, updated, extra=None):
+        self.id, self.title, self.due, self.tags = id, title, due, tags
+        self.energy, self.status, self.created, self.updated = energy, status, created, updated
+        self.extra = extra
+
+
+class Note(Record):
+    __slots__ = ("id", "title", "body", "body_ref", "tags", "created", "updated")
+    FIELDS = (("id", _plain), ("title", _plain), ("body", _plain), ("body_ref", _plain), ("tags", _syms),
+              ("created", _stamp), ("updated", _stamp))
+    OPTIONAL = frozenset({"body", "body_ref"})
+
+    def __init__(self, id, title, body, body_ref, tags, created, updated, extra=None):
+        self.id, self.title, self.body, self.body_ref = id, title, body, body_ref
+        self.tags, self.created, self.updated = tags, created, updated
+        self.extra = extra
+
+
+class CycleEntry(Record):
+    __slots__ = ("date", "phase", "symptoms", "mood", "note", "created")
+    FIELDS = (("date", _day), ("phase", _sym), ("symptoms", _syms), ("mood", _sym), ("note", _plain),
+              ("created", _stamp))
+
+    def __init__(self, date, phase, symptoms, mood, note, created, extra=None):
+        self.date, self.phase, self.symptoms = date, phase, symptoms
+        self.mood, self.note, self.created = mood, note, created
+        self.extra = extra
+
+
+RECORD_TYPES = {"tasks": Task, "notes": Note, "cycle_logs": CycleEntry}
+
+
+def json_default(o):
+    """`default=` hook for json encoders: records encode as their JSON dicts."""
+    if isinstance(o, Record):
+        return o.to_dict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
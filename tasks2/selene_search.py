@@ -0,0 +1,303 @@
+# tasks2/selene_search.py — persistent inverted index with BM25 ranking
+# Indexes task titles and note titles/bodies. Postings live in SQLite so
+# adding a document touches only its own terms, and a query reads only the
+# posting lists of its terms.
+#
+# Two trigram tables sit next to the postings:
+#   search_grams     trigrams of every indexed word, for typo-tolerant terms
+#                    ("cramsp" finds "cramps" by trigram similarity)
+#   search_trigrams  trigrams of each document's text, so a literal substring
+#                    query only checks the documents holding all its trigrams
+#
+# The vector_* tables belong to selene_vectors (the NumPy embedding index
+# behind `chat`). This module only queues changed documents in vector_dirty,
+# so writes never need NumPy; the embeddings catch up on the next query.
+
+import heapq
+import math
+import re
+import sqlite3
+from collections import Counter, defaultdict
+
+TOKEN_RE = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a about an and are as at be but by did do does for from had has have how i in is it "
+    "me my of on or so that the this to was what when where which who why with you".split()
+)
+TITLE_WEIGHT = 2  # a title hit counts like this many body hits
+K1 = 1.2
+B = 0.75
+INDEX_VERSION = 3  # bump when the tables change, so old indexes get rebuilt
+FUZZY_MIN_SIMILARITY = 0.3  # trigram Jaccard similarity for a word to count as a typo match
+FUZZY_MAX_TERMS = 20  # expansions per query word, most similar first
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_postings (
+    term TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    doc_len INTEGER NOT NULL,
+    PRIMARY KEY (term, kind, doc_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS search_docs (
+    kind TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    doc_len INTEGER NOT NULL,
+    terms TEXT NOT NULL,
+    PRIMARY KEY (kind, doc_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS search_stats (
+    kind TEXT PRIMARY KEY,
+    n_docs INTEGER NOT NULL,
+    total_len INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS search_grams (
+    gram TEXT NOT NULL,
+    term TEXT NOT NULL,
+    PRIMARY KEY (gram, term)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS search_trigrams (
+    gram TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (gram, kind, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_search_trigrams_doc ON search_trigrams(kind, doc_id);
+CREATE TABLE IF NOT EXISTS vector_dirty (
+    kind TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (kind, doc_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS vector_docs (
+    kind TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    features TEXT NOT NULL,
+    vec BLOB NOT NULL,
+    PRIMARY KEY (kind, doc_id)
+);
+CREATE TABLE IF NOT EXISTS vector_df (
+    feature TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _doc_terms(kind, record):
+    tf = Counter()
+    for term in tokenize(record["title"]):
+        tf[term] += TITLE_WEIGHT
+    if kind == "note":
+        tf.update(tokenize(record.get("body", "") or ""))
+    return tf
+
+
+def doc_text(kind, record):
+    """The lowercased text substring queries run against."""
+    if kind == "note":
+        return f"{record['title']}\n{record.get('body', '') or ''}".lower()
+    return record["title"].lower()
+
+
+def word_grams(term):
+    """Trigrams of a word padded like pg_trgm, so short words and word starts count."""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def text_grams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def signature(tasks_count, notes_count, last_task_id, last_note_id):
+    """Cheap fingerprint of the store's doc set; a mismatch means the index is stale."""
+    return f"v{INDEX_VERSION}:tasks={tasks_count}:{last_task_id},notes={notes_count}:{last_note_id}"
+
+
+def open_index(path):
+    """SearchIndex in its own SQLite file (used by the JSON store).
+
+    The connection may be used from worker threads (selene_http flushes off
+    the event loop); callers serialize access per store.
+    """
+    return SearchIndex(sqlite3.connect(path, check_same_thread=False))
+
+
+class SearchIndex:
+    """Inverted index stored in the search_* tables of a SQLite connection.
+
+    Methods do not commit; the caller owns the transaction, so the SQLite
+    backend can update the index atomically with the record itself.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.conn.executescript(SCHEMA)
+
+    def signature(self):
+        row = self.conn.execute("SELECT value FROM search_meta WHERE key = 'signature'").fetchone()
+        return row[0] if row else None
+
+    def set_signature(self, sig):
+        self.conn.execute("INSERT OR REPLACE INTO search_meta (key, value) VALUES ('signature', ?)", (sig,))
+
+    def apply(self, op):
+        """Keep the index in step with one journal-style mutation."""
+        kind = op["op"]
+        if kind == "task_add":
+            self.add("task", op["record"])
+        elif kind == "note_add":
+            self.add("note", op["record"])
+        elif kind == "task_delete":
+            self.remove("task", op["id"])
+
+    def add(self, kind, record):
+        tf = _doc_terms(kind, record)
+        length = sum(tf.values())
+        # one primary-key probe per term; DISTINCT over an IN list would walk every posting of common words
+        known = {t for t in tf if self.conn.execute(
+            "SELECT 1 FROM search_postings WHERE term = ? LIMIT 1", (t,)).fetchone()}
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO search_postings (term, kind, doc_id, tf, doc_len) VALUES (?, ?, ?, ?, ?)",
+            [(term, kind, record["id"], n, length) for term, n in tf.items()],
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO search_docs (kind, doc_id, doc_len, terms) VALUES (?, ?, ?, ?)",
+            (kind, record["id"], length, " ".join(tf)),
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO search_grams (gram, term) VALUES (?, ?)",
+            [(gram, term) for term in tf if term not in known for gram in word_grams(term)],
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO search_trigrams (gram, kind, doc_id) VALUES (?, ?, ?)",
+            [(gram, kind, record["id"]) for gram in text_grams(doc_text(kind, record))],
+        )
+        self._mark_dirty(kind, record["id"])
+        self._bump_stats(kind, 1, length)
+
+    def remove(self, kind, doc_id):
+        row = self.conn.execute(
+            "SELECT doc_len, terms FROM search_docs WHERE kind = ? AND doc_id = ?", (kind, doc_id)
+        ).fetchone()
+        if row is None:
+            return
+        length, terms = row[0], row[1].split()
+        self.conn.executemany(
+            "DELETE FROM search_postings WHERE term = ? AND kind = ? AND doc_id = ?",
+            [(term, kind, doc_id) for term in terms],
+        )
+        self.conn.execute("DELETE FROM search_docs WHERE kind = ? AND doc_id = ?", (kind, doc_id))
+        self.conn.execute("DELETE FROM search_trigrams WHERE kind = ? AND doc_id = ?", (kind, doc_id))
+        # words no document uses any more leave the fuzzy vocabulary
+        gone = [t for t in terms if not self.conn.execute(
+            "SELECT 1 FROM search_postings WHERE term = ? LIMIT 1", (t,)).fetchone()]
+        self.conn.executemany(
+            "DELETE FROM search_grams WHERE gram = ? AND term = ?",
+            [(gram, t) for t in gone for gram in word_grams(t)],
+        )
+        self._mark_dirty(kind, doc_id)
+        self._bump_stats(kind, -1, -length)
+
+    def rebuild(self, tasks, notes):
+        for table in ("search_postings", "search_docs", "search_stats", "search_grams", "search_trigrams",
+                      "vector_dirty", "vector_docs", "vector_df"):
+            self.conn.execute(f"DELETE FROM {table}")
+        for t in tasks:
+            self.add("task", t)
+        for n in notes:
+            self.add("note", n)
+
+    def search(self, query, kind, limit=None, fuzzy=True):
+        """Return [(doc_id, score)] best first.
+
+        Query terms also match as word prefixes and, with `fuzzy`, as similar
+        words (typos), whose hits count in proportion to their similarity.
+        """
+        terms = set(tokenize(query))
+        row = self.conn.execute(
+            "SELECT n_docs, total_len FROM search_stats WHERE kind = ?", (kind,)
+        ).fetchone()
+        if not terms or not row or not row[0]:
+            return []
+        n_docs, total_len = row
+        avgdl = total_len / n_docs or 1
+        scores = defaultdict(float)
+        for term in terms:
+            # prefix range scan on the (term, ...) primary key: "cramp" also hits "cramps"
+            hits = {}
+            for doc_id, tf, doc_len in self.conn.execute(
+                "SELECT doc_id, tf, doc_len FROM search_postings "
+                "WHERE term >= ? AND term < ? AND kind = ?",
+                (term, term + "\uffff", kind),
+            ):
+                prev = hits.get(doc_id)
+                hits[doc_id] = (tf + (prev[0] if prev else 0), doc_len)
+            if fuzzy:
+                for similar, sim in self.similar_terms(term):
+                    for doc_id, tf, doc_len in self.conn.execute(
+                        "SELECT doc_id, tf, doc_len FROM search_postings WHERE term = ? AND kind = ?",
+                        (similar, kind),
+                    ):
+                        prev = hits.get(doc_id)
+                        hits[doc_id] = (tf * sim + (prev[0] if prev else 0), doc_len)
+            if not hits:
+                continue
+            idf = math.log(1 + (n_docs - len(hits) + 0.5) / (len(hits) + 0.5))
+            for doc_id, (tf, doc_len) in hits.items():
+                scores[doc_id] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc_len / avgdl))
+        return heapq.nlargest(limit or len(scores), scores.items(), key=lambda kv: (kv[1], -kv[0]))
+
+    def similar_terms(self, term):
+        """[(word, similarity)] of indexed words close to `term`, best first, not counting its prefix matches."""
+        grams = word_grams(term)
+        rows = self.conn.execute(
+            f"SELECT term, COUNT(*) FROM search_grams WHERE gram IN ({', '.join('?' * len(grams))}) GROUP BY term",
+            list(grams),
+        )
+        found = []
+        for other, shared in rows:
+            if other.startswith(term):
+                continue  # already hit by the prefix scan
+            sim = shared / (len(grams) + len(word_grams(other)) - shared)
+            if sim >= FUZZY_MIN_SIMILARITY:
+                found.append((other, sim))
+        return heapq.nlargest(FUZZY_MAX_TERMS, found, key=lambda ts: (ts[1], ts[0]))
+
+    def substring_candidates(self, needle, kind):
+        """Ids of documents holding every trigram of `needle` (a superset of the real matches).
+
+        None when the needle is shorter than a trigram and can't be pruned.
+        """
+        grams = text_grams(needle.lower())
+        if not grams:
+            return None
+        postings = []
+        for gram in grams:
+            found = {doc_id for (doc_id,) in self.conn.execute(
+                "SELECT doc_id FROM search_trigrams WHERE gram = ? AND kind = ?", (gram, kind))}
+            if not found:
+                return set()
+            postings.append(found)
+        postings.sort(key=len)  # smallest first, so the intersection shrinks fast
+        ids = postings[0].intersection(*postings[1:])
+        return ids
+
+    def _mark_dirty(self, kind, doc_id):
+        self.conn.execute("INSERT OR IGNORE INTO vector_dirty (kind, doc_id) VALUES (?, ?)", (kind, doc_id))
+
+    def _bump_stats(self, kind, docs, length):
+        self.conn.execute(
+            "INSERT INTO search_stats (kind, n_docs, total_len) VALUES (?, ?, ?) "
+            "ON CONFLICT(kind) DO UPDATE SET n_docs = n_docs + excluded.n_docs, "
+            "total_len = total_len + excluded.total_len",
+            (kind, docs, length),
+        )
@@ -0,0 +1,94 @@
+# tasks2/selene_serve.py — `selene.py serve`: a long-running Selene daemon
+# Loads the store once and runs the normal subcommands against it, so a call
+# costs one socket round trip instead of interpreter startup + full JSON load.
+# Protocol: one JSON line in ({"argv": [...]}), one JSON line out ({"code", "out"}).
+# A forwarded --backend must name the backend being served; --profile and
+# SELENE_TRACE (set for the daemon) trace requests as they would a process.
+
+import contextlib
+import io
+import json
+import os
+import signal
+import socketserver
+import sys
+import time
+
+import selene
+
+# commands that make no sense inside the daemon
+LOCAL_ONLY = {"serve", "serve-http", "migrate"}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        code, out = self.server.run(json.loads(line)["argv"])
+        self.wfile.write(json.dumps({"code": code, "out": out}).encode("utf-8") + b"\n")
+
+
+class SeleneServer(socketserver.UnixStreamServer):
+    """Single-threaded: requests run one at a time, so the store needs no locks."""
+
+    def __init__(self, path, store, backend):
+        super().__init__(path, _Handler)
+        self.store = store
+        self.backend = backend
+        self.parser = selene.build_parser()  # built once, reused for every request
+
+    def run(self, argv):
+        started = time.perf_counter()
+        buf = io.StringIO()
+        code = 0
+        with contextlib.redirect_stdout(buf), contextlib.redirect_stderr(buf):
+            try:
+                args = self.parser.parse_args(argv)
+                if not args.cmd:
+                    self.parser.print_help()
+                elif args.cmd in LOCAL_ONLY:
+                    print(f"❌ '{args.cmd}' cannot run through the daemon.")
+                    code = 2
+                elif args.backend not in (None, self.backend):
+                    print(f"❌ This daemon serves the {self.backend} store; "
+                          f"start another with --backend {args.backend}.")
+                    code = 2
+                else:
+                    with selene.tracing(args.cmd, argv, self.backend, started,
+                                        args.profile, args.profile_capture, args.profile_file):
+                        args.func(args)
+            except SystemExit as e:  # argparse errors and --help
+                code = e.code or 0
+            except ValueError as e:
+                print(f"❌ {e}")
+        return code, buf.getvalue()
+
+    def service_actions(self):
+        # called by serve_forever() between requests: enforce the durability window
+        if self.store.pending_age() >= (self.store.flush_interval or 0):
+            self.store.flush()
+
+
+def serve_forever(path, flush_interval, backend):
+    # `backend` comes from the caller: when selene.py runs as a script, the
+    # `selene` imported here is a second copy that never saw --backend
+    selene.BACKEND = backend
+    store = selene.open_store(backend)
+    if isinstance(store, selene.JsonStore) and flush_interval > 0:
+        store.flush_interval = flush_interval
+    selene._SERVED_STORE = store
+    if os.path.exists(path):
+        os.remove(path)  # stale socket from a previous run
+    server = SeleneServer(path, store, backend)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"🌙 Serving {backend} store on {path} (flush every {flush_interval}s)")
+    try:
+        server.serve_forever(poll_interval=min(max(flush_interval, 0.01), 0.5))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+        server.server_close()
+        os.remove(path)
+        selene._SERVED_STORE = None
@@ -0,0 +1,535 @@
+# tasks2/selene_sqlite.py — SQLite backend for Selene
+# Shares selene.db (and its cycle_log table) with the root selene.py logger.
+
+import json
+import sqlite3
+from bisect import bisect_right
+from datetime import date, timedelta
+
+from selene_cycles import compute_stats, fold_entry, start_ordinal
+from selene_records import CycleEntry, Note, Task
+from selene_search import INDEX_VERSION, SearchIndex, doc_text
+from selene_tags import parse as parse_tags, to_sql as tags_to_sql
+from selene_trace import count, phase, traced
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    due TEXT,
+    tags TEXT NOT NULL DEFAULT '[]',
+    energy TEXT,
+    status TEXT NOT NULL DEFAULT 'open',
+    created TEXT,
+    updated TEXT
+);
+CREATE TABLE IF NOT EXISTS task_tags (
+    tag TEXT NOT NULL,
+    task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, task_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT '[]',
+    created TEXT,
+    updated TEXT
+);
+CREATE TABLE IF NOT EXISTS note_tags (
+    tag TEXT NOT NULL,
+    note_id INTEGER NOT NULL REFERENCES notes(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, note_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cycle_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    log_date TEXT,
+    phase TEXT,
+    symptoms TEXT,
+    mood TEXT
+);
+CREATE TABLE IF NOT EXISTS config (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS counters (
+    kind TEXT PRIMARY KEY,
+    next_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aggregates (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    seen_id INTEGER NOT NULL  -- MAX(cycle_log.id) folded in
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, due);
+CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks(due);
+CREATE INDEX IF NOT EXISTS idx_tasks_updated ON tasks(updated);
+CREATE INDEX IF NOT EXISTS idx_task_tags_task ON task_tags(task_id);
+CREATE INDEX IF NOT EXISTS idx_notes_updated ON notes(updated);
+CREATE INDEX IF NOT EXISTS idx_note_tags_note ON note_tags(note_id);
+CREATE INDEX IF NOT EXISTS idx_cycle_log_date ON cycle_log(log_date);
+CREATE INDEX IF NOT EXISTS idx_cycle_log_phase ON cycle_log(phase, log_date);
+"""
+
+# columns Selene adds on top of the root selene.py cycle_log table
+CYCLE_EXTRA_COLUMNS = {"note": "TEXT DEFAULT ''", "created": "TEXT"}
+
+TASK_COLUMNS = "id, title, due, tags, energy, status, created, updated"
+NOTE_COLUMNS = "id, title, body, tags, created, updated"
+NOTE_LIST_COLUMNS = "n.id, n.title, n.tags, n.created, n.updated"  # listings skip the body
+CYCLE_COLUMNS = "log_date, phase, symptoms, mood, note, created"
+ISO_DATE = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+
+
+def _task(row):
+    return {
+        "id": row[0],
+        "title": row[1],
+        "due": row[2],
+        "tags": json.loads(row[3]),
+        "energy": row[4],
+        "status": row[5],
+        "created": row[6],
+        "updated": row[7],
+    }
+
+
+def _note(row):
+    return {
+        "id": row[0],
+        "title": row[1],
+        "body": row[2],
+        "tags": json.loads(row[3]),
+        "created": row[4],
+        "updated": row[5],
+    }
+
+
+def _note_summary(row):
+    return {
+        "id": row[0],
+        "title": row[1],
+        "tags": json.loads(row[2]),
+        "created": row[3],
+        "updated": row[4],
+    }
+
+
+def _cycle_entry(row):
+    # symptoms are comma-separated text, the same format the root logger writes
+    return {
+        "date": row[0],
+        "phase": row[1],
+        "symptoms": [s.strip() for s in (row[2] or "").split(",") if s.strip()],
+        "mood": row[3] or "",
+        "note": row[4] or "",
+        "created": row[5],
+    }
+
+
+class SqliteStore:
+    """Indexed SQLite store. Filters run as index lookups instead of list scans."""
+
+    @traced("load")
+    def __init__(self, path):
+        # other writers hold the lock for one short transaction; wait for them rather than fail
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        # one write transaction, so processes opening a new database together don't both migrate it
+        self.conn.executescript("BEGIN IMMEDIATE;" + SCHEMA)
+        have = {r[1] for r in self.conn.execute("PRAGMA table_info(cycle_log)")}
+        for col, decl in CYCLE_EXTRA_COLUMNS.items():
+            if col not in have:
+                self.conn.execute(f"ALTER TABLE cycle_log ADD COLUMN {col} {decl}")
+        self.conn.commit()
+        self._index = None
+        self._vectors = None
+
+    def close(self):
+        self.conn.close()
+
+    def pending_age(self):
+        return 0.0  # every commit is its own transaction
+
+    def flush(self):
+        pass
+
+    # --- reads ---
+    def next_id(self, kind):
+        # a persisted counter, so ids freed by deletes are never reused
+        row = self.conn.execute("SELECT next_id FROM counters WHERE kind = ?", (kind,)).fetchone()
+        if row:
+            return row[0]
+        return self.conn.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {kind}").fetchone()[0]
+
+    def get_task(self, task_id):
+        row = self.conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return Task.from_dict(_task(row)) if row else None
+
+    def get_note(self, note_id):
+        row = self.conn.execute(f"SELECT {NOTE_COLUMNS} FROM notes WHERE id = ?", (note_id,)).fetchone()
+        return Note.from_dict(_note(row)) if row else None
+
+    @traced()
+    def tasks(self, status="all", tags=None):
+        """Tasks by id; `tags` is a tag expression answered from the task_tags index."""
+        where, params = [], []
+        if status != "all":
+            where.append("status = ?")
+            params.append(status)
+        if tags:
+            sql, tag_params = tags_to_sql(parse_tags(tags), "id", "task_tags", "task_id")
+            where.append(sql)
+            params += tag_params
+        rows = self.conn.execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks {'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY id",
+            params,
+        )
+        return [Task.from_dict(_task(r)) for r in rows]
+
+    @traced()
+    def notes(self, tag=None, limit=None, tags=None):
+        """Notes newest-updated first (without bodies); `tag` is one tag, `tags` a tag expression."""
+        if tags and not tag:
+            sql, params = tags_to_sql(parse_tags(tags), "n.id", "note_tags", "note_id")
+            rows = self.conn.execute(
+                f"SELECT {NOTE_LIST_COLUMNS} FROM notes n WHERE {sql} ORDER BY n.updated DESC LIMIT ?",
+                (*params, -1 if limit is None else limit),
+            )
+        elif tag:
+            rows = self.conn.execute(
+                f"SELECT {NOTE_LIST_COLUMNS} FROM note_tags nt JOIN notes n ON n.id = nt.note_id "
+                "WHERE nt.tag = ? ORDER BY n.updated DESC LIMIT ?",
+                (tag, -1 if limit is None else limit),
+            )
+        else:
+            rows = self.conn.execute(
+                f"SELECT {NOTE_LIST_COLUMNS} FROM notes n ORDER BY n.updated DESC LIMIT ?",
+                (-1 if limit is None else limit,),
+            )
+        return [Note.from_dict(_note_summary(r)) for r in rows]
+
+    @traced()
+    def tasks_due(self, first=None, last=None):
+        """Open tasks due from `first` to `last` (dates, inclusive; None = unbounded): a (status, due) index range."""
+        rows = self.conn.execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE status = 'open' AND due >= ? AND due < ? "
+            f"AND due GLOB '{ISO_DATE}*' ORDER BY due, id",
+            (first.isoformat() if first else "0000", (last + timedelta(days=1)).isoformat() if last else "9999-99"),
+        )
+        return [Task.from_dict(_task(r)) for r in rows]
+
+    @traced()
+    def cycle_logs(self, last=None):
+        """Cycle entries in date order; `last` reads only the newest N off the date index."""
+        if last:
+            rows = self.conn.execute(
+                f"SELECT {CYCLE_COLUMNS} FROM cycle_log ORDER BY log_date DESC, id DESC LIMIT ?",
+                (last,),
+            ).fetchall()
+            rows.reverse()
+        else:
+            rows = self.conn.execute(f"SELECT {CYCLE_COLUMNS} FROM cycle_log ORDER BY log_date, id")
+        return [CycleEntry.from_dict(_cycle_entry(r)) for r in rows]
+
+    def recent_starts(self, count):
+        """Dates of the last `count` period starts, oldest first (a (phase, log_date) index range)."""
+        starts = []
+        for (log_date,) in self.conn.execute(
+            "SELECT log_date FROM cycle_log WHERE phase = 'start' ORDER BY log_date DESC LIMIT ?", (count,)
+        ):
+            try:
+                starts.append(date.fromisoformat(log_date))
+            except (TypeError, ValueError):
+                pass  # free-text dates typed into the root logger
+        starts.reverse()
+        return starts
+
+    def cycle_stats(self):
+        """The materialized aggregate block (see selene_cycles).
+
+        Rows the root selene.py logger inserts don't update it; they raise
+        MAX(id) past the id it was built at, which triggers a rebuild.
+        """
+        stats, fresh = self._stored_cycle_stats()
+        if not fresh:
+            with self.conn:
+                self._save_cycle_stats(stats)
+        return stats
+
+    def _stored_cycle_stats(self):
+        # (stats, fresh); a stale block is recomputed but not written back
+        row = self.conn.execute("SELECT value, seen_id FROM aggregates WHERE name = 'cycle'").fetchone()
+        if row and row[1] == self._max_cycle_id():
+            return json.loads(row[0]), True
+        return compute_stats(self.cycle_logs()), False
+
+    def rebuild_cycle_stats(self):
+        stats = compute_stats(self.cycle_logs())
+        with self.conn:
+            self._save_cycle_stats(stats)
+        return stats
+
+    def _max_cycle_id(self):
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM cycle_log").fetchone()[0]
+
+    def _save_cycle_stats(self, stats):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO aggregates (name, value, seen_id) VALUES ('cycle', ?, ?)",
+            (json.dumps(stats), self._max_cycle_id()),
+        )
+
+    def _neighbor_start(self, log_date, op, order):
+        row = self.conn.execute(
+            f"SELECT log_date FROM cycle_log WHERE phase = 'start' AND log_date {op} ? "
+            f"AND log_date GLOB '{ISO_DATE}' ORDER BY log_date {order} LIMIT 1",
+            (log_date,),
+        ).fetchone()
+        return start_ordinal(row[0]) if row else None
+
+    def config(self):
+        cfg = {"avg_cycle_length": 28}
+        for key, value in self.conn.execute("SELECT key, value FROM config"):
+            cfg[key] = json.loads(value)
+        return cfg
+
+    def snapshot(self):
+        return {
+            "tasks": [_task(r) for r in self.conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY id")],
+            "notes": [_note(r) for r in self.conn.execute(f"SELECT {NOTE_COLUMNS} FROM notes ORDER BY id")],
+            "cycle_logs": [_cycle_entry(r) for r in
+                           self.conn.execute(f"SELECT {CYCLE_COLUMNS} FROM cycle_log ORDER BY log_date, id")],
+            "config": self.config(),
+        }
+
+    def stream(self, kind, first=None, last=None):
+        """Yield every record of `kind` ("task", "note" or "cycle") off one cursor, for export.
+
+        Rows are fetched as the caller iterates, so memory holds one row
+        batch at a time. Same order and filters as JsonStore.stream.
+        """
+        if kind == "cycle":
+            table, columns, make, day, order = "cycle_log", CYCLE_COLUMNS, _cycle_entry, "log_date", "log_date, id"
+        elif kind == "task":
+            table, columns, make, day, order = "tasks", TASK_COLUMNS, _task, "updated", "id"
+        else:
+            table, columns, make, day, order = "notes", NOTE_COLUMNS, _note, "updated", "id"
+        where, params = [], []
+        if first:
+            where.append(f"{day} >= ?")
+            params.append(first.isoformat())
+        if last:
+            where.append(f"{day} < ?")
+            params.append((last + timedelta(days=1)).isoformat())
+        sql = f"SELECT {columns} FROM {table} {'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY {order}"
+        for row in self.conn.execute(sql, params):
+            yield make(row)
+
+    @traced()
+    def search(self, query, kind, limit=None, substring=False):
+        """Records of `kind` ("task" or "note") matching `query`, best BM25 score first.
+
+        With `substring`, records whose text contains `query` literally (any
+        case), by id; only the trigram index's candidates are read.
+        """
+        get = self.get_task if kind == "task" else self.get_note
+        if not substring:
+            return [get(doc_id) for doc_id, _ in self._search_index().search(query, kind, limit)]
+        needle = query.lower()
+        ids = self._search_index().substring_candidates(needle, kind)
+        if ids is None:
+            ids = [r[0] for r in self.conn.execute(f"SELECT id FROM {kind}s")]
+        found = []
+        for doc_id in sorted(ids):
+            r = get(doc_id)
+            if r is not None and needle in doc_text(kind, r):
+                found.append(r)
+                if len(found) == limit:
+                    break
+        return found
+
+    @traced()
+    def similar(self, query, kind, limit=None, ann=False):
+        """Records of `kind` closest to `query` by embedding cosine (selene_vectors; needs NumPy)."""
+        get = self.get_task if kind == "task" else self.get_note
+        return [get(doc_id) for doc_id, _ in self._vector_index().search(query, kind, limit, ann)]
+
+    def _vector_index(self):
+        if self._vectors is None:
+            from selene_vectors import VectorIndex
+            self._vectors = VectorIndex(self._search_index().conn)
+        self._vectors.sync(lambda kind, doc_id: self.get_task(doc_id) if kind == "task" else self.get_note(doc_id))
+        return self._vectors
+
+    # --- writes ---
+    def commit(self, op):
+        """Apply one journal-style mutation (see selene.apply_op) as a transaction."""
+        self.commit_many([op])
+
+    @traced("save")
+    def commit_many(self, ops, compact=True):
+        """Apply a batch of mutations as one transaction; runs of adds become one executemany per table.
+
+        (`compact` is for JsonStore's signature; there is no journal here.)
+        """
+        count("written", len(ops))
+        index = self._search_index()
+        with self.conn:
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN IMMEDIATE")  # the write lock, before reading the id counters
+            self._claim_ids(ops)
+            adds = {"task_add": [], "note_add": [], "cycle_log": []}
+            for op in ops:
+                kind = op["op"]
+                # the search index is updated in the same transaction as the record
+                index.apply(op)
+                if kind in adds:
+                    adds[kind].append(op["entry"] if kind == "cycle_log" else op["record"])
+                    continue
+                self._insert_adds(adds)  # earlier adds first: this op may refer to them
+                if kind == "task_done":
+                    self.conn.execute(
+                        "UPDATE tasks SET status = 'done', updated = ? WHERE id = ?", (op["at"], op["id"])
+                    )
+                elif kind == "task_delete":
+                    self.conn.execute("DELETE FROM tasks WHERE id = ?", (op["id"],))
+                else:
+                    raise ValueError(f"Unknown journal op: {kind}")
+            self._insert_adds(adds)
+
+    def _claim_ids(self, ops):
+        """Move added records past ids another process took since next_id() was read (in place)."""
+        free = {}
+        for op in ops:
+            if op["op"] in ("task_add", "note_add"):
+                kind = op["op"][:4] + "s"
+                if kind not in free:
+                    free[kind] = self.next_id(kind)
+                record = op["record"]
+                if record["id"] < free[kind]:
+                    record["id"] = free[kind]
+                free[kind] = record["id"] + 1
+
+    def _insert_adds(self, adds):
+        tasks, notes, entries = adds["task_add"], adds["note_add"], adds["cycle_log"]
+        if tasks:
+            self._insert_tasks(tasks)
+        if notes:
+            self._insert_notes(notes)
+        if entries:
+            stats = self._fold_cycle_entries(entries)
+            self._insert_cycle_logs(entries)
+            self._save_cycle_stats(stats)  # after the insert: it records their MAX(id)
+        for pending in adds.values():
+            pending.clear()
+
+    def _fold_cycle_entries(self, entries):
+        """The stored aggregates with not-yet-inserted `entries` folded in.
+
+        A start's neighbours are the nearest stored starts or the nearest
+        earlier starts of the same batch, whichever is closer.
+        """
+        stats, _ = self._stored_cycle_stats()
+        batch_starts = []  # sorted ordinals of this batch's starts so far
+        for entry in entries:
+            x = start_ordinal(entry["date"]) if entry.get("phase") == "start" else None
+            if x is None:
+                fold_entry(stats, entry)
+                continue
+            prev = self._neighbor_start(entry["date"], "<=", "DESC")
+            nxt = self._neighbor_start(entry["date"], ">", "ASC")
+            i = bisect_right(batch_starts, x)
+            if i and (prev is None or batch_starts[i - 1] > prev):
+                prev = batch_starts[i - 1]
+            if i < len(batch_starts) and (nxt is None or batch_starts[i] < nxt):
+                nxt = batch_starts[i]
+            batch_starts.insert(i, x)
+            fold_entry(stats, entry, prev, nxt)
+        return stats
+
+    def import_data(self, data):
+        """Bulk-load a JSON-store snapshot (used by `selene.py migrate`)."""
+        index = self._search_index()
+        with self.conn:
+            self._insert_tasks(data["tasks"])
+            self._insert_notes(data["notes"])
+            for t in data["tasks"]:
+                index.add("task", t)
+            for n in data["notes"]:
+                index.add("note", n)
+            self._insert_cycle_logs(data["cycle_logs"])
+            self._save_cycle_stats(compute_stats(self.cycle_logs()))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in data["config"].items()],
+            )
+
+    def _search_index(self):
+        # every write updates the index in its own transaction, so it only
+        # needs building for databases that predate it (or its INDEX_VERSION)
+        if self._index is None:
+            index = SearchIndex(self.conn)
+            if index.signature() != f"sqlite:v{INDEX_VERSION}":
+                with phase("index"), self.conn:
+                    if not self.conn.in_transaction:
+                        # hold the write lock from the read to the rebuild, or another
+                        # process's commit in between would be wiped from the index
+                        self.conn.execute("BEGIN IMMEDIATE")
+                    if index.signature() != f"sqlite:v{INDEX_VERSION}":  # someone else may have built it
+                        index.rebuild(self.tasks(), self.snapshot()["notes"])
+                        index.set_signature(f"sqlite:v{INDEX_VERSION}")
+            self._index = index
+        return self._index
+
+    @traced("save")
+    def compact(self):
+        self.conn.execute("VACUUM")
+        self.conn.execute("PRAGMA optimize")
+
+    def _insert_tasks(self, tasks):
+        self.conn.executemany(
+            f"INSERT INTO tasks ({TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (t["id"], t["title"], t.get("due"), json.dumps(t.get("tags", [])), t.get("energy"),
+                 t["status"], t.get("created"), t.get("updated"))
+                for t in tasks
+            ],
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO task_tags (tag, task_id) VALUES (?, ?)",
+            [(tag, t["id"]) for t in tasks for tag in t.get("tags", [])],
+        )
+        self._bump_counter("tasks", tasks)
+
+    def _insert_notes(self, notes):
+        self.conn.executemany(
+            f"INSERT INTO notes ({NOTE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (n["id"], n["title"], n.get("body", ""), json.dumps(n.get("tags", [])),
+                 n.get("created"), n.get("updated"))
+                for n in notes
+            ],
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO note_tags (tag, note_id) VALUES (?, ?)",
+            [(tag, n["id"]) for n in notes for tag in n.get("tags", [])],
+        )
+        self._bump_counter("notes", notes)
+
+    def _bump_counter(self, kind, records):
+        if records:
+            self.conn.execute(
+                "INSERT INTO counters (kind, next_id) VALUES (?, ?) "
+                "ON CONFLICT(kind) DO UPDATE SET next_id = MAX(next_id, excluded.next_id)",
+                (kind, max(r["id"] for r in records) + 1),
+            )
+
+    def _insert_cycle_logs(self, entries):
+        self.conn.executemany(
+            f"INSERT INTO cycle_log ({CYCLE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (e["date"], e["phase"], ", ".join(e.get("symptoms", [])), e.get("mood", ""),
+                 e.get("note", ""), e.get("created"))
+                for e in entries
+            ],
+        )
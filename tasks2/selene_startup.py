@@ -0,0 +1,125 @@
+# tasks2/selene_startup.py — cold-start benchmark for the selene.py CLI
+# Runs everyday commands against a scratch store, each in a fresh interpreter,
+# and reports the median wall time plus an `-X importtime` breakdown: time
+# spent importing, module count and the slowest imports. Exits 1 if a command
+# imports a module it never needs at startup, or is slower than --budget-ms.
+#
+#   python selene_startup.py                        # the commands below
+#   python selene_startup.py -n 20 --budget-ms 80
+#   python selene_startup.py task-add "Buy iron"    # one command
+#   python selene_startup.py --module               # as `python -m selene`
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# run in this order against one scratch store, so the later ones read data
+COMMANDS = [
+    ["task-add", "Startup check", "--due", "2025-11-24", "--tags", "health", "--energy", "low"],
+    ["task-list"],
+    ["task-agenda"],
+    ["task-done", "1"],
+    ["note-add", "Startup note", "--body", "cold start", "--tags", "cycle"],
+    ["note-list"],
+    ["cycle-log", "2025-11-03", "--phase", "start", "--symptoms", "cramps"],
+    ["cycle-show"],
+    ["cycle-predict"],
+    ["plan"],
+]
+
+# Each belongs to one feature, or is slow to import, and is imported by the
+# handler that needs it; none of the commands above should load it.
+NEVER_AT_STARTUP = frozenset({
+    "asyncio", "cProfile", "hashlib", "numpy", "openai", "pstats", "tracemalloc",
+    "selene_analytics", "selene_client", "selene_export", "selene_http",
+    "selene_import", "selene_serve", "selene_sqlite", "selene_vectors",
+})
+
+
+def _command(argv, as_module, importtime=False):
+    python = [sys.executable] + (["-X", "importtime"] if importtime else [])
+    script = ["-m", "selene"] if as_module else [os.path.join(HERE, "selene.py")]
+    return python + script + list(argv)
+
+
+def _env(backend):
+    return {**os.environ, "SELENE_BACKEND": backend, "PYTHONPATH": HERE}
+
+
+def parse_importtime(stderr):
+    """{module: (self µs, cumulative µs)} from `python -X importtime` output."""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports[name.strip()] = (int(self_us), int(cumulative_us))
+    return imports
+
+
+def imports(argv, cwd, backend="json", as_module=False):
+    """The modules one cold run of `selene.py argv` imports, as parse_importtime() gives them."""
+    proc = subprocess.run(_command(argv, as_module, importtime=True), cwd=cwd, env=_env(backend),
+                          capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"{' '.join(argv)} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def wall_times(argv, cwd, runs, backend="json", as_module=False):
+    """Seconds for each of `runs` cold runs of `selene.py argv`."""
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run(_command(argv, as_module), cwd=cwd, env=_env(backend),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def measure(argv, cwd, runs=10, backend="json", as_module=False, top=5):
+    imported = imports(argv, cwd, backend, as_module)
+    return {
+        "command": argv[0],
+        "median_ms": statistics.median(wall_times(argv, cwd, runs, backend, as_module)) * 1000,
+        "import_ms": sum(s for s, _ in imported.values()) / 1000,
+        "modules": len(imported),
+        "slowest": sorted(imported.items(), key=lambda kv: -kv[1][0])[:top],
+        "unexpected": sorted(NEVER_AT_STARTUP & imported.keys()),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Cold-start benchmark for selene.py")
+    p.add_argument("argv", nargs=argparse.REMAINDER, help="One command to measure (default: a set of everyday ones)")
+    p.add_argument("-n", "--runs", type=int, default=10, help="Timed runs per command")
+    p.add_argument("--backend", default="json", choices=["json", "sqlite"])
+    p.add_argument("--module", action="store_true", help="Run as `python -m selene` (uses cached bytecode)")
+    p.add_argument("--budget-ms", type=float, help="Fail if a command's median is slower than this")
+    p.add_argument("--top", type=int, default=5, help="Slowest imports to list per command")
+    args = p.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="selene_startup_") as cwd:
+        for argv in [args.argv] if args.argv else COMMANDS:
+            r = measure(argv, cwd, args.runs, args.backend, args.module, args.top)
+            print(f"{r['command']:<14} median {r['median_ms']:6.1f} ms | "
+                  f"imports {r['import_ms']:5.1f} ms ({r['modules']} modules)")
+            print("    slowest: " + ", ".join(f"{name} {s / 1000:.1f}" for name, (s, _) in r["slowest"]))
+            if r["unexpected"]:
+                failed = True
+                print(f"    ❌ imported {', '.join(r['unexpected'])}")
+            if args.budget_ms and r["median_ms"] > args.budget_ms:
+                failed = True
+                print(f"    ❌ over the {args.budget_ms:g} ms budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
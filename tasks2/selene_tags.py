@@ -0,0 +1,135 @@
+# tasks2/selene_tags.py — tag expressions and the in-memory tag index
+# A tag expression combines tags with & (and), | (or), ! (not) and
+# parentheses, tightest first: !, &, |.
+#
+#   health & !archive
+#   (school | work) & urgent
+#
+# parse() turns it into a small tree of tuples that TagIndex.match() (the JSON
+# store) and selene_sqlite (as SQL over the tag tables) both evaluate.
+
+import re
+
+TOKEN_RE = re.compile(r"\s*(?:([&|!()])|([^\s&|!()]+))")
+
+
+def parse(expr):
+    """("tag", name) | ("not", node) | ("and", [nodes]) | ("or", [nodes]). Raises ValueError on bad syntax."""
+    tokens = []
+    pos = 0
+    expr = expr.strip()
+    while pos < len(expr):
+        m = TOKEN_RE.match(expr, pos)
+        if not m:
+            raise ValueError(f"Bad tag expression: {expr!r}")
+        tokens.append(m.group(1) or ("tag", m.group(2)))
+        pos = m.end()
+    if not tokens:
+        raise ValueError("Empty tag expression.")
+    node, rest = _parse_or(tokens)
+    if rest:
+        raise ValueError(f"Bad tag expression: {expr!r}")
+    return node
+
+
+def _parse_or(tokens):
+    node, tokens = _parse_and(tokens)
+    nodes = [node]
+    while tokens and tokens[0] == "|":
+        node, tokens = _parse_and(tokens[1:])
+        nodes.append(node)
+    return (nodes[0] if len(nodes) == 1 else ("or", nodes)), tokens
+
+
+def _parse_and(tokens):
+    node, tokens = _parse_not(tokens)
+    nodes = [node]
+    while tokens and tokens[0] == "&":
+        node, tokens = _parse_not(tokens[1:])
+        nodes.append(node)
+    return (nodes[0] if len(nodes) == 1 else ("and", nodes)), tokens
+
+
+def _parse_not(tokens):
+    if not tokens:
+        raise ValueError("Tag expression ends too early.")
+    head, rest = tokens[0], tokens[1:]
+    if head == "!":
+        node, rest = _parse_not(rest)
+        return ("not", node), rest
+    if head == "(":
+        node, rest = _parse_or(rest)
+        if not rest or rest[0] != ")":
+            raise ValueError("Unbalanced parentheses in tag expression.")
+        return node, rest[1:]
+    if isinstance(head, tuple):
+        return head, rest
+    raise ValueError(f"Unexpected {head!r} in tag expression.")
+
+
+class TagIndex:
+    """Interned tag dictionary plus tag -> set-of-ids posting lists for one record kind."""
+
+    def __init__(self, records=()):
+        self.codes = {}     # tag -> small int
+        self.postings = []  # code -> set of record ids
+        for r in records:
+            self.add(r)
+
+    def _code(self, tag):
+        code = self.codes.get(tag)
+        if code is None:
+            code = self.codes[tag] = len(self.postings)
+            self.postings.append(set())
+        return code
+
+    def add(self, record):
+        """Index a selene_records.Task or Note."""
+        for tag in record.tags or ():
+            self.postings[self._code(tag)].add(record.id)
+
+    def remove(self, record):
+        for tag in record.tags or ():
+            code = self.codes.get(tag)
+            if code is not None:
+                self.postings[code].discard(record.id)
+
+    def ids(self, tag):
+        code = self.codes.get(tag)
+        return self.postings[code] if code is not None else set()
+
+    def match(self, node, universe):
+        """Ids matching a parsed expression. `universe()` (every id) is only called for a bare NOT."""
+        op = node[0]
+        if op == "tag":
+            return set(self.ids(node[1]))
+        if op == "or":
+            return set().union(*(self.match(n, universe) for n in node[1]))
+        if op == "not":
+            return universe() - self.match(node[1], universe)
+        # and: intersect the positive terms smallest first, then subtract the negated ones
+        pos = [n for n in node[1] if n[0] != "not"]
+        neg = [n[1] for n in node[1] if n[0] == "not"]
+        if pos:
+            sets = sorted((self.ids(n[1]) if n[0] == "tag" else self.match(n, universe) for n in pos), key=len)
+            result = sets[0].intersection(*sets[1:])  # a new set; the postings are untouched
+        else:
+            result = universe()
+        for n in neg:
+            if not result:
+                break
+            result -= self.ids(n[1]) if n[0] == "tag" else self.match(n, universe)
+        return result
+
+
+def to_sql(node, id_col, table, fk):
+    """(where-clause, params) for a parsed expression, as IN-subqueries on a (tag, fk) table."""
+    op = node[0]
+    if op == "tag":
+        return f"{id_col} IN (SELECT {fk} FROM {table} WHERE tag = ?)", [node[1]]
+    if op == "not":
+        sql, params = to_sql(node[1], id_col, table, fk)
+        return f"NOT ({sql})", params
+    parts = [to_sql(n, id_col, table, fk) for n in node[1]]
+    joiner = " AND " if op == "and" else " OR "
+    return "(" + joiner.join(p[0] for p in parts) + ")", [x for p in parts for x in p[1]]
@@ -0,0 +1,240 @@
+# tasks2/selene_trace.py — per-command phase timing for `selene.py --profile` / SELENE_TRACE
+# While a command is traced, the store reports what it does through the hooks
+# below: phase() times a block, traced() times a function and counts the
+# records it returns, add_bytes() counts store bytes read and written. Time is
+# charged to the innermost open phase only, so the phases add up. Whatever the
+# handler spends outside them (formatting and printing, mostly) is "render":
+#
+#   {"ts": "2025-11-03T10:15:00", "command": "task-list", "options": ["--limit"], "backend": "json",
+#    "status": "ok", "wall_ms": 41.2, "phases_ms": {"cli": 1.1, "load": 2.3, "load.cache": 30.2,
+#    "load.journal": 0.4, "query": 3.0, "render": 4.2}, "records": {"loaded.tasks": 10000, "tasks": 6210,
+#    "list_tasks": 20}, "bytes": {"read": 2104331, "written": 0}, "io": {"read": 2391000, "written": 1830}}
+#
+# One line per command is appended to selene_trace.ndjson ($SELENE_TRACE_FILE).
+# "bytes" counts the store's own files (snapshot, cache, journal, note bodies)
+# and export output; "io" is everything the process read and wrote, SQLite
+# included (Linux only). Hooks cost one global lookup when tracing is off, and
+# cProfile and tracemalloc are only imported when a capture asks for them.
+
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+TRACE_FILE = "selene_trace.ndjson"
+CAPTURES = ("cprofile", "tracemalloc")
+TOP = 25  # functions / allocation sites kept from a capture
+
+ACTIVE = None  # the Trace of the command being traced, if any
+_UNTRACED = nullcontext()
+
+
+class Trace:
+    """Phase times, record counts and byte counts of one command."""
+
+    def __init__(self, command):
+        self.command = command
+        self.phases = {}  # name -> seconds spent in it, nested phases excluded
+        self.records = {}
+        self.bytes = {"read": 0, "written": 0}
+        self._open = []  # [name, resumed at] of the open phases, innermost last
+
+    @contextmanager
+    def phase(self, name):
+        now = time.perf_counter()
+        if self._open:
+            self._charge(self._open[-1], now)
+        frame = [name, now]
+        self._open.append(frame)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._open.pop()
+            self._charge(frame, now)
+            if self._open:
+                self._open[-1][1] = now  # the outer phase resumes
+
+    def _charge(self, frame, now):
+        self.phases[frame[0]] = self.phases.get(frame[0], 0.0) + now - frame[1]
+
+    def count(self, name, n):
+        self.records[name] = self.records.get(name, 0) + n
+
+
+def phase(name):
+    """Context manager timing a phase of the traced command; does nothing otherwise."""
+    return ACTIVE.phase(name) if ACTIVE else _UNTRACED
+
+
+def add_bytes(direction, n):
+    """Count `n` store bytes "read" or "written" by the traced command."""
+    if ACTIVE:
+        ACTIVE.bytes[direction] += n
+
+
+def count(name, n):
+    if ACTIVE:
+        ACTIVE.count(name, n)
+
+
+def traced(phase_name="query"):
+    """Decorator: calls are timed as `phase_name`, and returned lists counted under the function's name."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            if ACTIVE is None:
+                return fn(*args, **kwargs)
+            with ACTIVE.phase(phase_name):
+                result = fn(*args, **kwargs)
+            if isinstance(result, list):
+                ACTIVE.count(fn.__name__, len(result))
+            return result
+        return call
+    return wrap
+
+
+def settings(profile=False, capture=None, path=None):
+    """(capture, path, echo) if this command is traced, else None.
+
+    --profile (or --profile-capture) traces and prints a summary to stderr.
+    SELENE_TRACE=1 traces silently, SELENE_TRACE=cprofile|tracemalloc adds that capture.
+    """
+    env = os.environ.get("SELENE_TRACE", "").strip().lower()
+    echo = bool(profile or capture)
+    if not (echo or (env and env not in ("0", "off", "no"))):
+        return None
+    if capture is None and env in CAPTURES:
+        capture = env
+    return capture, path or os.environ.get("SELENE_TRACE_FILE") or TRACE_FILE, echo
+
+
+def _process_io():
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(":") for line in f)
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+@contextmanager
+def tracing(command, argv, backend, started, profile=False, capture=None, path=None):
+    """Trace the command run inside the with block, then append its metrics to the trace file.
+
+    `started` is the perf_counter() reading from before argument parsing,
+    which is reported as the "cli" phase. Without --profile or SELENE_TRACE
+    this does nothing.
+    """
+    global ACTIVE
+    chosen = settings(profile, capture, path)
+    if chosen is None:
+        yield None
+        return
+    capture, path, echo = chosen
+    trace = Trace(command)
+    begun = time.perf_counter()
+    trace.phases["cli"] = begun - started
+    io_before = _process_io()
+    profiler = None
+    if capture == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+    elif capture == "tracemalloc":
+        import tracemalloc
+        tracemalloc.start()
+    status = "ok"
+    ACTIVE = trace
+    if profiler:
+        profiler.enable()
+    try:
+        yield trace
+    except BaseException as e:
+        status = "error" if isinstance(e, ValueError) else type(e).__name__
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        ACTIVE = None
+        ended = time.perf_counter()
+        allocations = _tracemalloc_top() if capture == "tracemalloc" else None  # before we allocate more
+        record = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "command": command,
+            "options": [a.split("=")[0] for a in argv if a.startswith("--")],  # values may be private text
+            "backend": backend,
+            "pid": os.getpid(),
+            "python": sys.version.split()[0],
+            "status": status,
+            "wall_ms": (ended - started) * 1000,
+            "phases_ms": _phases_ms(trace, ended - started),
+            "records": trace.records,
+            "bytes": trace.bytes,
+        }
+        io_after = _process_io()
+        if io_before and io_after:
+            record["io"] = {"read": io_after[0] - io_before[0], "written": io_after[1] - io_before[1]}
+        if profiler:
+            record["cprofile"] = _cprofile_top(profiler, os.path.splitext(path)[0] + ".prof")
+        elif allocations:
+            record["tracemalloc"] = allocations
+        append(record, path)
+        if echo:
+            print(summary(record, path), file=sys.stderr)
+
+
+def _phases_ms(trace, wall):
+    phases = dict(trace.phases)
+    phases["render"] = max(wall - sum(phases.values()), 0.0)
+    return {name: round(s * 1000, 3) for name, s in phases.items()}
+
+
+def _cprofile_top(profiler, dump_path):
+    import pstats
+    profiler.dump_stats(dump_path)  # the whole profile, for pstats / snakeviz
+    stats = pstats.Stats(profiler)
+    top = sorted(stats.stats.items(), key=lambda kv: -kv[1][3])[:TOP]
+    return {"file": dump_path, "top": [
+        {"function": f"{file}:{line}({name})", "calls": calls, "tottime_ms": round(tottime * 1000, 3),
+         "cumtime_ms": round(cumtime * 1000, 3)}
+        for (file, line, name), (_, calls, tottime, cumtime, _) in top
+    ]}
+
+
+def _tracemalloc_top():
+    import tracemalloc
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, __file__)])
+    tracemalloc.stop()
+    return {"peak_kb": peak // 1024, "current_kb": current // 1024, "top": [
+        {"where": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "kb": round(s.size / 1024, 1), "count": s.count}
+        for s in snapshot.statistics("lineno")[:TOP]
+    ]}
+
+
+def append(record, path=TRACE_FILE):
+    """Append one metrics line. A single O_APPEND write, so concurrent commands don't interleave lines."""
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def _size(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024 or unit == "MB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def summary(record, path):
+    phases = " | ".join(f"{name} {ms:.1f}" for name, ms in record["phases_ms"].items() if ms >= 0.05)
+    b = record["bytes"]
+    return (f"⏱  {record['command']} {record['wall_ms']:.1f} ms: {phases}\n"
+            f"   read {_size(b['read'])}, wrote {_size(b['written'])}; records "
+            + (", ".join(f"{k} {v}" for k, v in record["records"].items()) or "—") + f" → {path}")
@@ -0,0 +1,308 @@
+# tasks2/selene_vectors.py — offline embedding index for `chat` (needs NumPy)
+# Each note/task becomes a DIM-wide float32 vector, computed locally with no
+# network and no model files:
+#
+#   features   words (title words count double) plus 4-letter word stems, so
+#              "tired" and "tiredness" share something
+#   weights    sublinear tf x idf, idf from the document frequencies so far
+#   vector     sum of weight x R(feature), normalized, where R(feature) is a
+#              fixed pseudo-random Gaussian vector seeded by the feature's
+#              CRC32 (hashed TF-IDF, randomly projected down to DIM)
+#
+# Vectors live in the vector_* tables next to the search index (see
+# selene_search), and in memory as one contiguous float32 matrix per kind.
+# A query scores only the documents that share at least one of its features,
+# looked up in the search postings: random projection gives unrelated
+# documents a positive cosine about half the time, so the score alone can't
+# tell them apart. Scoring is a single matrix-vector product over those rows
+# plus argpartition. Writes only queue (kind, id) in vector_dirty; sync()
+# embeds just those records.
+#
+# For large stores, search(..., ann=True) first picks the IVF_PROBES nearest
+# k-means cells and scores only their members (an IVF index kept in memory).
+
+import math
+import zlib
+
+import numpy as np
+
+from selene_search import TITLE_WEIGHT, tokenize
+
+DIM = 256
+STEM = 4  # stem feature length; words longer than this also add their prefix
+BATCH = 512  # documents embedded per matrix operation
+ANN_MIN_DOCS = 5000  # below this, ann=True still scans everything
+IVF_PROBES = 8
+
+
+def features(kind, record):
+    """{feature: raw count} for a document."""
+    counts = {}
+    words = tokenize(record["title"]) * TITLE_WEIGHT
+    if kind == "note":
+        words += tokenize(record.get("body", "") or "")
+    for w in words:
+        counts[w] = counts.get(w, 0) + 1
+        if len(w) > STEM:
+            stem = w[:STEM] + "~"
+            counts[stem] = counts.get(stem, 0) + 0.5
+    return counts
+
+
+class _Projection:
+    """feature -> its fixed random DIM-vector, generated on first use and kept as rows of one matrix."""
+
+    def __init__(self):
+        self.ids = {}
+        self.rows = np.zeros((1024, DIM), dtype=np.float32)
+
+    def lookup(self, features):
+        """Row numbers for `features`, generating rows for new ones."""
+        ids = self.ids
+        out = np.empty(len(features), dtype=np.intp)
+        for i, f in enumerate(features):
+            r = ids.get(f)
+            if r is None:
+                r = ids[f] = len(ids)
+                if r == len(self.rows):
+                    self.rows = np.concatenate([self.rows, np.zeros_like(self.rows)])
+                rng = np.random.default_rng(zlib.crc32(f.encode("utf-8")))
+                self.rows[r] = rng.standard_normal(DIM, dtype=np.float32)
+            out[i] = r
+        return out
+
+
+_PROJECTION = _Projection()
+
+
+class _Matrix:
+    """Growable contiguous float32 matrix of one kind's vectors, with a row per doc id."""
+
+    def __init__(self):
+        self.vecs = np.zeros((0, DIM), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
+        self.n = 0
+        self.row = {}  # doc id -> row
+        self.ivf = None  # (centroids, [member rows per cell], size when built)
+
+    def append(self, doc_ids, vecs):
+        need = self.n + len(doc_ids)
+        if need > len(self.vecs):
+            cap = max(need, 2 * len(self.vecs), 64)
+            for name, dtype in (("vecs", np.float32), ("ids", np.int64), ("alive", bool)):
+                old = getattr(self, name)
+                grown = np.zeros((cap, DIM) if name == "vecs" else cap, dtype=dtype)
+                grown[:self.n] = old[:self.n]
+                setattr(self, name, grown)
+        rows = np.arange(self.n, need)
+        self.vecs[rows] = vecs
+        self.ids[rows] = doc_ids
+        self.alive[rows] = True
+        for doc_id, r in zip(doc_ids, rows):
+            self.row[doc_id] = int(r)
+        self.n = need
+        if self.ivf is not None:
+            centroids, cells, _ = self.ivf
+            for r, c in zip(rows, np.argmax(vecs @ centroids.T, axis=1)):
+                cells[c].append(int(r))
+
+    def drop(self, doc_id):
+        r = self.row.pop(doc_id, None)
+        if r is not None:
+            self.alive[r] = False
+
+    def compact(self):
+        """Squeeze out dropped rows once they are the majority."""
+        if self.n <= 2 * len(self.row):
+            return
+        keep = np.flatnonzero(self.alive[:self.n])
+        vecs, ids = self.vecs[keep], self.ids[keep]
+        self.__init__()
+        self.append(ids.tolist(), vecs)
+
+
+class VectorIndex:
+    """Embedding index over the vector_* tables of a search-index connection.
+
+    Opened after the SearchIndex on the same connection (which creates the
+    tables). sync() commits its own transaction.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.df = dict(conn.execute("SELECT feature, df FROM vector_df"))
+        self.kinds = {"task": _Matrix(), "note": _Matrix()}
+        rows = conn.execute("SELECT kind, doc_id, vec FROM vector_docs ORDER BY kind, doc_id").fetchall()
+        for kind, m in self.kinds.items():
+            mine = [r for r in rows if r[0] == kind]
+            if mine:
+                vecs = np.frombuffer(b"".join(r[2] for r in mine), dtype=np.float32).reshape(-1, DIM)
+                m.append([r[1] for r in mine], vecs)
+        meta = conn.execute("SELECT value FROM search_meta WHERE key = 'vectors_built_docs'").fetchone()
+        self.built_docs = int(meta[0]) if meta else 0
+
+    def n_docs(self):
+        return sum(len(m.row) for m in self.kinds.values())
+
+    def sync(self, lookup):
+        """Embed the records queued in vector_dirty. lookup(kind, id) returns the record or None if deleted.
+
+        Once the collection has doubled since the idf weights were last applied
+        everywhere, every vector is recomputed so old and new ones agree.
+        """
+        if self.conn.execute("SELECT 1 FROM vector_dirty LIMIT 1").fetchone() is None:
+            return
+        with self.conn:
+            if not self.conn.in_transaction:
+                # hold the write lock from the read to the DELETE, or records another
+                # process queues in between would be dropped without being embedded
+                self.conn.execute("BEGIN IMMEDIATE")
+            dirty = self.conn.execute("SELECT kind, doc_id FROM vector_dirty ORDER BY kind, doc_id").fetchall()
+            if not dirty:  # another process synced meanwhile
+                return
+            changed = set()
+            added = {"task": [], "note": []}
+            for kind, doc_id in dirty:
+                self._forget(kind, doc_id, changed)
+                record = lookup(kind, doc_id)
+                if record is not None:
+                    added[kind].append((doc_id, features(kind, record)))
+                    for f in added[kind][-1][1]:
+                        self.df[f] = self.df.get(f, 0) + 1
+                        changed.add(f)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO vector_df (feature, df) VALUES (?, ?)",
+                [(f, self.df.get(f, 0)) for f in changed],
+            )
+            total = self.n_docs() + sum(map(len, added.values()))
+            if total > 2 * max(self.built_docs, 50):
+                for kind, m in self.kinds.items():  # re-embed everything with today's idf
+                    kept = []
+                    for doc_id in list(m.row):
+                        m.drop(doc_id)
+                        record = lookup(kind, doc_id)
+                        if record is not None:
+                            kept.append((doc_id, features(kind, record)))
+                    added[kind] = kept + added[kind]
+                self.built_docs = total
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO search_meta (key, value) VALUES ('vectors_built_docs', ?)",
+                    (str(total),),
+                )
+            for kind, docs in added.items():
+                self._store(kind, docs, total)
+                self.kinds[kind].compact()
+            self.conn.execute("DELETE FROM vector_dirty")
+
+    def _forget(self, kind, doc_id, changed):
+        row = self.conn.execute(
+            "SELECT features FROM vector_docs WHERE kind = ? AND doc_id = ?", (kind, doc_id)
+        ).fetchone()
+        if row is None:
+            return
+        for f in row[0].split(" "):
+            self.df[f] = self.df.get(f, 1) - 1
+            changed.add(f)
+        self.conn.execute("DELETE FROM vector_docs WHERE kind = ? AND doc_id = ?", (kind, doc_id))
+        self.kinds[kind].drop(doc_id)
+
+    def _store(self, kind, docs, n_docs):
+        for start in range(0, len(docs), BATCH):
+            batch = docs[start:start + BATCH]
+            vecs = self.embed([f for _, f in batch], n_docs)
+            ids = [doc_id for doc_id, _ in batch]
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO vector_docs (kind, doc_id, features, vec) VALUES (?, ?, ?, ?)",
+                [(kind, doc_id, " ".join(f), v.tobytes()) for (doc_id, f), v in zip(batch, vecs)],
+            )
+            self.kinds[kind].append(ids, vecs)
+
+    def embed(self, docs, n_docs):
+        """Unit-length float32 vectors for a batch of feature counts, as one (len(docs), DIM) matrix."""
+        n = max(n_docs, 1)
+        names, counts, owners = [], [], []
+        for i, doc in enumerate(docs):
+            names += doc
+            counts += doc.values()
+            owners += [i] * len(doc)
+        out = np.zeros((len(docs), DIM), dtype=np.float32)
+        if names:
+            df = np.fromiter((self.df.get(f, 0) for f in names), dtype=np.float32, count=len(names))
+            weights = (1 + np.log(np.asarray(counts, dtype=np.float32))) * (np.log((1 + n) / (1 + df)) + 1)
+            rows = _PROJECTION.lookup(names)  # may grow the matrix, so index it afterwards
+            contrib = _PROJECTION.rows[rows]
+            contrib *= weights[:, None]
+            owners = np.asarray(owners)
+            starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+            out[owners[starts]] = np.add.reduceat(contrib, starts, axis=0)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms > 0, norms, 1)
+
+    def search(self, query, kind, limit=None, ann=False):
+        """[(doc_id, cosine)] best first."""
+        m = self.kinds[kind]
+        # words no document uses can't match anything; they would only add noise
+        counts = {f: c for f, c in features("task", {"title": query}).items() if self.df.get(f)}
+        if not counts or not m.row:
+            return []
+        q = self.embed([counts], self.n_docs())[0]
+        row = m.row
+        candidates = np.fromiter(
+            sorted(row[doc_id] for doc_id in self._sharing(counts, kind) if doc_id in row), dtype=np.int64
+        )
+        if ann and len(row) >= ANN_MIN_DOCS:
+            candidates = np.intersect1d(candidates, self._probe(m, q))
+        if not len(candidates):
+            return []
+        scores = m.vecs[candidates] @ q
+        k = min(limit or len(scores), len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(m.ids[candidates[i]]), float(scores[i])) for i in top]
+
+    def _sharing(self, features, kind):
+        """Ids of `kind` documents with at least one of `features`, from the search postings.
+
+        A word feature is that indexed term; a stem feature ("tire~") is any
+        indexed term longer than the stem that starts with it, as in features().
+        """
+        ids = set()
+        for f in features:
+            if f.endswith("~"):
+                rows = self.conn.execute(
+                    "SELECT doc_id FROM search_postings WHERE term > ? AND term < ? AND kind = ?",
+                    (f[:-1], f[:-1] + "\uffff", kind),
+                )
+            else:
+                rows = self.conn.execute(
+                    "SELECT doc_id FROM search_postings WHERE term = ? AND kind = ?", (f, kind)
+                )
+            ids.update(r[0] for r in rows)
+        return ids
+
+    def _probe(self, m, q):
+        if m.ivf is None or m.n > 2 * m.ivf[2]:
+            m.ivf = _build_ivf(m.vecs[:m.n])
+        centroids, cells, _ = m.ivf
+        nearest = np.argpartition(-(centroids @ q), min(IVF_PROBES, len(cells)) - 1)[:IVF_PROBES]
+        return np.fromiter((r for c in nearest for r in cells[c]), dtype=np.int64)
+
+
+def _build_ivf(vecs, iterations=8, seed=0):
+    """Spherical k-means with about sqrt(n) cells: (centroids, member rows per cell, n)."""
+    n = len(vecs)
+    k = max(1, int(math.sqrt(n)))
+    rng = np.random.default_rng(seed)
+    centroids = vecs[rng.choice(n, k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vecs @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vecs)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = np.where(norms > 0, sums / np.where(norms > 0, norms, 1), centroids)
+    assign = np.argmax(vecs @ centroids.T, axis=1)
+    order = np.argsort(assign, kind="stable")
+    bounds = np.searchsorted(assign[order], np.arange(k + 1))
+    cells = [order[bounds[c]:bounds[c + 1]].tolist() for c in range(k)]
+    return centroids, cells, n
@@ -0,0 +1,34 @@
+import sys
+import pathlib
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+import selene
+
+
+def run(*argv):
+    """Run one selene.py subcommand in-process."""
+    args = selene.build_parser().parse_args(list(argv))
+    args.func(args)
+
+
+def use_tmp_store(tmp_path, monkeypatch, backend):
+    """Point selene at a fresh store of `backend` in tmp_path, and run from there."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("selene.DATA_FILE", str(tmp_path / "selene_data.json"))
+    monkeypatch.setattr("selene.DB_FILE", str(tmp_path / "selene.db"))
+    monkeypatch.setattr("selene.BACKEND", backend)
+    monkeypatch.delenv("SELENE_TRACE", raising=False)  # a developer's own setting must not leak in
+    monkeypatch.delenv("SELENE_TRACE_FILE", raising=False)
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path, monkeypatch):
+    """Runs the test once per backend, each on a fresh store."""
+    use_tmp_store(tmp_path, monkeypatch, request.param)
+    return request.param
@@ -0,0 +1,59 @@
+import sys
+import pathlib
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import selene
+from selene_analytics import CycleHistory
+from conftest import run, use_tmp_store
+
+
+LOGS = [
+    {"date": "2025-01-01", "phase": "start", "symptoms": ["cramps", "fatigue"]},
+    {"date": "2025-01-02", "phase": "note", "symptoms": ["cramps"]},
+    {"date": "2025-01-29", "phase": "start", "symptoms": ["cramps", "fatigue"]},
+    {"date": "2025-02-28", "phase": "start", "symptoms": []},
+    {"date": "2025-03-12", "phase": "note", "symptoms": ["headache"]},
+    {"date": "2025-03-27", "phase": "start", "symptoms": ["fatigue"]},
+    {"date": "2024-12-30", "phase": "note", "symptoms": ["headache"]},  # before any start
+    {"date": "sometime", "phase": "note", "symptoms": ["cramps"]},      # free text is dropped
+]
+
+
+def test_length_statistics():
+    stats = CycleHistory.from_logs(LOGS).length_stats(window=2)
+    assert stats["cycles"] == 3 and (stats["min"], stats["max"], stats["median"]) == (27, 30, 28)
+    assert stats["mean"] == pytest.approx(85 / 3)
+    assert stats["variance"] == pytest.approx(np.var([28, 30, 27], ddof=1))
+    assert stats["rolling_median"] == [29, 28.5]
+
+
+def test_heatmap_and_cooccurrence():
+    history = CycleHistory.from_logs(LOGS)
+    assert history.symptoms == ["cramps", "fatigue", "headache"]
+    heat = history.heatmap(max_day=10)
+    assert heat[0, 0] == 2 and heat[0, 1] == 1 and heat[1, 0] == 3
+    assert heat[2].tolist() == [0] * 10 + [1]  # day 12 lands in the last column; the pre-start log is skipped
+    co = history.cooccurrence()
+    assert co.tolist() == [[3, 2, 0], [2, 3, 0], [0, 0, 2]]
+
+
+def test_predict_gives_a_window_and_stats_detail(tmp_path, monkeypatch, capsys):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    for e in LOGS[:6]:
+        run("cycle-log", e["date"], "--phase", e["phase"], *(["--symptoms", *e["symptoms"]] if e["symptoms"] else []))
+    p = selene.predict_next_start(selene.open_store())
+    assert p["next_start"] == "2025-04-24" and p["window"] == ["2025-04-22", "2025-04-26"]
+
+    capsys.readouterr()
+    run("cycle-stats", "--detail", "--max-day", "10")
+    out = capsys.readouterr().out
+    assert "Variance: 2.3" in out and "cramps + fatigue: 2" in out
+    assert selene.cycle_history(selene.open_store()).dates.size == 6
@@ -0,0 +1,63 @@
+import sys
+import pathlib
+from datetime import date
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+import selene
+import selene_bench
+
+TODAY = date(2025, 11, 3)
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_generated_store_looks_like_real_use(tmp_path, backend):
+    selene_bench.generate(str(tmp_path), tasks=300, notes=30, days=120, backend=backend, today=TODAY)
+
+    with selene_bench.using_store(str(tmp_path), backend):
+        store = selene.open_store()
+        tasks = store.tasks()
+        assert len(tasks) == 300 and [t["id"] for t in tasks] == list(range(1, 301))
+        assert {"open", "done"} == {t["status"] for t in tasks}
+        assert len(store.notes()) == 30 and store.get_note(30)["body"]
+        logs = store.cycle_logs()
+        assert len(logs) == 120 and logs[-1]["date"] == "2025-11-03"
+        assert selene.predict_next_start(store)["window"] is not None  # four or so cycles in 120 days
+        assert store.search("cramps", "note")
+        store.close()
+    assert selene.DATA_FILE == "selene_data.json"  # restored
+
+
+def test_run_times_store_operations_and_subcommands(tmp_path):
+    selene_bench.generate(str(tmp_path), tasks=200, notes=20, days=60, today=TODAY)
+    results = selene_bench.run_benchmarks(str(tmp_path), repeat=2, only=["store.plan", "cli.task-add"])
+
+    assert set(results) == {"store.plan", "cli.task-add"}
+    for r in results.values():
+        assert r["runs"] == 2 and 0 < r["p50_ms"] <= r["p90_ms"] <= r["p99_ms"]
+    assert 5 < results["cli.task-add"]["peak_mb"] < 500  # the child's own peak, not this process's
+    assert len(selene.JsonStore(str(tmp_path / "selene_data.json")).tasks()) == 200  # ran on a copy
+
+
+def test_regressions_against_a_saved_baseline(tmp_path):
+    path = str(tmp_path / "results.json")
+    fast = {"p50_ms": 10.0, "p90_ms": 12.0, "p99_ms": 15.0, "peak_mb": 20.0, "runs": 5}
+    selene_bench.save_results({"cli.plan": fast, "store.plan": fast}, "10k/json", path)
+    selene_bench.save_results({"store.plan": {**fast, "p50_ms": 11.0}}, "10k/json", path)  # --only keeps the rest
+    baseline = selene_bench.load_results(path)["10k/json"]["ops"]
+    assert baseline["store.plan"]["p50_ms"] == 11.0 and baseline["cli.plan"] == fast
+
+    now = {
+        "cli.plan": {**fast, "p50_ms": 14.0},                    # +40%
+        "store.plan": {**fast, "p50_ms": 12.5},                  # +14%, within tolerance
+        "store.chat": fast,                                      # no baseline yet
+    }
+    assert set(selene_bench.regressions(now, baseline)) == {"cli.plan"}
+    tiny = {"p50_ms": 0.02, "p90_ms": 0.02, "p99_ms": 0.02, "peak_mb": 0.0, "runs": 5}
+    assert not selene_bench.regressions({"x": {**tiny, "p50_ms": 0.2}}, {"x": tiny})  # 10x, but under the noise floor
+    assert selene_bench.regressions({"x": {**fast, "peak_mb": 40.0}}, {"x": fast})
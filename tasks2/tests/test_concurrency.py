@@ -0,0 +1,100 @@
+import multiprocessing
+import sys
+import pathlib
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+import selene
+from conftest import use_tmp_store
+
+
+def test_two_stale_stores_merge_their_commits(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    a, b = selene.JsonStore(), selene.JsonStore()  # two processes holding the same store
+
+    first = selene.add_task(a, "Errand from a")
+    second = selene.add_task(b, "Errand from b")  # b still thinks id 1 is free
+    selene.add_note(b, "Note from b", "body b")
+    selene.add_note(a, "Note from a", "body a")
+    selene.complete_task(b, first["id"])
+
+    assert (first["id"], second["id"]) == (1, 2)
+    fresh = selene.JsonStore()
+    assert [(t["id"], t["title"], t["status"]) for t in fresh.tasks()] == [
+        (1, "Errand from a", "done"), (2, "Errand from b", "open"),
+    ]
+    assert {fresh.get_note(n["id"])["body"] for n in fresh.notes()} == {"body a", "body b"}
+    assert [t["id"] for t in fresh.search("errand", "task")] == [1, 2]
+
+
+def test_a_note_renumbered_on_catch_up_reports_its_stored_id(tmp_path, monkeypatch, capsys):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    a, b = selene.JsonStore(), selene.JsonStore()
+
+    first = selene.add_note(a, "Note from a", "body a")
+    second = selene.add_note(b, "Note from b", "body b")  # b still thinks id 1 is free
+
+    assert (first["id"], second["id"]) == (1, 2)
+    fresh = selene.JsonStore()
+    assert [(n["id"], n["title"]) for n in fresh.notes()] == [(1, "Note from a"), (2, "Note from b")]
+    assert fresh.get_note(second["id"])["body"] == "body b"
+
+    monkeypatch.setattr(selene, "open_store", lambda: a)  # the CLI, in a process that is behind again
+    monkeypatch.setattr(sys, "argv", ["selene.py", "note-add", "Note from the CLI"])
+    selene.add_task(b, "Meanwhile")
+    selene.add_note(b, "Another from b")
+    selene.main()
+    assert "Added note [4] Note from the CLI" in capsys.readouterr().out
+
+
+def test_compaction_by_one_store_keeps_the_others_commits(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    a, b = selene.JsonStore(), selene.JsonStore()
+    selene.add_task(a, "Kept")
+    selene.log_cycle(b, "2025-01-01", "start")
+
+    b.compact()  # b's copy predates a's task
+    selene.add_task(a, "After compaction")
+
+    data = selene.load_data()
+    assert [t["title"] for t in data["tasks"]] == ["Kept", "After compaction"]
+    assert [e["date"] for e in data["cycle_logs"]] == ["2025-01-01"]
+
+
+def test_corrupt_snapshot_is_an_error_not_an_empty_store(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    selene.add_task(selene.JsonStore(), "Precious")
+    selene.JsonStore().compact()
+    (tmp_path / "selene_data.cache").unlink()
+    (tmp_path / "selene_data.json").write_text('{"tasks": [{"id": 1, "ti')
+
+    with pytest.raises(ValueError, match="not valid JSON"):
+        selene.JsonStore()
+
+
+def _add_tasks(args):
+    data_file, db_file, backend, worker = args
+    selene.DATA_FILE, selene.DB_FILE, selene.BACKEND = data_file, db_file, backend
+    selene.JOURNAL_COMPACT_BYTES = 2048  # compact often, mid-race
+    store = selene.open_store()
+    for i in range(25):
+        selene.add_task(store, f"worker {worker} task {i}")
+    store.close()
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_parallel_writers_lose_nothing(tmp_path, monkeypatch, backend):
+    use_tmp_store(tmp_path, monkeypatch, backend)
+    jobs = [(selene.DATA_FILE, selene.DB_FILE, backend, w) for w in range(4)]
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        pool.map(_add_tasks, jobs)
+
+    store = selene.open_store()
+    tasks = store.tasks()
+    assert len(tasks) == 100 and len({t["id"] for t in tasks}) == 100
+    assert len(store.search("worker", "task")) == 100
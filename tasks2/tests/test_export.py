@@ -0,0 +1,111 @@
+import gzip
+import json
+import sys
+import pathlib
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+import selene
+import selene_export
+from conftest import run, use_tmp_store
+
+
+def fill(tmp_path):
+    run("task-add", "Buy iron supplements", "--tags", "health")
+    run("task-add", "Write report")
+    run("note-add", "Cramps journal", "--body", "Started at 10am — eased by noon")
+    rows = [json.dumps({"date": f"2025-{m:02d}-{d:02d}", "phase": "start" if d == 1 else "note"})
+            for m in range(1, 13) for d in (1, 10, 20)]
+    (tmp_path / "cycles.jsonl").write_text("\n".join(rows) + "\n")
+    run("import", "cycle", "cycles.jsonl")
+
+
+def read_ndjson(path):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_ndjson_export_streams_every_record(tmp_path, monkeypatch, backend):
+    use_tmp_store(tmp_path, monkeypatch, backend)
+    fill(tmp_path)
+
+    run("export", "--format", "ndjson", "--compress", "gzip")
+    lines = read_ndjson(tmp_path / "selene_export.ndjson.gz")
+
+    assert [r["kind"] for r in lines] == ["task"] * 2 + ["note"] + ["cycle"] * 36
+    assert lines[2]["body"] == "Started at 10am — eased by noon"
+    assert [r["date"] for r in lines[3:]] == sorted(r["date"] for r in lines[3:])
+    snapshot = selene.open_store().snapshot()
+    assert [{k: v for k, v in r.items() if k != "kind"} for r in lines[:2]] == snapshot["tasks"]
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_ndjson_export_filters(tmp_path, monkeypatch, capsys, backend):
+    use_tmp_store(tmp_path, monkeypatch, backend)
+    fill(tmp_path)
+    capsys.readouterr()
+
+    run("export", "--format", "ndjson", "--kinds", "cycle", "--from", "2025-03-10", "--to", "2025-05-01",
+        "--path", "-")
+    dates = [json.loads(line)["date"] for line in capsys.readouterr().out.splitlines()]
+    assert dates == ["2025-03-10", "2025-03-20", "2025-04-01", "2025-04-10", "2025-04-20", "2025-05-01"]
+
+    run("export", "--format", "ndjson", "--kinds", "task", "note", "--to", "2000-01-01", "--path", "-")
+    assert capsys.readouterr().out == ""
+
+
+def test_chunked_export_resumes(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    fill(tmp_path)
+    run("export", "--format", "ndjson", "--chunk-records", "10", "--path", "full")
+    manifest = json.loads((tmp_path / "full.manifest.json").read_text())
+    assert [c["records"] for c in manifest["chunks"]] == [10, 10, 10, 9] and manifest["complete"]
+    everything = [r for c in manifest["chunks"] for r in read_ndjson(tmp_path / c["file"])]
+    assert len(everything) == 39
+
+    # an export interrupted after two chunks
+    store = selene.open_store()
+    selene_export.export_chunks(store, "part", 10)
+    manifest = json.loads((tmp_path / "part.manifest.json").read_text())
+    for c in manifest["chunks"][2:]:
+        (tmp_path / c["file"]).unlink()
+    manifest["chunks"], manifest["complete"] = manifest["chunks"][:2], False
+    (tmp_path / "part.manifest.json").write_text(json.dumps(manifest))
+
+    with pytest.raises(ValueError, match="different options"):
+        run("export", "--format", "ndjson", "--chunk-records", "5", "--path", "part", "--resume")
+    run("export", "--format", "ndjson", "--chunk-records", "10", "--path", "part", "--resume")
+    manifest = json.loads((tmp_path / "part.manifest.json").read_text())
+    assert manifest["complete"] and len(manifest["chunks"]) == 4
+    assert [r for c in manifest["chunks"] for r in read_ndjson(tmp_path / c["file"])] == everything
+
+
+def test_exported_file_imports_back(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    fill(tmp_path)
+    run("export", "--format", "ndjson", "--kinds", "cycle", "--path", "cycles.ndjson")
+    monkeypatch.setattr("selene.DATA_FILE", str(tmp_path / "copy.json"))
+
+    run("import", "cycle", "cycles.ndjson")
+
+    assert [e["date"] for e in selene.open_store().cycle_logs()] == [r["date"] for r in read_ndjson("cycles.ndjson")]
+
+
+def test_note_text_survives_an_export_import_round_trip(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    body = "  - iron\n  - folate\n\nask about ferritin\n"
+    run("note-add", " Labs ", "--body", body, "--tags", "health")
+    run("export", "--format", "ndjson", "--kinds", "note", "--path", "notes.ndjson")
+    monkeypatch.setattr("selene.DATA_FILE", str(tmp_path / "copy.json"))
+
+    run("import", "note", "notes.ndjson")
+
+    note = selene.open_store().get_note(1)
+    assert (note["title"], note["body"], note["tags"]) == (" Labs ", body, ["health"])
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import sys
+import pathlib
+import threading
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import selene
+from selene_http import SeleneApp, StorePool
+
+
+def test_api_keeps_users_apart_and_flushes_evicted_stores(tmp_path):
+    async def scenario():
+        pool = StorePool(str(tmp_path), max_open=1, flush_interval=60)
+        app = SeleneApp(pool)
+
+        async def call(method, target, body=None):
+            return await app.dispatch(method, target, json.dumps(body).encode() if body else b"")
+
+        status, task = await call("POST", "/users/ana/tasks", {"title": "Buy iron", "energy": "low"})
+        assert (status, task["id"]) == (201, 1)
+        assert (await call("POST", "/users/ana/tasks/1/done"))[0] == 200
+        assert (await call("POST", "/users/ana/tasks/7/done"))[0] == 404
+        assert (await call("POST", "/users/ana/cycle", {"date": "2025-13-01", "phase": "start"}))[0] == 400
+        assert (await call("PUT", "/users/ana/tasks"))[0] == 405
+        assert (await call("GET", "/users/../tasks"))[0] == 400
+
+        # bo's first request evicts ana (max_open=1); ana's buffered writes must reach disk
+        status, notes = await call("GET", "/users/bo/notes")
+        assert (status, notes) == (200, [])
+        await asyncio.sleep(0)
+        await pool.close_all()
+
+    asyncio.run(scenario())
+    data = selene.load_data(str(tmp_path / "ana" / "selene_data.json"))
+    assert [(t["title"], t["status"]) for t in data["tasks"]] == [("Buy iron", "done")]
+
+
+def test_a_slow_request_stalls_neither_other_users_nor_the_loop(tmp_path, monkeypatch):
+    bo_done = threading.Event()
+
+    def slow_analytics(store, max_day):
+        assert bo_done.wait(5), "bo's request never ran while ana's was busy"
+        return {"max_day": max_day}
+
+    monkeypatch.setattr(selene, "cycle_analytics", slow_analytics)
+
+    async def scenario():
+        pool = StorePool(str(tmp_path), flush_interval=60)
+        app = SeleneApp(pool)
+
+        async def bo():
+            await asyncio.sleep(0.05)  # ana's request is already in its worker thread
+            result = await app.dispatch("GET", "/users/bo/tasks", b"")
+            bo_done.set()
+            return result
+
+        ana, bo = await asyncio.gather(app.dispatch("GET", "/users/ana/cycle/analytics", b""), bo())
+        assert ana == (200, {"max_day": 35}) and bo == (200, [])
+
+        # ana's reads wait for her lock, like her writes
+        async with pool.lock("ana"):
+            read = asyncio.create_task(app.dispatch("GET", "/users/ana/tasks", b""))
+            await asyncio.sleep(0.05)
+            assert not read.done()
+        assert await read == (200, [])
+        await pool.close_all()
+
+    asyncio.run(scenario())
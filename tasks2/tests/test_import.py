@@ -0,0 +1,98 @@
+import json
+import sys
+import pathlib
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+import selene
+from selene_cycles import compute_stats
+from conftest import run, use_tmp_store
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_import_jsonl_and_csv(tmp_path, monkeypatch, capsys, backend):
+    use_tmp_store(tmp_path, monkeypatch, backend)
+    run("task-add", "Existing task")
+    (tmp_path / "tasks.jsonl").write_text("\n".join([
+        json.dumps({"title": "Study", "due": "2025-12-01", "tags": ["school"], "energy": "high"}),
+        json.dumps({"title": "Bad due", "due": "someday"}),
+        "{not json",
+        json.dumps({"title": "Read", "tags": "books; calm", "status": "done"}),
+        "",
+        json.dumps({"title": "Run"}),
+    ]) + "\n")
+    (tmp_path / "notes.csv").write_text('title,body,tags\nCramps,"Started, then eased",cycle;health\n,no title,\n')
+    capsys.readouterr()
+
+    run("import", "task", "tasks.jsonl", "--batch-size", "2")
+    out = capsys.readouterr().out
+    assert "line 2: Invalid date" in out and "line 3: Not valid JSON" in out
+    assert "Imported 3 task records in 3 batches, skipped 2 invalid" in out
+    run("import", "note", "notes.csv")
+    assert "skipped 1 invalid" in capsys.readouterr().out
+
+    store = selene.open_store()
+    tasks = store.tasks()
+    assert [(t["id"], t["title"], t["status"]) for t in tasks] == [
+        (1, "Existing task", "open"), (2, "Study", "open"), (3, "Read", "done"), (4, "Run", "open"),
+    ]
+    assert tasks[2]["tags"] == ["books", "calm"]
+    assert store.get_note(1)["body"] == "Started, then eased"
+    assert [t["id"] for t in store.search("study", "task")] == [2]
+    assert [t["id"] for t in store.tasks(tags="school")] == [2]
+    store.close()
+
+    run("task-add", "After import")
+    assert selene.open_store().tasks()[-1]["id"] == 5
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_import_cycles_keeps_aggregates_exact(tmp_path, monkeypatch, backend):
+    use_tmp_store(tmp_path, monkeypatch, backend)
+    run("cycle-log", "2025-03-01", "--phase", "start")
+    # out of order and back-filled, split over several batches
+    rows = ["date,phase,symptoms,mood"]
+    for month in (6, 2, 5, 1, 4):
+        rows.append(f"2025-{month:02d}-0{month},start,cramps;fatigue,tired")
+        rows.append(f"2025-{month:02d}-1{month},note,,")
+    (tmp_path / "cycles.csv").write_text("\n".join(rows) + "\n")
+
+    run("import", "cycle", "cycles.csv", "--batch-size", "3")
+
+    store = selene.open_store()
+    logs = store.cycle_logs()
+    assert len(logs) == 11 and [e["date"] for e in logs] == sorted(e["date"] for e in logs)
+    assert store.cycle_stats() == compute_stats(logs)
+    assert store.cycle_stats()["symptoms"] == {"cramps": 5, "fatigue": 5}
+    store.close()
+
+
+def test_strict_import_stops_before_the_bad_batch(tmp_path, monkeypatch, capsys):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    (tmp_path / "notes.jsonl").write_text(
+        "".join(json.dumps({"title": f"Note {i}"}) + "\n" for i in range(5)) + json.dumps({"body": "?"}) + "\n"
+    )
+    with pytest.raises(ValueError, match="line 6: A note needs a title"):
+        run("import", "note", "notes.jsonl", "--batch-size", "4", "--strict")
+    assert sorted(n["title"] for n in selene.open_store().notes()) == [f"Note {i}" for i in range(4)]
+
+
+def test_bulk_import_writes_one_journal_append_per_batch(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    monkeypatch.setattr("selene.JOURNAL_COMPACT_BYTES", 10**9)
+    appends = []
+    real = selene.append_journal
+    monkeypatch.setattr("selene.append_journal", lambda ops, path=None: appends.append(len(ops)) or real(ops, path))
+    (tmp_path / "c.jsonl").write_text(
+        "".join(json.dumps({"date": f"2025-01-{d:02d}", "phase": "note"}) + "\n" for d in range(1, 26))
+    )
+
+    run("import", "cycle", "c.jsonl", "--batch-size", "10")
+
+    assert appends == [10, 10, 5]
+    assert len(selene.load_data()["cycle_logs"]) == 25
@@ -0,0 +1,223 @@
+import json
+import os
+import sys
+import pathlib
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+import selene
+from conftest import run, use_tmp_store
+
+
+def test_mutations_append_to_journal(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+
+    run("task-add", "Buy iron supplements", "--tags", "health")
+    run("task-add", "Write report")
+    run("task-done", "1")
+    run("task-del", "2")
+    run("note-add", "Cramps journal", "--body", "Started at 10am")
+    run("cycle-log", "2025-11-03", "--phase", "start")
+
+    # nothing rewrote the snapshot, every mutation is one journal line
+    assert not (tmp_path / "selene_data.json").exists()
+    lines = (tmp_path / "selene_data.journal").read_text().splitlines()
+    assert [json.loads(line)["op"] for line in lines] == [
+        "task_add", "task_add", "task_done", "task_delete", "note_add", "cycle_log",
+    ]
+
+    data = selene.load_data()
+    assert [(t["id"], t["status"]) for t in data["tasks"]] == [(1, "done")]
+    assert selene.JsonStore().get_note(1)["body"] == "Started at 10am"
+    assert data["cycle_logs"][0]["date"] == "2025-11-03"
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    monkeypatch.setattr("selene.JOURNAL_COMPACT_BYTES", 1)
+
+    run("task-add", "First")
+    assert not (tmp_path / "selene_data.journal").exists()
+    snapshot = json.loads((tmp_path / "selene_data.json").read_text())
+    assert snapshot["meta"]["seq"] == 1
+
+    # a journal left behind by a crash during compaction is not applied twice
+    (tmp_path / "selene_data.journal").write_text(
+        json.dumps({"seq": 1, "op": "task_add", "record": snapshot["tasks"][0]}) + "\n"
+    )
+    assert len(selene.load_data()["tasks"]) == 1
+
+
+def test_a_torn_last_line_does_not_swallow_later_appends(tmp_path, monkeypatch, capsys):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    run("task-add", "one")
+    run("task-add", "two")
+    journal = tmp_path / "selene_data.journal"
+    with open(journal, "a", encoding="utf-8") as f:
+        f.write('{"seq":3,"op":"task_add","record":{"id":3,"ti')  # crash mid-append
+
+    run("task-add", "three")
+    run("task-add", "four")
+    assert capsys.readouterr().out.splitlines()[-2:] == ["✨ Added task [3] three", "✨ Added task [4] four"]
+    lines = journal.read_text().splitlines()
+    assert [json.loads(line)["record"]["title"] for line in lines] == ["one", "two", "three", "four"]
+    assert [t["title"] for t in selene.load_data()["tasks"]] == ["one", "two", "three", "four"]
+
+    # a bad line in the middle (e.g. from an older version) is skipped, not the end of replay
+    journal.write_text(lines[0] + "\n" + lines[1][:20] + "\n" + "\n".join(lines[2:]) + "\n")
+    assert [t["title"] for t in selene.load_data()["tasks"]] == ["one", "three", "four"]
+
+
+def test_snapshot_cache_is_used_until_the_json_changes(tmp_path, monkeypatch):
+    snapshot = tmp_path / "selene_data.json"
+    monkeypatch.setattr("selene.DATA_FILE", str(snapshot))
+    data = selene.load_data()
+    data["tasks"].append({"id": 1, "title": "Cached", "status": "open"})
+    selene.save_data(data)
+    assert (tmp_path / "selene_data.cache").exists()
+
+    # a hit never parses the JSON
+    monkeypatch.setattr("selene.json.loads", lambda raw: pytest.fail("parsed JSON on a cache hit"))
+    assert selene.load_data()["tasks"][0]["title"] == "Cached"
+    # touched but unchanged: the hash still matches
+    os.utime(snapshot, ns=(0, 0))
+    assert selene.load_data()["tasks"][0]["title"] == "Cached"
+    monkeypatch.undo()
+
+    # edited behind our back: the cache is ignored and refreshed
+    monkeypatch.setattr("selene.DATA_FILE", str(snapshot))
+    snapshot.write_text(json.dumps({"tasks": [{"id": 1, "title": "Edited", "status": "open"}]}))
+    assert selene.load_data()["tasks"][0]["title"] == "Edited"
+    (tmp_path / "selene_data.cache").write_bytes(b"garbage")
+    assert selene.load_data()["tasks"][0]["title"] == "Edited"
+
+
+def test_note_bodies_live_in_the_blob(tmp_path, monkeypatch, capsys):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    run("note-add", "Cramps journal", "--body", "Started at 10am — eased by noon")
+    run("note-add", "Empty")
+
+    record = json.loads((tmp_path / "selene_data.journal").read_text().splitlines()[0])["record"]
+    assert "body" not in record and record["body_ref"][1] > 0
+    assert "eased by noon" in (tmp_path / "selene_data.bodies").read_text(encoding="utf-8")
+    assert all("body" not in n for n in selene.JsonStore().notes())
+
+    capsys.readouterr()
+    run("note-show", "1")
+    assert "Started at 10am — eased by noon" in capsys.readouterr().out
+    assert selene.JsonStore().get_note(2)["body"] == ""
+
+    # a note with an inline body (older files) still reads, and compact moves it out
+    run("compact")
+    snapshot = json.loads((tmp_path / "selene_data.json").read_text())
+    snapshot["notes"].append({"id": 3, "title": "Old", "body": "inline text", "tags": [],
+                              "created": "2025-01-01T00:00:00", "updated": "2025-01-01T00:00:00"})
+    (tmp_path / "selene_data.json").write_text(json.dumps(snapshot))
+    store = selene.JsonStore()
+    assert store.get_note(3)["body"] == "inline text"
+    store.compact()
+    snapshot = json.loads((tmp_path / "selene_data.json").read_text())
+    assert all("body" not in n for n in snapshot["notes"])
+
+    run("export", "--path", str(tmp_path / "out.json"))
+    exported = json.loads((tmp_path / "out.json").read_text())
+    assert [n["body"] for n in exported["notes"]] == ["Started at 10am — eased by noon", "", "inline text"]
+
+
+def test_ids_come_from_a_persisted_counter(backend):
+    run("task-add", "One")
+    run("task-add", "Two")
+    run("task-del", "2")
+    run("task-add", "Three")
+    store = selene.open_store()
+    assert [t["id"] for t in store.tasks()] == [1, 3], backend
+    assert store.get_task(2) is None and store.get_task(3)["title"] == "Three"
+    run("task-done", "3")
+    assert selene.open_store().get_task(3)["status"] == "done"
+
+
+def test_cycle_logs_stay_sorted_with_a_start_index(backend):
+    for day, phase in [("2025-11-03", "start"), ("2025-09-08", "start"), ("2025-10-06", "start"),
+                       ("2025-10-06", "note"), ("2025-11-07", "end")]:
+        run("cycle-log", day, "--phase", phase)
+    store = selene.open_store()
+    assert [(e["date"], e["phase"]) for e in store.cycle_logs()] == [
+        ("2025-09-08", "start"), ("2025-10-06", "start"), ("2025-10-06", "note"),
+        ("2025-11-03", "start"), ("2025-11-07", "end"),
+    ], backend
+    assert [d.isoformat() for d in store.recent_starts(2)] == ["2025-10-06", "2025-11-03"]
+    assert selene.predict_next_start(store)["next_start"] == "2025-12-01"
+
+
+def test_cycle_aggregates_are_maintained_incrementally(backend, tmp_path, capsys):
+    logs = [("2025-09-08", "start", ["cramps"]), ("2025-11-03", "start", ["cramps", "fatigue"]),
+            ("2025-10-06", "start", []), ("2025-10-20", "note", ["fatigue"]), ("2025-08-10", "start", [])]
+    for day, phase, symptoms in logs:
+        run("cycle-log", day, "--phase", phase, *(["--symptoms", *symptoms] if symptoms else []))
+    store = selene.open_store()
+    stats = store.cycle_stats()
+    # back-filled starts split cycles: gaps are 29, 28, 28
+    assert (stats["cycles"], stats["length_sum"], stats["length_sumsq"]) == (3, 85, 29**2 + 2 * 28**2)
+    assert stats["last_start"] == "2025-11-03" and stats["symptoms"] == {"cramps": 2, "fatigue": 2}
+    assert stats == selene.compute_stats(store.cycle_logs()), backend
+
+    summary = selene.cycle_summary(store)
+    assert (summary["avg"], summary["cycles"], round(summary["mean"], 2)) == (28, 3, 28.33)
+    capsys.readouterr()
+    run("cycle-rebuild")
+    assert "5 logs (4 starts)" in capsys.readouterr().out
+    assert selene.open_store().cycle_stats() == stats
+
+    if backend == "sqlite":
+        # rows written by the root logger straight into the table are picked up
+        import sqlite3
+        with sqlite3.connect(tmp_path / "selene.db") as conn:
+            conn.execute("INSERT INTO cycle_log (log_date, phase, symptoms, mood) VALUES "
+                         "('2025-12-01', 'start', 'cramps', '')")
+        stats = selene.open_store().cycle_stats()
+        assert (stats["last_start"], stats["cycles"], stats["symptoms"]["cramps"]) == ("2025-12-01", 4, 3)
+
+
+def test_plan_and_task_list_limit(tmp_path, monkeypatch, capsys):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    for title, due, energy in [("Draft essay", "2025-12-01", "high"), ("Tidy notes", "2025-11-01", "low"),
+                               ("Call clinic", None, None), ("Pitch deck", "2025-11-15", "creative")]:
+        run("task-add", title, *(["--due", due] if due else []), *(["--energy", energy] if energy else []))
+    store = selene.JsonStore()
+    # identical to a full sort, cut to the limit
+    assert [t["title"] for t in selene.list_tasks(store, limit=2)] == ["Tidy notes", "Pitch deck"]
+    assert [t["title"] for t in selene.plan_tasks(store, limit=3)["tasks"]] == [
+        "Pitch deck", "Draft essay", "Call clinic",
+    ]
+    capsys.readouterr()
+    run("plan", "--limit", "1")
+    out = capsys.readouterr().out
+    assert "Pitch deck" in out and "Draft essay" not in out
+    run("task-list", "--sort", "title", "--limit", "1")
+    assert "Call clinic" in capsys.readouterr().out.strip()
+
+
+def test_due_index_and_agenda(backend, capsys):
+    for title, due in [("Rent", "2025-12-01"), ("Dentist", "2025-11-20"), ("Someday", None),
+                       ("Essay", "2025-11-20"), ("Taxes", "2025-11-02"), ("Renew", "2025-11-25")]:
+        run("task-add", title, *(["--due", due] if due else []))
+    run("task-done", "6")  # Renew
+    run("task-del", "4")   # Essay
+    store = selene.open_store()
+    titles = [t["title"] for t in selene.agenda(store, "2025-11-20", "2025-12-01")]
+    assert titles == ["Dentist", "Rent"], backend
+    assert [t["title"] for t in selene.agenda(store, None, "2025-11-20")] == ["Taxes", "Dentist"]
+    assert [t["title"] for t in selene.overdue(store, selene.parse_date("2025-11-21"))] == ["Taxes", "Dentist"]
+
+    capsys.readouterr()
+    run("task-agenda", "--from", "2025-11-01", "--to", "2025-11-30")
+    out = capsys.readouterr().out
+    assert "📅 2025-11-02 (overdue)" in out and "Dentist" in out and "Rent" not in out
+    if backend == "json":
+        run("compact")  # the index is rebuilt the same from a snapshot
+        assert [t["title"] for t in selene.agenda(selene.open_store())] == ["Taxes", "Dentist", "Rent"]
@@ -0,0 +1,103 @@
+import json
+import sys
+import pathlib
+import tracemalloc
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+import selene
+from selene_records import CycleEntry, Note, Task, json_default
+from conftest import use_tmp_store
+
+
+TASK = {"id": 7, "title": "Buy iron", "due": "2025-11-24", "tags": ["health"], "energy": "low",
+        "status": "open", "created": "2025-11-03T10:15:00", "updated": "2025-11-04T08:00:05"}
+
+
+def test_packs_dates_and_interns_repeated_values():
+    t = Task.from_dict(json.loads(json.dumps(TASK)))
+    assert (t.due, t.created, t.updated) == (20251124, 20251103101500, 20251104080005)
+    other = Task.from_dict(json.loads(json.dumps(TASK)))
+    assert other.tags[0] is t.tags[0] and other.energy is t.energy
+    assert t.extra is None and t.to_dict() == TASK
+    assert t["due"] == "2025-11-24" and t.get("energy") == "low" and "body" not in t
+    assert t == TASK and dict(t) == TASK
+
+
+@pytest.mark.parametrize("record", [
+    {**TASK, "due": "next week"},                        # free text from before dues were checked
+    {**TASK, "due": "2025-11-24T09:00", "created": "2025-11-03T10:15:00.250000+01:00"},
+    {k: v for k, v in TASK.items() if k not in ("energy", "updated")},  # older files lack fields
+    {**TASK, "priority": 2, "tags": "health"},          # hand-added key, tags not a list
+    {**TASK, "created": None, "updated": "not a date"},
+])
+def test_unusual_values_round_trip_exactly(record):
+    t = Task.from_dict(record)
+    assert t.to_dict() == record
+    assert Task.from_row(t.row()).to_dict() == record
+
+
+def test_unparseable_values_still_sort():
+    odd = Task.from_dict({**TASK, "due": "next week", "updated": "yesterday"})
+    assert odd.due is None and odd.updated == 0
+    assert Task.from_dict({**TASK, "due": "2025-11-24T09:00"}).due == 20251124
+
+
+def test_notes_and_cycle_entries():
+    n = Note.from_dict({"id": 1, "title": "Cramps", "body_ref": [0, 12], "tags": [],
+                        "created": "2025-11-03T10:15:00", "updated": "2025-11-03T10:15:00"})
+    assert "body" not in n and n["body_ref"] == [0, 12] and n.created is n.updated
+    assert "body_ref" not in n.replace(body="x", body_ref=...)
+    e = CycleEntry.from_dict({"date": "2025-11-03", "phase": "start", "symptoms": ["cramps"], "mood": "",
+                              "note": "", "created": "2025-11-03T10:15:00"})
+    assert e.date == 20251103 and e["date"] == "2025-11-03"
+    e["phase"] = "note"
+    assert e.to_dict()["phase"] == "note"
+    assert json.loads(json.dumps([e], default=json_default))[0]["date"] == "2025-11-03"
+
+
+def test_records_take_a_fraction_of_the_dicts_memory():
+    rows = [json.dumps({**TASK, "id": i, "title": f"Task {i}"}) for i in range(5000)]
+
+    def traced(build):
+        tracemalloc.start()
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return kept, size
+
+    _, as_dicts = traced(lambda: [json.loads(r) for r in rows])
+    _, as_records = traced(lambda: [Task.from_dict(json.loads(r)) for r in rows])
+    assert as_records < as_dicts / 2
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_stores_hand_out_records_and_save_the_json_schema(tmp_path, monkeypatch, backend):
+    use_tmp_store(tmp_path, monkeypatch, backend)
+    store = selene.open_store()
+    added = selene.add_task(store, "Buy iron", due="2025-11-24", tags=["health"], energy="low")
+    selene.add_task(store, "Study", due="2025-11-20")
+    selene.log_cycle(store, "2025-11-03", "start", ["cramps"])
+
+    tasks = selene.list_tasks(store)
+    assert all(isinstance(t, Task) for t in tasks)
+    assert [t["title"] for t in tasks] == ["Study", "Buy iron"]
+    assert tasks[1] == added
+    assert [t.id for t in selene.agenda(store, "2025-11-21", "2025-11-30")] == [1]
+    assert isinstance(store.cycle_logs()[0], CycleEntry)
+    store.close()
+
+    if backend == "json":
+        selene.JsonStore().compact()
+        on_disk = json.loads((tmp_path / "selene_data.json").read_text())
+        assert on_disk["tasks"][0] == added
+        assert on_disk["cycle_logs"][0]["date"] == "2025-11-03"
+        # reloaded from the marshal cache, then from the JSON alone
+        assert selene.JsonStore().get_task(1) == added
+        (tmp_path / "selene_data.cache").unlink()
+        assert selene.JsonStore().get_task(1) == added
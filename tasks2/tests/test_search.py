@@ -0,0 +1,74 @@
+import os
+import sys
+import pathlib
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import selene
+from conftest import run, use_tmp_store
+
+
+def test_search_ranks_by_bm25(backend):
+    for i in range(6):
+        run("note-add", f"Groceries {i}", "--body", "milk eggs, and one line about cramps")
+    run("note-add", "Cramps journal", "--body", "cramps started at 10am, cramps eased by noon")
+    run("task-add", "Buy heat pad for cramps")
+    run("task-add", "Write report")
+
+    store = selene.open_store()
+    notes = store.search("cramps", "note")
+    assert len(notes) == 7
+    assert notes[0]["title"] == "Cramps journal"
+    # multi-term: both terms beat either one alone; prefixes match whole words
+    assert store.search("heat cramp", "task")[0]["title"] == "Buy heat pad for cramps"
+    assert store.search("what about the dentist", "task") == []
+    assert store.search("report", "task")[0]["title"] == "Write report"
+
+
+def test_chat_returns_best_hits_first(backend, capsys):
+    for i in range(8):
+        run("note-add", f"Day {i}", "--body", "felt ok, a little tired")
+    run("note-add", "Tired all week", "--body", "so tired, tired every afternoon")
+    capsys.readouterr()
+
+    run("chat", "why", "am", "I", "tired")
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1].startswith("• Note#9: Tired all week")
+    assert len([line for line in lines if line.startswith("• Note")]) == 5
+
+
+def test_index_follows_writes_and_rebuilds_when_stale(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    run("task-add", "Refill prescription")
+    run("task-add", "Call pharmacy about prescription")
+    run("task-del", "1")
+    assert [t["id"] for t in selene.open_store().search("prescription", "task")] == [2]
+
+    os.remove(tmp_path / "selene_data.search.db")
+    run("note-add", "Prescription notes")
+    store = selene.open_store()
+    assert [t["id"] for t in store.search("prescription", "task")] == [2]
+    assert [n["id"] for n in store.search("prescription", "note")] == [1]
+
+
+def test_typos_match_and_substrings_are_pruned(backend):
+    run("note-add", "Cramps journal", "--body", "cramps started at 10am; heating pad helped")
+    run("note-add", "Groceries", "--body", "milk, eggs, spinach")
+    run("task-add", "Refill prescription")
+    run("task-add", "Call the pharmacy")
+    run("task-del", "1")
+
+    store = selene.open_store()
+    assert [n["title"] for n in store.search("cramsp", "note")] == ["Cramps journal"]
+    assert [t["title"] for t in store.search("pharmacey", "task")] == ["Call the pharmacy"]
+    assert store.search("prescription", "task") == []  # deleted docs leave the fuzzy vocabulary too
+
+    assert [n["title"] for n in store.search("ating pa", "note", substring=True)] == ["Cramps journal"]
+    assert [n["title"] for n in store.search("MILK, E", "note", substring=True)] == ["Groceries"]
+    assert store.search("eggs spinach", "note", substring=True) == []
+    assert [t["title"] for t in store.search("l", "task", substring=True)] == ["Call the pharmacy"]
+    index = store._search_index()
+    assert index.substring_candidates("pad helped", "note") == {1}
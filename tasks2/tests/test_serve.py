@@ -0,0 +1,77 @@
+import sys
+import json
+import os
+import pathlib
+import subprocess
+import threading
+import time
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import selene
+from selene_client import call
+from selene_serve import SeleneServer
+
+
+def test_daemon_serves_commands_with_write_behind(tmp_path, monkeypatch):
+    monkeypatch.setattr("selene.DATA_FILE", str(tmp_path / "selene_data.json"))
+    monkeypatch.setattr("selene.BACKEND", "json")
+    store = selene.JsonStore(flush_interval=60)
+    monkeypatch.setattr("selene._SERVED_STORE", store)
+    sock = str(tmp_path / "s.sock")
+    server = SeleneServer(sock, store, "json")
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01})
+    thread.start()
+    try:
+        assert call(["task-add", "Buy iron supplements", "--tags", "health"], sock) == (
+            0, "✨ Added task [1] Buy iron supplements\n",
+        )
+        code, out = call(["task-list"], sock)
+        assert code == 0 and "Buy iron supplements" in out
+        code, out = call(["task-done", "nope"], sock)
+        assert code == 2 and "invalid int value" in out
+        assert call(["serve"], sock)[0] == 2
+        assert call(["--backend", "json", "task-list"], sock)[0] == 0
+        code, out = call(["--backend", "sqlite", "task-list"], sock)
+        assert code == 2 and "serves the json store" in out
+
+        trace = tmp_path / "trace.ndjson"
+        code, out = call(["--profile", "--profile-file", str(trace), "task-list"], sock)
+        assert code == 0 and "⏱  task-list" in out
+        assert json.loads(trace.read_text())["records"]["list_tasks"] == 1
+
+        # the write is held in memory inside the durability window
+        journal = tmp_path / "selene_data.journal"
+        assert not journal.exists()
+        store.flush_interval = 0
+        call(["note-add", "Cramps journal"], sock)
+        call(["task-list"], sock)  # service_actions runs between requests
+        assert len(journal.read_text().splitlines()) == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+    assert [t["title"] for t in selene.load_data()["tasks"]] == ["Buy iron supplements"]
+
+
+def test_serve_uses_the_backend_given_to_selene_py(tmp_path):
+    sock = str(tmp_path / "s.sock")
+    daemon = subprocess.Popen(
+        [sys.executable, str(ROOT / "selene.py"), "--backend", "sqlite", "serve", "--socket", sock],
+        cwd=tmp_path, stdout=subprocess.PIPE, text=True, env={**os.environ, "SELENE_BACKEND": "json"},
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(sock):
+            assert daemon.poll() is None and time.monotonic() < deadline
+            time.sleep(0.02)
+        assert call(["task-add", "Buy iron supplements"], sock)[0] == 0
+    finally:
+        daemon.terminate()
+        out, _ = daemon.communicate(timeout=10)
+    assert out.startswith("🌙 Serving sqlite store")
+    assert (tmp_path / "selene.db").exists() and not (tmp_path / "selene_data.journal").exists()
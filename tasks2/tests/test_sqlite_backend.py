@@ -0,0 +1,77 @@
+import json
+import sqlite3
+import sys
+import pathlib
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import selene
+from selene_sqlite import SqliteStore
+from conftest import run, use_tmp_store
+
+
+def test_sqlite_backend_commands(tmp_path, monkeypatch, capsys):
+    use_tmp_store(tmp_path, monkeypatch, "sqlite")
+
+    run("task-add", "Buy iron supplements", "--due", "2025-11-24", "--tags", "health")
+    run("task-add", "Write report")
+    run("task-done", "2")
+    run("note-add", "Cramps journal", "--body", "Started at 10am", "--tags", "cycle")
+    run("note-add", "Groceries")
+    run("cycle-log", "2025-11-03", "--phase", "start", "--symptoms", "cramps", "fatigue")
+    run("cycle-log", "2025-10-06", "--phase", "start")
+    capsys.readouterr()
+
+    run("task-list")
+    out = capsys.readouterr().out
+    assert "Buy iron supplements" in out and "Write report" not in out
+
+    run("note-list", "--tag", "cycle")
+    out = capsys.readouterr().out
+    assert "Cramps journal" in out and "Groceries" not in out
+
+    run("cycle-show", "--last", "1")
+    out = capsys.readouterr().out
+    assert out.startswith("2025-11-03 | start") and "cramps, fatigue" in out
+
+    run("cycle-predict")
+    assert "2025-12-01" in capsys.readouterr().out
+
+    run("export", "--path", str(tmp_path / "export.json"))
+    exported = json.loads((tmp_path / "export.json").read_text())
+    assert [t["title"] for t in exported["tasks"]] == ["Buy iron supplements", "Write report"]
+    assert [e["date"] for e in exported["cycle_logs"]] == ["2025-10-06", "2025-11-03"]
+
+
+def test_sqlite_filters_use_indexes(tmp_path):
+    store = SqliteStore(str(tmp_path / "selene.db"))
+    plans = {
+        "status": "SELECT id FROM tasks WHERE status = 'open'",
+        "tag": "SELECT note_id FROM note_tags WHERE tag = 'cycle'",
+        "last": "SELECT log_date FROM cycle_log ORDER BY log_date DESC LIMIT 5",
+    }
+    for name, sql in plans.items():
+        detail = " ".join(r[-1] for r in store.conn.execute("EXPLAIN QUERY PLAN " + sql))
+        assert "USING" in detail and "SCAN tasks" not in detail, (name, detail)
+
+
+def test_migrate_json_store_keeps_root_schema(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    run("task-add", "Study", "--tags", "school")
+    run("note-add", "Idea", "--body", "text")
+    run("cycle-log", "2025-11-03", "--phase", "start", "--symptoms", "cramps", "--mood", "low")
+    json_snapshot = selene.JsonStore().snapshot()
+
+    run("migrate")
+    migrated = SqliteStore(str(tmp_path / "selene.db")).snapshot()
+    for key in ("tasks", "notes", "cycle_logs"):
+        assert migrated[key] == json_snapshot[key]
+
+    # the root selene.py logger reads the same cycle_log table
+    row = sqlite3.connect(tmp_path / "selene.db").execute(
+        "SELECT log_date, phase, symptoms, mood FROM cycle_log"
+    ).fetchone()
+    assert row == ("2025-11-03", "start", "cramps", "low")
@@ -0,0 +1,46 @@
+import sys
+import pathlib
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+import selene
+import selene_startup
+from selene_cycles import interval_halfwidth
+
+
+def test_only_the_selected_subparser_is_built():
+    parser = selene.build_parser(["--backend", "json", "task-add", "Buy iron", "--due", "2025-11-24"])
+    args = parser.parse_args(["--backend", "json", "task-add", "Buy iron", "--due", "2025-11-24"])
+    assert args.func is selene.task_add and args.due == "2025-11-24"
+    with pytest.raises(SystemExit):
+        parser.parse_args(["task-list"])  # never built
+
+    assert selene.selected_command(["-h", "task-add"]) is None  # top-level help lists every command
+    # option values that happen to be command names are skipped
+    assert selene.selected_command(["--profile-file", "plan", "task-list"]) == "task-list"
+    assert selene.selected_command(["--profile-f", "cycle-stats", "--profile", "plan"]) == "plan"
+    assert selene.selected_command(["--profile-file=plan", "chat", "iron"]) == "chat"
+    argv = ["--profile-file", "plan", "task-add", "Buy iron"]
+    assert selene.build_parser(argv).parse_args(argv).func is selene.task_add
+    full = selene.build_parser()  # what the serve daemon uses
+    assert full.parse_args(["task-list"]).func is selene.task_list
+    assert full.parse_args(["migrate"]).func is selene.migrate
+
+
+def test_everyday_commands_import_only_what_they_need(tmp_path):
+    for argv in selene_startup.COMMANDS:
+        imported = selene_startup.imports(argv, tmp_path)
+        assert "selene_records" in imported  # selene.py itself runs as __main__
+        assert not selene_startup.NEVER_AT_STARTUP & imported.keys(), argv
+
+
+def test_prediction_window_needs_no_numpy():
+    from datetime import date
+    starts = [date(2025, 1, 1), date(2025, 1, 29), date(2025, 2, 27), date(2025, 3, 27)]
+    assert interval_halfwidth(starts[:2]) is None
+    assert interval_halfwidth(starts) == pytest.approx(1.2816 * (1 / 3) ** 0.5 * (4 / 3) ** 0.5)
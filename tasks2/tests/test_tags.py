@@ -0,0 +1,51 @@
+import sys
+import pathlib
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+import selene
+from selene_tags import parse
+from conftest import run
+
+
+def test_parse_precedence_and_errors():
+    assert parse("health & !archive") == ("and", [("tag", "health"), ("not", ("tag", "archive"))])
+    assert parse("a | b & c") == ("or", [("tag", "a"), ("and", [("tag", "b"), ("tag", "c")])])
+    assert parse("(a | b) & c") == ("and", [("or", [("tag", "a"), ("tag", "b")]), ("tag", "c")])
+    for bad in ["", "a &", "(a | b", "a b", "a & | b"]:
+        with pytest.raises(ValueError):
+            parse(bad)
+
+
+def test_tag_expressions_filter_tasks_and_notes(backend, capsys):
+    run("task-add", "Iron", "--tags", "health")
+    run("task-add", "Old checkup", "--tags", "health", "archive")
+    run("task-add", "Essay", "--tags", "school", "urgent")
+    run("task-add", "Standup", "--tags", "work")
+    run("task-add", "Untagged")
+    run("task-del", "1")
+    run("task-add", "Iron again", "--tags", "health")
+    run("note-add", "Cramps", "--tags", "cycle", "health")
+    run("note-add", "Archived cramps", "--tags", "cycle", "archive")
+
+    store = selene.open_store()
+
+    def titles(expr, status="all"):
+        return [t["title"] for t in store.tasks(status, expr)]
+
+    assert titles("health & !archive") == ["Iron again"]
+    assert titles("(school | work) & !urgent") == ["Standup"]
+    assert titles("!health") == ["Essay", "Standup", "Untagged"]
+    assert titles("nosuchtag | work") == ["Standup"]
+    assert [n["title"] for n in store.notes(tags="cycle & !archive")] == ["Cramps"]
+    assert [n["title"] for n in store.notes(tag="archive")] == ["Archived cramps"]
+
+    capsys.readouterr()
+    run("task-list", "--tags", "health | school")
+    out = capsys.readouterr().out
+    assert "Iron again" in out and "Essay" in out and "Old checkup" in out and "Standup" not in out
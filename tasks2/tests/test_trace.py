@@ -0,0 +1,79 @@
+import sys
+import json
+import pathlib
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+import selene
+import selene_trace
+from conftest import use_tmp_store
+
+
+def main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["selene.py", *argv])
+    selene.main()
+
+
+def traces(path="selene_trace.ndjson"):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_profile_records_phases_counts_and_bytes(tmp_path, monkeypatch, capsys, backend):
+    use_tmp_store(tmp_path, monkeypatch, backend)
+    for title in ("Buy iron", "Call clinic", "Stretch"):
+        main(monkeypatch, "task-add", title, "--tags", "health")
+    assert not (tmp_path / "selene_trace.ndjson").exists()  # nothing unless asked
+
+    main(monkeypatch, "--profile", "task-list", "--limit", "2")
+    main(monkeypatch, "--profile", "task-add", "Rest", "--due", "2025-13-40")  # invalid date
+
+    out = capsys.readouterr()
+    assert out.out.count("🕓") == 2 and "⏱  task-list" in out.err
+    listed, failed = traces()
+    assert listed["command"] == "task-list" and listed["status"] == "ok" and listed["options"] == ["--profile", "--limit"]
+    phases = listed["phases_ms"]
+    assert {"cli", "load", "query", "render"} <= phases.keys()
+    assert sum(phases.values()) == pytest.approx(listed["wall_ms"], abs=0.01)  # phases never overlap
+    assert listed["records"]["tasks"] == 3 and listed["records"]["list_tasks"] == 2
+    if backend == "json":
+        assert listed["records"]["loaded.tasks"] == 3 and listed["bytes"]["read"] > 0
+    assert failed["status"] == "error"
+    assert selene_trace.ACTIVE is None
+
+
+def test_env_var_traces_silently_and_captures(tmp_path, monkeypatch, capsys):
+    use_tmp_store(tmp_path, monkeypatch, "json")
+    monkeypatch.setenv("SELENE_TRACE_FILE", str(tmp_path / "runs.ndjson"))
+    monkeypatch.setenv("SELENE_TRACE", "cprofile")
+    main(monkeypatch, "note-add", "Cramps journal", "--body", "Started at 10am", "--tags", "cycle")
+    monkeypatch.setenv("SELENE_TRACE", "tracemalloc")
+    main(monkeypatch, "note-search", "cramps")
+    monkeypatch.setenv("SELENE_TRACE", "1")
+    main(monkeypatch, "export", "--format", "ndjson", "--path", "out.ndjson")
+
+    assert "⏱" not in capsys.readouterr().err
+    added, searched, exported = traces(tmp_path / "runs.ndjson")
+    assert added["phases_ms"]["save"] > 0 and added["records"]["written"] == 1
+    assert added["bytes"]["written"] >= len("Started at 10am")  # journal line and body
+    assert any("note_add" in f["function"] for f in added["cprofile"]["top"])
+    assert (tmp_path / "runs.prof").exists()
+    assert searched["records"]["search"] == 1 and searched["tracemalloc"]["peak_kb"] > 0
+    assert exported["records"]["exported"] == 1
+    assert exported["bytes"]["written"] == (tmp_path / "out.ndjson").stat().st_size
+
+
+def test_nested_phases_are_charged_to_the_innermost(monkeypatch):
+    clock = iter([0.0, 1.0, 3.0, 4.0])
+    monkeypatch.setattr(selene_trace.time, "perf_counter", lambda: next(clock))
+    trace = selene_trace.Trace("x")
+    with trace.phase("load"):
+        with trace.phase("load.cache"):
+            pass
+    assert trace.phases == {"load": 2.0, "load.cache": 2.0}
@@ -0,0 +1,98 @@
+import sys
+import pathlib
+import sqlite3
+
+# Add the root of tasks2 (where selene.py lives) to Python path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import selene
+import selene_vectors
+from conftest import run
+
+
+def test_chat_uses_embeddings_and_updates_incrementally(backend, monkeypatch):
+    run("note-add", "Exhausted", "--body", "tiredness all afternoon, napped twice")
+    run("note-add", "Groceries", "--body", "milk, eggs, spinach")
+    run("task-add", "Buy spinach and eggs")
+    store = selene.open_store()
+    notes, tasks = selene.chat_hits(store, "so tired")  # "tired" only shares a stem with "tiredness"
+    assert [n["title"] for n in notes] == ["Exhausted"] and notes[0]["body"].startswith("tiredness")
+    assert [t["title"] for t in selene.chat_hits(store, "eggs")[1]] == ["Buy spinach and eggs"]
+
+    embedded = []
+    real_embed = selene_vectors.VectorIndex.embed
+    monkeypatch.setattr(selene_vectors.VectorIndex, "embed",
+                        lambda self, docs, n: embedded.append(len(docs)) or real_embed(self, docs, n))
+    selene.add_note(store, "Spinach soup", "spinach, garlic")
+    selene.delete_task(store, 1)
+    notes, tasks = selene.chat_hits(store, "spinach")
+    assert embedded == [1, 1]  # the new note, then the query; nothing else is recomputed
+    assert [n["title"] for n in notes] == ["Spinach soup", "Groceries"] and tasks == []
+
+
+def test_chat_leaves_out_records_that_share_nothing_with_the_query(backend):
+    for title in ("Email professor", "Renew passport", "Write essay", "Call landlord", "Water plants"):
+        run("task-add", title)
+    run("note-add", "Cramps journal", "--body", "cramping since morning, heat pad helped")
+    run("note-add", "Reading list", "--body", "novels for the break")
+    run("note-add", "Budget", "--body", "rent, phone, groceries")
+    store = selene.open_store()
+    assert selene.chat_hits(store, "migraine") == ([], [])
+    notes, tasks = selene.chat_hits(store, "cramps")  # shares only the stem "cram~" with the journal
+    assert [n["title"] for n in notes] == ["Cramps journal"] and tasks == []
+    notes, tasks = selene.chat_hits(store, "essay about passport renewal")
+    assert notes == [] and {t["title"] for t in tasks} == {"Write essay", "Renew passport"}
+
+
+def test_sync_keeps_other_writers_out_until_the_queue_is_cleared(backend):
+    run("note-add", "Groceries", "--body", "milk, eggs, spinach")
+    store = selene.open_store()
+    conn = store._search_index().conn
+    other = sqlite3.connect(conn.execute("PRAGMA database_list").fetchone()[2], timeout=0)
+    queued = []
+
+    def lookup(kind, doc_id):
+        try:  # another process queues a record while this one embeds
+            with other:
+                other.execute("INSERT INTO vector_dirty (kind, doc_id) VALUES ('note', 99)")
+            queued.append(99)
+        except sqlite3.OperationalError:  # locked: it retries after the sync commits
+            pass
+        return store.get_note(doc_id)
+
+    selene_vectors.VectorIndex(conn).sync(lookup)
+    left = conn.execute("SELECT doc_id FROM vector_dirty").fetchall()
+    assert left == [(doc_id,) for doc_id in queued]  # nothing queued meanwhile was dropped
+    other.close()
+
+
+def test_ann_agrees_with_exact_search(tmp_path, monkeypatch):
+    import sqlite3
+    from selene_search import SearchIndex
+    monkeypatch.setattr(selene_vectors, "ANN_MIN_DOCS", 1)
+    monkeypatch.setattr(selene_vectors, "IVF_PROBES", 4)
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(300)]
+    docs = {i: {"id": i, "title": " ".join(rng.choice(words, 3)), "body": " ".join(rng.choice(words, 20))}
+            for i in range(1, 401)}
+    index = SearchIndex(sqlite3.connect(tmp_path / "x.db"))
+    with index.conn:
+        for doc in docs.values():
+            index.add("note", doc)
+    vectors = selene_vectors.VectorIndex(index.conn)
+    vectors.sync(lambda kind, doc_id: docs[doc_id])
+    assert vectors.kinds["note"].vecs.dtype == np.float32 and vectors.kinds["note"].vecs.flags["C_CONTIGUOUS"]
+    agree = 0
+    for doc in list(docs.values())[:20]:
+        query = doc["body"]
+        exact = vectors.search(query, "note", 1)
+        approx = vectors.search(query, "note", 1, ann=True)
+        assert exact[0][0] == doc["id"]
+        agree += approx[:1] == exact[:1]
+    assert agree >= 15
@@ -1,3 +1,4 @@
+import json
 import sys
 import pathlib
 
@@ -6,7 +7,9 @@ ROOT = pathlib.Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from main import add_task, list_tasks
+import pytest
+
+from main import ConflictError, add_task, list_tasks, save_tasks
 
 
 def test_add_task_creates_entry(tmp_path, monkeypatch):
@@ -21,3 +24,77 @@ def test_add_task_creates_entry(tmp_path, monkeypatch):
     assert tasks[0]["title"] == "Study for exam"
     assert tasks[0]["due"] == "2025-12-01"
     assert "school" in tasks[0]["tags"]
+
+
+def test_add_task_ids_do_not_repeat_after_removal(tmp_path, monkeypatch):
+    test_file = tmp_path / "tasks3_tasks.json"
+    monkeypatch.setattr("main.DATA_FILE", str(test_file))
+
+    add_task("First")
+    add_task("Second")
+    save_tasks([t for t in list_tasks() if t["id"] != 1])
+
+    task = add_task("Third")
+    assert task["id"] == 3
+    assert [t["id"] for t in list_tasks()] == [2, 3]
+
+
+def test_removing_the_newest_task_frees_its_id(tmp_path, monkeypatch):
+    # ids are max + 1 of what is in the file; there is no persisted counter
+    test_file = tmp_path / "tasks3_tasks.json"
+    monkeypatch.setattr("main.DATA_FILE", str(test_file))
+
+    add_task("First")
+    add_task("Second")
+    save_tasks([t for t in list_tasks() if t["id"] != 2])
+
+    assert add_task("Third")["id"] == 2
+
+
+def save_from_another_process(path, tasks):
+    # bypasses this process's load/save bookkeeping, like a second CLI would
+    path.write_text(json.dumps(tasks, indent=2))
+
+
+def test_stale_save_merges_instead_of_overwriting(tmp_path, monkeypatch):
+    test_file = tmp_path / "tasks3_tasks.json"
+    monkeypatch.setattr("main.DATA_FILE", str(test_file))
+    add_task("First")
+    add_task("Second")
+
+    mine = list_tasks()
+    save_from_another_process(test_file, mine + [{"id": 3, "title": "Added elsewhere", "status": "open"}])
+
+    mine[1]["status"] = "done"
+    mine = [t for t in mine if t["id"] != 1]
+    mine.append({"id": 3, "title": "Added here", "status": "open"})
+    save_tasks(mine)
+
+    assert [(t["id"], t["title"], t["status"]) for t in list_tasks()] == [
+        (2, "Second", "done"), (3, "Added elsewhere", "open"), (4, "Added here", "open"),
+    ]
+    assert mine[-1]["id"] == 4  # the clashing id was moved in place
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_conflicting_edit_is_rejected(tmp_path, monkeypatch):
+    test_file = tmp_path / "tasks3_tasks.json"
+    monkeypatch.setattr("main.DATA_FILE", str(test_file))
+    add_task("First")
+    mine = list_tasks()
+    save_from_another_process(test_file, [dict(mine[0], title="Renamed elsewhere")])
+
+    mine[0]["status"] = "done"
+    with pytest.raises(ConflictError):
+        save_tasks(mine)
+    assert list_tasks()[0]["title"] == "Renamed elsewhere"
+
+
+def test_corrupt_file_is_an_error_not_an_empty_list(tmp_path, monkeypatch):
+    test_file = tmp_path / "tasks3_tasks.json"
+    monkeypatch.setattr("main.DATA_FILE", str(test_file))
+    test_file.write_text('[{"id": 1, "title": "Fir')
+
+    with pytest.raises(ValueError, match="not valid JSON"):
+        add_task("Second")
+    assert test_file.read_text() == '[{"id": 1, "title": "Fir'
@@ -1,22 +1,230 @@
+# tasks4/main.py — summarize notes through a pluggable backend
+# Paragraphs (the demo ones below, or the notes of a Selene store) are
+# summarized in batches, several batches at a time, with retries. Results are
+# cached on disk by content hash, so unchanged notes are never sent again.
+#
+#   python main.py                                      # demo, local truncation
+#   python main.py --selene ../tasks2/selene_data.json  # every note in a store
+#   python mock_llm.py --port 8000 &                    # OpenAI-compatible stand-in
+#   python main.py --backend api --base-url http://127.0.0.1:8000/v1
+
+import argparse
+import asyncio
+import hashlib
+import json
 import os
-from openai import OpenAI
+import random
+import sys
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = "summary_cache.json"  # in the working directory, like the Selene store
+SUMMARY_LEN = 40
 
 paragraphs = [
     "Today I need to finish assembling my PKMS semester project, record the demo video, upload everything to GitHub, and make sure the timeline is documented clearly.",
     "I should revise my personal notes from last week, reorganize my tasks by energy level, and check which assignments are approaching their deadlines."
 ]
 
+
 def summarize(text: str) -> str:
-    return text[:40] + "..."
+    return text[:SUMMARY_LEN] + "..."
+
+
+# -----------------------------
+# Backends: summarize_batch(texts) -> one summary per text
+# -----------------------------
+class RetryableError(Exception):
+    """A failure worth retrying: rate limit, timeout, server error, garbled reply."""
+
+
+class TruncateBackend:
+    """Local and instant: the first SUMMARY_LEN characters."""
+
+    name = "truncate"
+
+    def summarize_batch(self, texts):
+        return [summarize(t) for t in texts]
+
+
+class ApiBackend:
+    """An OpenAI-compatible chat completions endpoint (or mock_llm.py).
+
+    The whole batch goes out as one request: a JSON array of paragraphs in,
+    a JSON array of summaries back.
+    """
+
+    PROMPT = ("Summarize each paragraph in the JSON array you are given in one short sentence. "
+              "Reply with only a JSON array of strings, one per paragraph, in the same order.")
+
+    def __init__(self, model="gpt-4o-mini", base_url=None, api_key=None, timeout=30.0):
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.name = f"api:{model}"
+        self._client = None
+
+    @property
+    def client(self):
+        # created on first use: importing openai costs noticeable startup time,
+        # and the truncate backend never needs it
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(
+                api_key=self.api_key or os.getenv("OPENAI_API_KEY") or "unused",
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0,  # retries and backoff are ours (see with_retry)
+            )
+        return self._client
+
+    def summarize_batch(self, texts):
+        import openai
+        try:
+            reply = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "system", "content": self.PROMPT},
+                          {"role": "user", "content": json.dumps(texts)}],
+            )
+        except (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError) as e:
+            raise RetryableError(str(e)) from e
+        try:
+            summaries = json.loads(reply.choices[0].message.content)
+        except (TypeError, ValueError) as e:
+            raise RetryableError(f"Reply is not JSON: {e}") from e
+        if not isinstance(summaries, list) or len(summaries) != len(texts):
+            raise RetryableError(f"Expected {len(texts)} summaries, got {summaries!r:.80}")
+        return [str(s) for s in summaries]
+
+
+# -----------------------------
+# Cache: content hash -> summary
+# -----------------------------
+class SummaryCache:
+    """JSON file of summaries keyed by a hash of (backend, text)."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        self.dirty = False
 
+    @staticmethod
+    def key(backend, text):
+        return hashlib.blake2b(f"{backend.name}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, summary):
+        self.entries[key] = summary
+        self.dirty = True
+
+    def save(self):
+        if not (self.path and self.dirty):
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)  # readers never see a half-written cache
+        self.dirty = False
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+async def with_retry(call, retries=4, base_delay=0.5):
+    """Await call(), retrying RetryableError with exponential backoff and jitter."""
+    for attempt in range(retries + 1):
+        try:
+            return await call()
+        except RetryableError:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(base_delay * 2 ** attempt * (0.5 + random.random()))
+
+
+async def summarize_all(texts, backend, cache, concurrency=4, batch_size=8, retries=4, base_delay=0.5):
+    """Summaries for `texts`, in order. Returns (summaries, stats).
+
+    Only texts missing from the cache are sent, deduplicated, in batches of
+    `batch_size` with at most `concurrency` batches in flight. Finished
+    batches are in the cache even if a later one fails.
+    """
+    keys = [cache.key(backend, t) for t in texts]
+    todo = {}
+    cached = 0
+    for k, t in zip(keys, texts):
+        if cache.get(k) is None:
+            todo.setdefault(k, t)
+        else:
+            cached += 1
+    todo = list(todo.items())
+    batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+    gate = asyncio.Semaphore(concurrency)
+
+    async def run(batch):
+        async with gate:
+            summaries = await with_retry(
+                lambda: asyncio.to_thread(backend.summarize_batch, [t for _, t in batch]), retries, base_delay
+            )
+        for (k, _), s in zip(batch, summaries):
+            cache.put(k, s)
+
+    await asyncio.gather(*(run(b) for b in batches))
+    stats = {"texts": len(texts), "cached": cached, "sent": len(todo), "requests": len(batches)}
+    return [cache.get(k) for k in keys], stats
+
+
+def selene_notes(data_file):
+    """[(label, text)] for every note in a Selene store (tasks2), newest first."""
+    sys.path.insert(0, os.path.join(HERE, "..", "tasks2"))
+    import selene
+    selene.DATA_FILE = data_file
+    store = selene.open_store()
+    out = []
+    for n in store.notes():
+        body = store.get_note(n["id"])["body"]
+        out.append((f"Note#{n['id']} {n['title']}", f"{n['title']}. {body}" if body else n["title"]))
+    return out
+
+
+def build_backend(args):
+    if args.backend == "api":
+        return ApiBackend(args.model, args.base_url)
+    return TruncateBackend()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Summarize notes")
+    p.add_argument("--selene", metavar="DATA_FILE", help="Summarize the notes of this Selene store")
+    p.add_argument("--backend", default="truncate", choices=["truncate", "api"])
+    p.add_argument("--model", default="gpt-4o-mini")
+    p.add_argument("--base-url", help="API base URL, e.g. http://127.0.0.1:8000/v1 for mock_llm.py")
+    p.add_argument("--concurrency", type=int, default=4, help="Batches in flight at once")
+    p.add_argument("--batch-size", type=int, default=8, help="Paragraphs per request")
+    p.add_argument("--retries", type=int, default=4)
+    p.add_argument("--cache", default=CACHE_FILE, help="Summary cache file (default: ./summary_cache.json)")
+    p.add_argument("--no-cache", action="store_true")
+    args = p.parse_args(argv)
+
+    items = selene_notes(args.selene) if args.selene else [(None, t) for t in paragraphs]
+    cache = SummaryCache(None if args.no_cache else args.cache)
+    try:
+        summaries, stats = asyncio.run(summarize_all(
+            [t for _, t in items], build_backend(args), cache, args.concurrency, args.batch_size, args.retries,
+        ))
+    finally:
+        cache.save()
 
-def main():
     print("Summaries:\n")
-    for p in paragraphs:
-        short = summarize(p)
-        print(f"- {short}")
+    for (label, _), short in zip(items, summaries):
+        print(f"- {label}: {short}" if label else f"- {short}")
+    print(f"\n{stats['texts']} summarized: {stats['cached']} from cache, "
+          f"{stats['sent']} sent in {stats['requests']} request(s)")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,76 @@
+# tasks4/mock_llm.py — a local stand-in for an OpenAI-compatible API
+# Serves POST /v1/chat/completions and answers every request the way
+# ApiBackend expects: a JSON array with one truncation summary per paragraph.
+# --fail-rate makes that share of requests fail with 429 or 503, to exercise
+# the retry path; --delay simulates latency.
+#
+#   python mock_llm.py --port 8000 --fail-rate 0.2 --delay 0.1
+
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUMMARY_LEN = 40  # same as main.summarize, so results match the truncate backend
+
+
+class Handler(BaseHTTPRequestHandler):
+    fail_rate = 0.0
+    delay = 0.0
+    requests = 0
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            return self._send(404, {"error": {"message": "Not found"}})
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        type(self).requests += 1
+        time.sleep(self.delay)
+        if random.random() < self.fail_rate:
+            status = random.choice([429, 503])
+            return self._send(status, {"error": {"message": "Simulated failure", "code": status}})
+        paragraphs = json.loads(request["messages"][-1]["content"])
+        self._send(200, {
+            "id": f"mock-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps([p[:SUMMARY_LEN] + "..." for p in paragraphs])},
+            }],
+        })
+
+
+def serve(host="127.0.0.1", port=8000, fail_rate=0.0, delay=0.0):
+    handler = type("MockHandler", (Handler,), {"fail_rate": fail_rate, "delay": delay, "requests": 0})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Mock OpenAI-compatible summarization server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 429/503")
+    p.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before answering")
+    args = p.parse_args()
+    server = serve(args.host, args.port, args.fail_rate, args.delay)
+    print(f"Mock LLM on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import asyncio
+import importlib.util
+import pathlib
+import subprocess
+import sys
+import threading
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def _load(name, filename):
+    # tasks3 also has a main.py; load ours under its own name so the two don't collide
+    spec = importlib.util.spec_from_file_location(name, ROOT / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+main = _load("tasks4_main", "main.py")
+
+
+class CountingBackend(main.TruncateBackend):
+    """Truncation that records its batches, fails the first `failures` calls and tracks calls in flight."""
+
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def summarize_batch(self, texts):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            threading.Event().wait(0.02)
+            with self.lock:
+                if self.failures:
+                    self.failures -= 1
+                    raise main.RetryableError("try again")
+                self.batches.append(list(texts))
+            return super().summarize_batch(texts)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def run(texts, backend, cache, **kw):
+    kw.setdefault("base_delay", 0)
+    return asyncio.run(main.summarize_all(texts, backend, cache, **kw))
+
+
+def test_batches_respect_size_and_concurrency():
+    texts = [f"Paragraph number {i} about the semester project" for i in range(20)]
+    backend = CountingBackend()
+    summaries, stats = run(texts, backend, main.SummaryCache(), batch_size=3, concurrency=2)
+
+    assert summaries == [main.summarize(t) for t in texts]
+    assert [len(b) for b in backend.batches].count(3) == 6 and len(backend.batches) == 7
+    assert stats == {"texts": 20, "cached": 0, "sent": 20, "requests": 7}
+    assert backend.peak <= 2
+
+
+def test_cache_skips_unchanged_and_duplicate_texts(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = main.SummaryCache(path)
+    run(["alpha note", "beta note", "alpha note"], CountingBackend(), cache)
+    cache.save()
+
+    backend = CountingBackend()
+    summaries, stats = run(["alpha note", "beta note", "gamma note"], backend, main.SummaryCache(path))
+    assert backend.batches == [["gamma note"]]
+    assert stats["cached"] == 2 and stats["sent"] == 1
+    assert summaries[0] == main.summarize("alpha note")
+
+
+def test_retry_recovers_from_transient_failures():
+    backend = CountingBackend(failures=2)
+    summaries, _ = run(["a", "b"], backend, main.SummaryCache(), retries=3)
+    assert summaries == ["a...", "b..."]
+
+    with pytest.raises(main.RetryableError):
+        run(["c"], CountingBackend(failures=5), main.SummaryCache(), retries=2)
+
+
+def test_import_does_not_load_openai():
+    code = f"import sys; sys.path.insert(0, {str(ROOT)!r}); import main; print('openai' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_api_backend_against_mock_server():
+    pytest.importorskip("openai")
+    mock_llm = _load("tasks4_mock_llm", "mock_llm.py")
+    server = mock_llm.serve(port=0, fail_rate=0.3)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        backend = main.ApiBackend("mock", f"http://127.0.0.1:{server.server_port}/v1", api_key="test")
+        texts = [f"Note {i}: revise the chapter on probability" for i in range(10)]
+        summaries, stats = run(texts, backend, main.SummaryCache(), batch_size=4, retries=8)
+        assert summaries == [main.summarize(t) for t in texts]
+        assert stats["requests"] == 3
+    finally:
+        server.shutdown()